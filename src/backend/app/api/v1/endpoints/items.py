@@ -1,15 +1,24 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import Select, select
-from sqlalchemy.orm import Session
+import csv
+import io
+import json
+from typing import NoReturn
 
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import Select, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
 from app.db.models import Competency, Item, Standard, Teacher
-from app.db.session import get_db
-from app.schemas.item_bank import CurriculumRef, ItemCreate, ItemRead
+from app.db.session import SessionRunner, get_db_runner
+from app.schemas.item_bank import CurriculumRef, ItemCreate, ItemImportError, ItemImportResult, ItemRead
 
 router = APIRouter(prefix="/items", tags=["items"])
 
+IMPORT_READ_CHUNK_BYTES = 1024 * 1024
+
 
 def _resolve_curriculum(
     db: Session,
@@ -80,7 +89,11 @@ def _to_item_read(item: Item) -> ItemRead:
 
 
 @router.post("", response_model=ItemRead, status_code=status.HTTP_201_CREATED)
-def create_item(payload: ItemCreate, db: Session = Depends(get_db)) -> ItemRead:
+async def create_item(payload: ItemCreate, runner: SessionRunner = Depends(get_db_runner)) -> ItemRead:
+    return await runner.run(lambda db: _create_item(db, payload))
+
+
+def _create_item(db: Session, payload: ItemCreate) -> ItemRead:
     teacher = db.get(Teacher, payload.teacher_id)
     if teacher is None:
         raise HTTPException(
@@ -107,16 +120,250 @@ def create_item(payload: ItemCreate, db: Session = Depends(get_db)) -> ItemRead:
 
 
 @router.get("", response_model=list[ItemRead])
-def list_items(db: Session = Depends(get_db)) -> list[ItemRead]:
-    statement = select(Item).order_by(Item.id.asc())
-    items = db.scalars(statement).all()
-    return [_to_item_read(item) for item in items]
+async def list_items(
+    response: Response,
+    after_id: int | None = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    subject: str | None = None,
+    difficulty: str | None = None,
+    standard_code: str | None = None,
+    competency_code: str | None = None,
+    runner: SessionRunner = Depends(get_db_runner),
+) -> list[ItemRead]:
+    # Paginacion por llave (id > after_id) y carga anticipada del curriculo: sin N+1.
+    statement = (
+        select(Item)
+        .options(joinedload(Item.standard), joinedload(Item.competency))
+        .order_by(Item.id.asc())
+        .limit(limit)
+    )
+    if after_id is not None:
+        statement = statement.where(Item.id > after_id)
+    if subject is not None:
+        statement = statement.where(Item.subject == subject)
+    if difficulty is not None:
+        statement = statement.where(Item.difficulty == difficulty)
+    if standard_code is not None:
+        statement = statement.where(Item.standard.has(Standard.code == standard_code))
+    if competency_code is not None:
+        statement = statement.where(Item.competency.has(Competency.code == competency_code))
+
+    items = await runner.run(lambda db: [_to_item_read(item) for item in db.scalars(statement).all()])
+    if len(items) == limit:
+        response.headers["X-Next-After-Id"] = str(items[-1].id)
+    return items
+
+
+@router.post("/import", response_model=ItemImportResult, status_code=status.HTTP_201_CREATED)
+async def import_items(
+    file: UploadFile = File(...),
+    runner: SessionRunner = Depends(get_db_runner),
+) -> ItemImportResult:
+    """Import items from JSONL (one ItemCreate per line) or CSV in one transaction."""
+    raw = await _read_import_upload(file)
+    try:
+        content = raw.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        _reject_import([ItemImportError(line=0, detail=f"file is not valid UTF-8 (byte {exc.start})")])
+    is_csv = (file.filename or "").lower().endswith(".csv")
+    payloads, errors = _parse_item_import(content, is_csv=is_csv)
+    return await runner.run(lambda db: _import_items(db, payloads, errors))
+
+
+async def _read_import_upload(file: UploadFile) -> bytes:
+    max_bytes = settings.item_import_max_bytes
+    too_large = ItemImportError(line=0, detail=f"import exceeds {max_bytes} bytes")
+    # El tamano declarado evita leer el archivo; sin el, se corta al pasar el limite.
+    if file.size is not None and file.size > max_bytes:
+        _reject_import([too_large])
+    chunks: list[bytes] = []
+    total = 0
+    while chunk := await file.read(IMPORT_READ_CHUNK_BYTES):
+        total += len(chunk)
+        if total > max_bytes:
+            _reject_import([too_large])
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _reject_import(errors: list[ItemImportError]) -> NoReturn:
+    raise HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=[error.model_dump() for error in sorted(errors, key=lambda item: item.line)],
+    )
+
+
+def _import_items(
+    db: Session,
+    payloads: list[tuple[int, ItemCreate]],
+    errors: list[ItemImportError],
+) -> ItemImportResult:
+    if not errors and not payloads:
+        errors.append(ItemImportError(line=0, detail="import file does not contain items"))
+
+    teacher_ids = {payload.teacher_id for _, payload in payloads}
+    known_teachers = set(db.scalars(select(Teacher.id).where(Teacher.id.in_(teacher_ids)))) if teacher_ids else set()
+    errors.extend(
+        ItemImportError(line=line, detail=f"teacher_id={payload.teacher_id} not found")
+        for line, payload in payloads
+        if payload.teacher_id not in known_teachers
+    )
+    if errors:
+        _reject_import(errors)
+
+    curriculum = _CurriculumCache(db)
+    curriculum.load([payload.curriculum for _, payload in payloads])
+    rows = []
+    for _, payload in payloads:
+        standard_id, competency_id = curriculum.ids_for(payload.curriculum)
+        rows.append(
+            {
+                "teacher_id": payload.teacher_id,
+                "statement": payload.statement.strip(),
+                "options": payload.options,
+                "correct_answer": payload.correct_answer,
+                "subject": payload.subject,
+                "difficulty": payload.difficulty,
+                "standard_id": standard_id,
+                "competency_id": competency_id,
+                "metadata_json": payload.metadata,
+            }
+        )
+    db.execute(insert(Item), rows)
+    db.commit()
+    return ItemImportResult(
+        imported=len(rows),
+        standards_created=curriculum.standards_created,
+        competencies_created=curriculum.competencies_created,
+    )
 
 
 @router.get("/{item_id}", response_model=ItemRead)
-def get_item(item_id: int, db: Session = Depends(get_db)) -> ItemRead:
+async def get_item(item_id: int, runner: SessionRunner = Depends(get_db_runner)) -> ItemRead:
+    return await runner.run(lambda db: _get_item(db, item_id))
+
+
+def _get_item(db: Session, item_id: int) -> ItemRead:
     item = db.get(Item, item_id)
     if item is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="item not found")
     return _to_item_read(item)
 
+
+class _CurriculumCache:
+    """Resolve curriculum refs for a whole import with a fixed number of queries."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.standards: dict[str, Standard] = {}
+        self.competencies: dict[tuple[str, str], Competency] = {}
+        self.standards_created = 0
+        self.competencies_created = 0
+
+    def load(self, refs: list[CurriculumRef | None]) -> None:
+        standard_names: dict[str, str] = {}
+        competency_names: dict[tuple[str, str], str] = {}
+        for ref in refs:
+            if ref is None or not ref.standard_code:
+                continue
+            standard_names.setdefault(ref.standard_code, ref.standard_name or ref.standard_code)
+            if ref.competency_code:
+                competency_names.setdefault(
+                    (ref.standard_code, ref.competency_code),
+                    ref.competency_name or ref.competency_code,
+                )
+        if not standard_names:
+            return
+
+        for standard in self.db.scalars(select(Standard).where(Standard.code.in_(standard_names))):
+            self.standards[standard.code] = standard
+        missing_standards = [
+            Standard(code=code, name=name) for code, name in standard_names.items() if code not in self.standards
+        ]
+        if missing_standards:
+            self.db.add_all(missing_standards)
+            self.db.flush()
+            self.standards.update((standard.code, standard) for standard in missing_standards)
+            self.standards_created = len(missing_standards)
+
+        if not competency_names:
+            return
+        code_by_standard_id = {standard.id: code for code, standard in self.standards.items()}
+        existing = self.db.scalars(select(Competency).where(Competency.standard_id.in_(code_by_standard_id)))
+        for competency in existing:
+            self.competencies[(code_by_standard_id[competency.standard_id], competency.code)] = competency
+        missing_competencies = [
+            Competency(standard_id=self.standards[standard_code].id, code=code, name=name)
+            for (standard_code, code), name in competency_names.items()
+            if (standard_code, code) not in self.competencies
+        ]
+        if missing_competencies:
+            self.db.add_all(missing_competencies)
+            self.db.flush()
+            self.competencies.update(
+                ((code_by_standard_id[competency.standard_id], competency.code), competency)
+                for competency in missing_competencies
+            )
+            self.competencies_created = len(missing_competencies)
+
+    def ids_for(self, ref: CurriculumRef | None) -> tuple[int | None, int | None]:
+        if ref is None or not ref.standard_code:
+            return None, None
+        standard = self.standards[ref.standard_code]
+        if not ref.competency_code:
+            return standard.id, None
+        return standard.id, self.competencies[(ref.standard_code, ref.competency_code)].id
+
+
+_CSV_CURRICULUM_FIELDS = ("standard_code", "standard_name", "competency_code", "competency_name")
+
+
+def _parse_item_import(content: str, *, is_csv: bool) -> tuple[list[tuple[int, ItemCreate]], list[ItemImportError]]:
+    payloads: list[tuple[int, ItemCreate]] = []
+    errors: list[ItemImportError] = []
+    if is_csv:
+        # Linea 1 es el encabezado.
+        records = ((line, _csv_row_to_payload(row)) for line, row in enumerate(csv.DictReader(io.StringIO(content)), 2))
+    else:
+        records = ((line, text) for line, text in enumerate(content.splitlines(), 1) if text.strip())
+
+    max_rows = settings.item_import_max_rows
+    for index, (line, record) in enumerate(records):
+        # Se deja de parsear al pasar el limite; el resto del archivo no se valida.
+        if index >= max_rows:
+            _reject_import([ItemImportError(line=0, detail=f"import exceeds {max_rows} items")])
+        try:
+            raw = json.loads(record) if isinstance(record, str) else record
+            payload = ItemCreate.model_validate(raw)
+        except json.JSONDecodeError as exc:
+            errors.append(ItemImportError(line=line, detail=f"invalid JSON: {exc.msg}"))
+            continue
+        except ValidationError as exc:
+            errors.append(ItemImportError(line=line, detail=_validation_detail(exc)))
+            continue
+        curriculum = payload.curriculum
+        if curriculum is not None and curriculum.competency_code and not curriculum.standard_code:
+            errors.append(ItemImportError(line=line, detail="competency_code requires standard_code"))
+            continue
+        payloads.append((line, payload))
+    return payloads, errors
+
+
+def _csv_row_to_payload(row: dict[str, str | None]) -> dict:
+    values = {key.strip(): (value or "").strip() for key, value in row.items() if key}
+    curriculum = {field: values[field] for field in _CSV_CURRICULUM_FIELDS if values.get(field)}
+    return {
+        "teacher_id": values.get("teacher_id") or None,
+        "statement": values.get("statement", ""),
+        "options": {label: values.get(f"option_{label.lower()}", "") for label in ("A", "B", "C", "D")},
+        "correct_answer": values.get("correct_answer", ""),
+        "subject": values.get("subject") or None,
+        "difficulty": values.get("difficulty") or None,
+        "curriculum": curriculum or None,
+    }
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}" for error in exc.errors()
+    )
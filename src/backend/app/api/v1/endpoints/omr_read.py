@@ -1,26 +1,147 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import time
+from collections.abc import Iterator
+from pathlib import Path
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
 
 from app.core.config import settings
 from app.modules.omr_reader.api_service import (
     DEFAULT_METADATA_PATH,
+    build_read_artifact_paths,
+    build_uploaded_image_path,
     persist_auxiliary_ratios_csv,
     persist_question_ratios_csv,
     persist_omr_trace_json,
-    persist_uploaded_image_bytes,
     resolve_reader_backend,
     run_omr_read_from_image_bytes,
 )
-from app.modules.omr_reader.errors import OMRReadInputError
+from app.modules.omr_reader.batch import BatchSheet, expand_batch_uploads, run_omr_batch
+from app.modules.omr_reader.errors import InvalidBatchError, OMRReadInputError, ReaderBusyError
+from app.modules.omr_reader.metrics import observe_persistence, observe_read_failure, observe_read_result
+from app.modules.omr_reader.persistence_queue import submit_persistence_job
+from app.modules.omr_reader.process_pool import run_classic_read, submit_classic_read
+from app.modules.omr_reader.read_cache import cached_read_source
+from app.modules.omr_reader.read_logging import log_read_result
+from app.modules.omr_reader.reader_strategy import BACKEND_CLASSIC, normalize_reader_backend
+from app.modules.omr_reader.result_store import persist_omr_read
+from app.modules.omr_reader.stage_timing import StageTimer
 
 router = APIRouter(prefix="/omr", tags=["omr"])
 logger = logging.getLogger("uvicorn.error")
 
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
+
+
+def _queue_uploaded_image(*, image_bytes: bytes, uploaded_path: Path) -> None:
+    def write_upload() -> list[Path]:
+        with observe_persistence("upload"):
+            uploaded_path.write_bytes(image_bytes)
+        return [uploaded_path]
+
+    submit_persistence_job(write_upload)
+
+
+def _persist_read_artifacts(*, uploaded_path: Path, result: dict) -> tuple[Path, Path, Path]:
+    def write_artifacts() -> list[Path]:
+        written = []
+        for job, persist in (
+            ("trace_json", persist_omr_trace_json),
+            ("ratios_csv", persist_question_ratios_csv),
+            ("auxiliary_ratios_csv", persist_auxiliary_ratios_csv),
+        ):
+            with observe_persistence(job):
+                written.append(persist(uploaded_image_path=uploaded_path, result_payload=result))
+        return written
+
+    def store_read() -> list[Path]:
+        with observe_persistence("database"):
+            persist_omr_read(result=result, uploaded_image_path=str(uploaded_path))
+        return []
+
+    # Las escrituras salen del camino critico; las rutas ya se conocen para el diagnostico.
+    submit_persistence_job(write_artifacts)
+    if settings.omr_store_reads_in_db:
+        submit_persistence_job(store_read)
+    return _describe_read_artifacts(uploaded_path=uploaded_path, result=result)
+
+
+def _describe_read_artifacts(*, uploaded_path: Path, result: dict) -> tuple[Path, Path, Path]:
+    paths = build_read_artifact_paths(uploaded_image_path=uploaded_path)
+    result.setdefault("diagnostics", {})
+    result["diagnostics"]["uploaded_image_path"] = str(uploaded_path)
+    result["diagnostics"]["trace_json_path"] = str(paths["trace_json"])
+    result["diagnostics"]["ratios_csv_path"] = str(paths["ratios_csv"])
+    result["diagnostics"]["auxiliary_ratios_csv_path"] = str(paths["auxiliary_ratios_csv"])
+    review_questions = sorted(
+        int(item.get("question_number"))
+        for item in result.get("questions", [])
+        if item.get("ambiguous_options")
+    )
+    result["diagnostics"]["manual_review_questions"] = review_questions
+    result["diagnostics"]["manual_review_required"] = bool(review_questions)
+    return paths["trace_json"], paths["ratios_csv"], paths["auxiliary_ratios_csv"]
+
+
+def _save_read(*, image_bytes: bytes, uploaded_path: Path, result: dict, timer: StageTimer) -> tuple[Path, ...]:
+    """Queue the photo, artifacts and DB row of a fresh read; reuse the source files on cache hits.
+
+    Returns the upload path followed by the trace and ratio CSV paths.
+    """
+    source_path = cached_read_source(result)
+    if source_path is not None:
+        # La lectura original ya guardo foto, artefactos y fila: un reintento no los duplica.
+        return (source_path, *_describe_read_artifacts(uploaded_path=source_path, result=result))
+    with timer.span("upload_queue"):
+        _queue_uploaded_image(image_bytes=image_bytes, uploaded_path=uploaded_path)
+    with timer.span("persistence_queue"):
+        return (uploaded_path, *_persist_read_artifacts(uploaded_path=uploaded_path, result=result))
+
+
+def _record_request_timings(
+    *,
+    result: dict,
+    timer: StageTimer,
+    read_ms: float,
+    request_start: float,
+) -> None:
+    diagnostics = result.setdefault("diagnostics", {})
+    stages = diagnostics.setdefault("stage_timings_ms", {})
+    # Lo que el motor no explica (cola/IPC del pool de procesos) se reporta como `dispatch`.
+    stages["dispatch"] = round(max(0.0, read_ms - sum(stages.values())), 3)
+    stages.update(timer.as_dict())
+    diagnostics["request_total_ms"] = round((time.perf_counter() - request_start) * 1000.0, 2)
+    observe_read_result(result)
+
+
+async def _read_batch_uploads(photos: list[UploadFile]) -> list[tuple[str | None, bytes]]:
+    # Los limites del lote se aplican antes y durante la lectura de cada archivo:
+    # un envio demasiado grande se rechaza sin cargarlo completo en memoria.
+    max_sheets = settings.omr_batch_max_sheets
+    max_total_bytes = settings.omr_batch_max_total_bytes
+    if len(photos) > max_sheets:
+        raise InvalidBatchError(f"batch exceeds the maximum of {max_sheets} sheets")
+    declared = sum(photo.size or 0 for photo in photos)
+    if declared > max_total_bytes:
+        raise InvalidBatchError(f"batch exceeds the maximum of {max_total_bytes} bytes")
+
+    uploads: list[tuple[str | None, bytes]] = []
+    total_bytes = 0
+    for photo in photos:
+        chunks: list[bytes] = []
+        while chunk := await photo.read(UPLOAD_READ_CHUNK_BYTES):
+            total_bytes += len(chunk)
+            if total_bytes > max_total_bytes:
+                raise InvalidBatchError(f"batch exceeds the maximum of {max_total_bytes} bytes")
+            chunks.append(chunk)
+        uploads.append((photo.filename, b"".join(chunks)))
+    return uploads
+
 
 @router.post("/read-photo")
 async def read_photo_omr(
@@ -30,6 +151,7 @@ async def read_photo_omr(
     robust_mode: bool = Form(False),
     save_debug_artifacts: bool = Form(True),
 ) -> dict:
+    configured_backend = normalize_reader_backend(settings.omr_reader_backend)
     try:
         request_start = time.perf_counter()
         configured_backend = resolve_reader_backend(None)
@@ -48,198 +170,147 @@ async def read_photo_omr(
                 metadata_path,
                 effective_metadata_path,
             )
-        uploaded_path = persist_uploaded_image_bytes(
+        timer = StageTimer()
+        uploaded_path = build_uploaded_image_path(original_filename=photo.filename)
+        read_kwargs = {
+            "image_bytes": image_bytes,
+            "metadata_path": effective_metadata_path,
+            "px_per_mm": px_per_mm,
+            "marked_threshold": settings.omr_marked_threshold,
+            "unmarked_threshold": settings.omr_unmarked_threshold,
+            "robust_mode": robust_mode,
+            "save_debug_artifacts": save_debug_artifacts,
+            "debug_base_name": uploaded_path.stem,
+            "uploaded_image_path": str(uploaded_path),
+        }
+        read_start = time.perf_counter()
+        try:
+            if configured_backend == BACKEND_CLASSIC:
+                # Motor CPU-bound: se despacha al pool de procesos para no bloquear el event loop.
+                result = await run_classic_read(**read_kwargs)
+            else:
+                result = await asyncio.to_thread(lambda: run_omr_read_from_image_bytes(**read_kwargs))
+        except Exception:
+            # La foto de una lectura fallida tambien se guarda para poder revisarla.
+            await asyncio.to_thread(_queue_uploaded_image, image_bytes=image_bytes, uploaded_path=uploaded_path)
+            raise
+        read_ms = (time.perf_counter() - read_start) * 1000.0
+        # En modo sync (o con la cola llena) la escritura ocurre en el llamador:
+        # se hace fuera del event loop para no frenar a las demas requests.
+        uploaded_path, trace_json_path, ratios_csv_path, auxiliary_ratios_csv_path = await asyncio.to_thread(
+            _save_read,
             image_bytes=image_bytes,
-            original_filename=photo.filename,
-        )
-        result = run_omr_read_from_image_bytes(
-            image_bytes=image_bytes,
-            metadata_path=effective_metadata_path,
-            px_per_mm=px_per_mm,
-            marked_threshold=settings.omr_marked_threshold,
-            unmarked_threshold=settings.omr_unmarked_threshold,
-            robust_mode=robust_mode,
-            save_debug_artifacts=save_debug_artifacts,
-            debug_base_name=uploaded_path.stem,
-        )
-        trace_json_path = persist_omr_trace_json(
-            uploaded_image_path=uploaded_path,
-            result_payload=result,
+            uploaded_path=uploaded_path,
+            result=result,
+            timer=timer,
         )
-        ratios_csv_path = persist_question_ratios_csv(
-            uploaded_image_path=uploaded_path,
-            result_payload=result,
+        _record_request_timings(result=result, timer=timer, read_ms=read_ms, request_start=request_start)
+        log_read_result(
+            result=result,
+            uploaded_path=uploaded_path,
+            trace_json_path=trace_json_path,
+            ratios_csv_path=ratios_csv_path,
+            auxiliary_ratios_csv_path=auxiliary_ratios_csv_path,
+            configured_backend=configured_backend,
         )
-        auxiliary_ratios_csv_path = persist_auxiliary_ratios_csv(
-            uploaded_image_path=uploaded_path,
-            result_payload=result,
-        )
-        result.setdefault("diagnostics", {})
-        result["diagnostics"]["uploaded_image_path"] = str(uploaded_path)
-        result["diagnostics"]["trace_json_path"] = str(trace_json_path)
-        result["diagnostics"]["ratios_csv_path"] = str(ratios_csv_path)
-        result["diagnostics"]["auxiliary_ratios_csv_path"] = str(auxiliary_ratios_csv_path)
-        result["diagnostics"]["request_total_ms"] = round((time.perf_counter() - request_start) * 1000.0, 2)
-        review_questions = sorted(
-            int(item.get("question_number"))
-            for item in result.get("questions", [])
-            if item.get("ambiguous_options")
-        )
-        result["diagnostics"]["manual_review_questions"] = review_questions
-        result["diagnostics"]["manual_review_required"] = bool(review_questions)
-        logger.info(
-            "OMR read completed | template=%s version=%s summary=%s",
-            result.get("template_id"),
-            result.get("version"),
-            json.dumps(result.get("quality_summary", {}), ensure_ascii=False),
-        )
-        logger.info("OMR image saved at: %s", uploaded_path)
-        logger.info("OMR trace json saved at: %s", trace_json_path)
-        logger.info("OMR ratios csv saved at: %s", ratios_csv_path)
-        logger.info("OMR auxiliary ratios csv saved at: %s", auxiliary_ratios_csv_path)
-        diagnostics = result.get("diagnostics", {})
-        engine = diagnostics.get("reader_backend", configured_backend)
-        usage = diagnostics.get("gemini_usage", {})
-        if engine == "openai":
-            usage = diagnostics.get("openai_usage", usage)
-        report = diagnostics.get("gemini_report", {})
-        if engine == "openai":
-            report = diagnostics.get("openai_report", report)
-        gemini_latency_ms = diagnostics.get("gemini_model_latency_ms")
-        if engine == "openai":
-            gemini_latency_ms = diagnostics.get("openai_model_latency_ms")
-        request_total_ms = diagnostics.get("request_total_ms")
-        logger.info(
-            "OMR engine=%s usage=%s report=%s gemini_model_latency_ms=%s request_total_ms=%s",
-            engine,
-            json.dumps(usage, ensure_ascii=False),
-            json.dumps(report, ensure_ascii=False),
-            gemini_latency_ms,
-            request_total_ms,
-        )
-        auxiliary = result.get("auxiliary", {})
-        blocks = auxiliary.get("blocks", []) if isinstance(auxiliary, dict) else []
-        by_id = {str(item.get("block_id")): item for item in blocks if isinstance(item, dict)}
-        doc_block = by_id.get("document_type", {})
-        doc_selected = doc_block.get("selected", {}) if isinstance(doc_block, dict) else {}
-        doc_value = doc_selected.get("value")
-        doc_status = doc_selected.get("status")
-        student_block = by_id.get("student_identity_number", {})
-        exam_block = by_id.get("exam_identifier", {})
-        student_value = student_block.get("value") if isinstance(student_block, dict) else None
-        exam_value = exam_block.get("value") if isinstance(exam_block, dict) else None
-
-        def _problem_columns(block_obj: dict) -> list[int]:
-            cols = []
-            for col in block_obj.get("columns", []) if isinstance(block_obj, dict) else []:
-                if str(col.get("status")) in {"missing", "ambiguous"}:
-                    cols.append(int(col.get("column_index", -1)))
-            return cols
-
-        student_problem_cols = _problem_columns(student_block if isinstance(student_block, dict) else {})
-        exam_problem_cols = _problem_columns(exam_block if isinstance(exam_block, dict) else {})
-
-        aux_summary = auxiliary.get("summary", {}) if isinstance(auxiliary, dict) else {}
-        logger.info(
-            "OMR auxiliary summary=%s document_type=%s (%s) student_id=%s exam_id=%s",
-            json.dumps(aux_summary, ensure_ascii=False),
-            doc_value,
-            doc_status,
-            student_value,
-            exam_value,
-        )
-        if student_problem_cols:
-            logger.warning(
-                "OMR alerta revision identidad | problematic_columns=%s",
-                student_problem_cols,
-            )
-        if exam_problem_cols:
-            logger.warning(
-                "OMR alerta revision id_examen | problematic_columns=%s",
-                exam_problem_cols,
-            )
-        if doc_status in {"missing", "ambiguous"}:
-            logger.warning(
-                "OMR alerta revision tipo_documento | status=%s",
-                doc_status,
-            )
-
-        if review_questions:
-            logger.warning(
-                "OMR alerta revisión manual | ambiguous_questions=%s",
-                review_questions,
-            )
-        lines: list[str] = []
-        ratio_lines: list[str] = []
-        for item in result.get("questions", []):
-            question_number = item.get("question_number")
-            marked_options = item.get("marked_options", [])
-            marked_text = ", ".join(marked_options) if marked_options else "-"
-            ambiguous_options = item.get("ambiguous_options", [])
-            review_suffix = ""
-            if ambiguous_options:
-                review_suffix = f" [REVISAR ambigua: {', '.join(ambiguous_options)}]"
-            lines.append(f"pregunta {question_number}: {marked_text}{review_suffix}")
-            options = item.get("options", [])
-            ratios_by_label: dict[str, float] = {}
-            for option in options:
-                label = str(option.get("label", ""))
-                if not label:
-                    continue
-                ratios_by_label[label] = float(option.get("fill_ratio", 0.0))
-            sorted_ratios = sorted(
-                ratios_by_label.items(),
-                key=lambda pair: pair[1],
-                reverse=True,
-            )
-            margin = 0.0
-            if len(sorted_ratios) >= 2:
-                margin = sorted_ratios[0][1] - sorted_ratios[1][1]
-            ratio_text = ", ".join(f"{label}={value:.4f}" for label, value in sorted_ratios)
-            ratio_lines.append(f"pregunta {question_number}: {ratio_text} | margin={margin:.4f}")
-
-        logger.info("OMR respuestas leidas:\n%s", "\n".join(lines))
-        logger.info("OMR ratios por pregunta:\n%s", "\n".join(ratio_lines))
-        aux_ratio_lines: list[str] = []
-        for block in blocks:
-            if not isinstance(block, dict):
-                continue
-            block_id = str(block.get("block_id", "aux"))
-            selection_mode = str(block.get("selection_mode", ""))
-            if selection_mode == "single_choice":
-                selected = block.get("selected", {})
-                ratios_by_row = selected.get("ratios_by_row", {}) if isinstance(selected, dict) else {}
-                pairs = sorted(
-                    ((int(row), float(value)) for row, value in ratios_by_row.items()),
-                    key=lambda pair: pair[1],
-                    reverse=True,
-                )
-                aux_ratio_lines.append(f"{block_id}:")
-                aux_ratio_lines.extend(f"  row{row}={value:.4f}" for row, value in pairs)
-                continue
-
-            for col in block.get("columns", []) if isinstance(block.get("columns"), list) else []:
-                if not isinstance(col, dict):
-                    continue
-                col_index = int(col.get("column_index", -1))
-                ratios_by_row = col.get("ratios_by_row", {})
-                pairs = sorted(
-                    ((int(row), float(value)) for row, value in ratios_by_row.items()),
-                    key=lambda pair: pair[1],
-                    reverse=True,
-                )
-                aux_ratio_lines.append(f"{block_id}[col {col_index}]:")
-                aux_ratio_lines.extend(f"  row{row}={value:.4f}" for row, value in pairs)
-        if aux_ratio_lines:
-            logger.info("OMR ratios auxiliares:\n%s", "\n".join(aux_ratio_lines))
         return result
+    except ReaderBusyError as exc:
+        observe_read_failure(backend=configured_backend, error=exc)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        ) from exc
     except OMRReadInputError as exc:
+        observe_read_failure(backend=configured_backend, error=exc)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(exc),
         ) from exc
     except Exception as exc:  # noqa: BLE001
+        observe_read_failure(backend=configured_backend, error=exc)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"unexpected server error: {exc}",
         ) from exc
+
+
+@router.post("/read-batch")
+async def read_batch_omr(
+    photos: list[UploadFile] = File(...),
+    px_per_mm: float = Form(10.0),
+    robust_mode: bool = Form(False),
+) -> StreamingResponse:
+    try:
+        uploads = await _read_batch_uploads(photos)
+        sheets = expand_batch_uploads(
+            uploads,
+            max_sheets=settings.omr_batch_max_sheets,
+            max_sheet_bytes=settings.omr_batch_max_sheet_bytes,
+            max_total_bytes=settings.omr_batch_max_total_bytes,
+        )
+    except OMRReadInputError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    logger.info(
+        "OMR lote recibido | files=%s sheets=%s workers=%s",
+        len(uploads),
+        len(sheets),
+        settings.omr_batch_max_workers,
+    )
+
+    def read_sheet(sheet: BatchSheet) -> dict:
+        sheet_start = time.perf_counter()
+        timer = StageTimer()
+        uploaded_path = build_uploaded_image_path(original_filename=sheet.source_name)
+        read_start = time.perf_counter()
+        try:
+            # Las hojas del lote esperan cupo en el pool en lugar de fallar por saturacion.
+            result = submit_classic_read(
+                block=True,
+                image_bytes=sheet.image_bytes,
+                metadata_path=settings.omr_default_metadata_path,
+                px_per_mm=px_per_mm,
+                marked_threshold=settings.omr_marked_threshold,
+                unmarked_threshold=settings.omr_unmarked_threshold,
+                robust_mode=robust_mode,
+                save_debug_artifacts=False,
+                debug_base_name=uploaded_path.stem,
+                uploaded_image_path=str(uploaded_path),
+            ).result()
+        except Exception as exc:
+            _queue_uploaded_image(image_bytes=sheet.image_bytes, uploaded_path=uploaded_path)
+            observe_read_failure(backend=BACKEND_CLASSIC, error=exc)
+            raise
+        read_ms = (time.perf_counter() - read_start) * 1000.0
+        uploaded_path, trace_json_path, ratios_csv_path, auxiliary_ratios_csv_path = _save_read(
+            image_bytes=sheet.image_bytes,
+            uploaded_path=uploaded_path,
+            result=result,
+            timer=timer,
+        )
+        _record_request_timings(result=result, timer=timer, read_ms=read_ms, request_start=sheet_start)
+        log_read_result(
+            result=result,
+            uploaded_path=uploaded_path,
+            trace_json_path=trace_json_path,
+            ratios_csv_path=ratios_csv_path,
+            auxiliary_ratios_csv_path=auxiliary_ratios_csv_path,
+            configured_backend=BACKEND_CLASSIC,
+        )
+        return result
+
+    def stream_ndjson() -> Iterator[str]:
+        for record in run_omr_batch(
+            sheets=sheets,
+            read_sheet=read_sheet,
+            max_workers=settings.omr_batch_max_workers,
+        ):
+            if record["type"] == "summary":
+                logger.info("OMR lote completado | summary=%s", json.dumps(record, ensure_ascii=False))
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream_ndjson(), media_type="application/x-ndjson")
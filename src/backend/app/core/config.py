@@ -7,10 +7,49 @@ class Settings(BaseSettings):
     debug: bool = False
     api_v1_prefix: str = "/api/v1"
     database_url: str = "sqlite:///data/omr_app.db"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_s: float = 30.0
+    db_pool_recycle_s: int = 1800
+    db_pool_pre_ping: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size_bytes: int = 268435456
+    database_async_enabled: bool = False
+    database_async_url: str | None = None
+    item_import_max_rows: int = 20000
+    item_import_max_bytes: int = 20 * 1024 * 1024
     omr_reader_backend: str = "classic"
     omr_default_metadata_path: str = "data/output/template_basica_omr_v2_wireframe.json"
     omr_marked_threshold: float = 0.45
     omr_unmarked_threshold: float = 0.35
+    omr_metadata_binary_enabled: bool = True
+    omr_read_plan_cache_size: int = 8
+    omr_aruco_detection_max_side_px: int = 1600
+    omr_aruco_detector_profile: str = "default"
+    omr_decode_reduced_enabled: bool = True
+    omr_decode_oversample: float = 1.25
+    omr_grayscale_pipeline: bool = True
+    omr_batch_max_workers: int = 4
+    omr_batch_max_sheets: int = 200
+    omr_batch_max_sheet_bytes: int = 25 * 1024 * 1024
+    omr_batch_max_total_bytes: int = 512 * 1024 * 1024
+    omr_process_pool_enabled: bool = True
+    omr_process_pool_workers: int = 0
+    omr_process_pool_max_pending: int = 0
+    omr_opencv_threads: int = 1
+    omr_persistence_mode: str = "async"
+    omr_persistence_queue_size: int = 256
+    omr_persistence_fsync: bool = True
+    omr_persistence_put_timeout_s: float = 5.0
+    omr_store_reads_in_db: bool = True
+    omr_log_format: str = "text"
+    omr_log_ratio_sample_rate: float = 1.0
+    omr_read_cache_enabled: bool = True
+    omr_read_cache_size: int = 64
+    omr_read_cache_db_path: str = ""
+    omr_read_cache_db_max_entries: int = 5000
     gemini_api_key: str | None = None
     gemini_model: str = "gemini-3-flash-preview"
     gemini_timeout_seconds: float = 60.0
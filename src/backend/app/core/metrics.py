@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from threading import Lock
+from typing import Protocol, TypeVar
+
+# Limites (segundos) pensados para etapas de milisegundos y lecturas completas de segundos.
+DEFAULT_DURATION_BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_LabelValues = tuple[str, ...]
+_MetricT = TypeVar("_MetricT", "Counter", "Gauge", "Histogram")
+
+
+class _Metric(Protocol):
+    name: str
+    documentation: str
+    kind: str
+
+    def render(self) -> list[str]: ...
+
+    def reset(self) -> None: ...
+
+
+class Counter:
+    """Monotonic counter, one series per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, *, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = Lock()
+        self._values: dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError(f"counter '{self.name}' can only increase")
+        key = _label_values(self.name, self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge:
+    """Point-in-time value, either set explicitly or read from `callback` on each scrape."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        *,
+        label_names: Sequence[str] = (),
+        callback: Callable[[], float] | None = None,
+    ) -> None:
+        if callback is not None and label_names:
+            raise ValueError(f"gauge '{name}' cannot combine a callback with labels")
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._callback = callback
+        self._lock = Lock()
+        self._values: dict[_LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = _label_values(self.name, self.label_names, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def render(self) -> list[str]:
+        if self._callback is not None:
+            return [f"{self.name} {_format_value(float(self._callback()))}"]
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, one series per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        *,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_DURATION_BUCKETS_S,
+    ) -> None:
+        if list(buckets) != sorted(buckets) or not buckets:
+            raise ValueError(f"histogram '{name}' needs non-empty ascending buckets")
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(float(bound) for bound in buckets)
+        self._lock = Lock()
+        # Por serie: conteo por bucket (sin acumular; el ultimo es +Inf), suma y total.
+        self._series: dict[_LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_values(self.name, self.label_names, labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        lines = []
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                labels = _format_labels((*self.label_names, "le"), (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = Lock()
+
+    def counter(self, name: str, documentation: str, *, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names=label_names))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        *,
+        label_names: Sequence[str] = (),
+        callback: Callable[[], float] | None = None,
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names=label_names, callback=callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        *,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_DURATION_BUCKETS_S,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names=label_names, buckets=buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear every observed value; metric definitions are kept."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def _register(self, metric: _MetricT) -> _MetricT:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+def _label_values(name: str, label_names: tuple[str, ...], labels: dict[str, str]) -> _LabelValues:
+    if set(labels) != set(label_names):
+        raise ValueError(f"metric '{name}' expects labels {list(label_names)}, got {sorted(labels)}")
+    return tuple(str(labels[label]) for label in label_names)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
@@ -1,5 +1,5 @@
 from app.db.base import Base
-from app.db.models import Competency, Item, Standard, Student, Teacher
+from app.db.models import Competency, Item, OMRBubbleRatio, OMRRead, Standard, Student, Teacher
 from app.db.session import SessionLocal, engine, get_db
 
 __all__ = [
@@ -9,6 +9,8 @@ __all__ = [
     "Standard",
     "Competency",
     "Item",
+    "OMRRead",
+    "OMRBubbleRatio",
     "engine",
     "SessionLocal",
     "get_db",
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import DateTime, ForeignKey, JSON, String, Text, UniqueConstraint, func
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, JSON, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -100,3 +100,48 @@ class Item(Base):
     standard: Mapped[Standard | None] = relationship(back_populates="items")
     competency: Mapped[Competency | None] = relationship(back_populates="items")
 
+
+class OMRRead(Base):
+    __tablename__ = "omr_read"
+    __table_args__ = (
+        Index("ix_omr_read_exam_student", "exam_identifier", "student_document_number"),
+        Index("ix_omr_read_template_read_at", "template_id", "read_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    template_id: Mapped[str] = mapped_column(String(120), index=True)
+    template_version: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    exam_identifier: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    student_document_type: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    student_document_number: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+    reader_backend: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    read_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    uploaded_image_path: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    marked_options: Mapped[int] = mapped_column(Integer, default=0)
+    unmarked_options: Mapped[int] = mapped_column(Integer, default=0)
+    ambiguous_options: Mapped[int] = mapped_column(Integer, default=0)
+    manual_review_required: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
+    answers: Mapped[dict[str, Any]] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    bubble_ratios: Mapped[list[OMRBubbleRatio]] = relationship(
+        back_populates="read",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class OMRBubbleRatio(Base):
+    __tablename__ = "omr_bubble_ratio"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    read_id: Mapped[int] = mapped_column(ForeignKey("omr_read.id", ondelete="CASCADE"), index=True)
+    block_id: Mapped[str] = mapped_column(String(64))
+    question_number: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    column_index: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    row_index: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    option_label: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    state: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    fill_ratio: Mapped[float] = mapped_column(Float)
+
+    read: Mapped[OMRRead] = relationship(back_populates="bubble_ratios")
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import OMRRead
+from app.db.session import build_engine
+from app.modules.omr_reader.result_store import store_omr_read
+
+
+def _synthetic_result(index: int, *, questions: int) -> dict[str, Any]:
+    labels = ("A", "B", "C", "D")
+    return {
+        "template_id": "benchmark",
+        "version": "v1",
+        "quality_summary": {"marked_options": questions, "unmarked_options": 3 * questions},
+        "questions": [
+            {
+                "question_number": number,
+                "row": number - 1,
+                "options": [
+                    {"label": label, "state": "marcada" if label == labels[number % 4] else "no_marcada", "fill_ratio": 0.5}
+                    for label in labels
+                ],
+                "marked_options": [labels[number % 4]],
+                "ambiguous_options": [],
+            }
+            for number in range(1, questions + 1)
+        ],
+        "auxiliary": {
+            "blocks": [
+                {"block_id": "exam_identifier", "selection_mode": "single_per_column", "value": f"{index % 50:04d}", "columns": []}
+            ]
+        },
+        "diagnostics": {"reader_backend": "classic"},
+    }
+
+
+def _run_workload(
+    engine: Engine,
+    *,
+    writers: int,
+    readers: int,
+    writes_per_writer: int,
+    questions: int,
+) -> dict[str, Any]:
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    counters = {"writes": 0, "write_errors": 0, "reads": 0, "read_errors": 0}
+    lock = threading.Lock()
+    stop_readers = threading.Event()
+
+    def writer(worker: int) -> None:
+        for offset in range(writes_per_writer):
+            try:
+                with session_factory() as db:
+                    store_omr_read(db, result=_synthetic_result(worker * writes_per_writer + offset, questions=questions))
+                    db.commit()
+                key = "writes"
+            except OperationalError:
+                key = "write_errors"
+            with lock:
+                counters[key] += 1
+
+    def reader() -> None:
+        while not stop_readers.is_set():
+            try:
+                with session_factory() as db:
+                    db.scalar(select(func.count()).select_from(OMRRead).where(OMRRead.exam_identifier == "0007"))
+                key = "reads"
+            except OperationalError:
+                key = "read_errors"
+            with lock:
+                counters[key] += 1
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    start = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop_readers.set()
+    for thread in reader_threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        **counters,
+        "elapsed_s": round(elapsed, 3),
+        "writes_per_s": round(counters["writes"] / elapsed, 1) if elapsed else 0.0,
+        "reads_per_s": round(counters["reads"] / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compara escritores/lectores concurrentes en SQLite: engine por defecto vs build_engine (WAL)."
+    )
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writes-per-writer", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=40, help="Preguntas por lectura (4 ratios cada una)")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000)
+    parser.add_argument("--output-json", default=None, help="Ruta opcional para guardar el reporte")
+    args = parser.parse_args()
+
+    workload = {
+        "writers": args.writers,
+        "readers": args.readers,
+        "writes_per_writer": args.writes_per_writer,
+        "questions": args.questions,
+    }
+    report: dict[str, Any] = {"workload": workload}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        default_url = f"sqlite:///{Path(tmp_dir) / 'default.db'}"
+        # Linea base: engine sin pragmas (journal DELETE, synchronous FULL) como el anterior session.py.
+        baseline_engine = create_engine(
+            default_url,
+            connect_args={"check_same_thread": False, "timeout": args.busy_timeout_ms / 1000.0},
+        )
+        report["default"] = _run_workload(baseline_engine, **workload)
+
+        tuned_engine = build_engine(
+            f"sqlite:///{Path(tmp_dir) / 'tuned.db'}",
+            sqlite_busy_timeout_ms=args.busy_timeout_ms,
+        )
+        report["tuned"] = _run_workload(tuned_engine, **workload)
+
+    print(json.dumps(report, indent=2))
+    if args.output_json:
+        Path(args.output_json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
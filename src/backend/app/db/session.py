@@ -1,11 +1,124 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Callable, Generator
+from threading import Lock
+from typing import Any, Protocol, TypeVar
 
-from sqlalchemy import create_engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(settings.database_url, future=True)
+SQLITE_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SQLITE_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+# Driver async por defecto para cada backend sincrono.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+T = TypeVar("T")
+
+
+def build_engine(database_url: str | None = None, **overrides: Any) -> Engine:
+    """Create the SQLAlchemy engine with per-backend tuning from `Settings`.
+
+    SQLite connections get WAL, `synchronous`, busy timeout and mmap pragmas on
+    connect; server databases get a sized `QueuePool` with pre-ping and recycle.
+    `overrides` take precedence over the settings (used by tests and benchmarks).
+    """
+    url = make_url(database_url or settings.database_url)
+    options = _engine_options(overrides)
+    if url.get_backend_name() == "sqlite":
+        return _build_sqlite_engine(url, options)
+    return create_engine(url, future=True, **_server_pool_kwargs(options))
+
+
+def build_async_engine(database_url: str | None = None, **overrides: Any) -> AsyncEngine:
+    """Create the async engine (aiosqlite / asyncpg) with the same tuning as `build_engine`."""
+    url = make_url(database_url or settings.database_async_url or to_async_database_url(settings.database_url))
+    options = _engine_options(overrides)
+    if url.get_backend_name() == "sqlite":
+        engine = create_async_engine(url, connect_args={"timeout": _sqlite_busy_timeout_ms(options) / 1000.0})
+        _install_sqlite_pragmas(engine.sync_engine, url, options)
+        return engine
+    return create_async_engine(url, **_server_pool_kwargs(options))
+
+
+def to_async_database_url(database_url: str) -> str:
+    """Swap the sync driver of `database_url` for its async counterpart."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"no async driver configured for database backend '{backend}'")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _engine_options(overrides: dict[str, Any]) -> dict[str, Any]:
+    options = {
+        "sqlite_journal_mode": settings.sqlite_journal_mode,
+        "sqlite_synchronous": settings.sqlite_synchronous,
+        "sqlite_busy_timeout_ms": settings.sqlite_busy_timeout_ms,
+        "sqlite_mmap_size_bytes": settings.sqlite_mmap_size_bytes,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout_s": settings.db_pool_timeout_s,
+        "pool_recycle_s": settings.db_pool_recycle_s,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    options.update(overrides)
+    return options
+
+
+def _server_pool_kwargs(options: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "pool_size": int(options["pool_size"]),
+        "max_overflow": int(options["max_overflow"]),
+        "pool_timeout": float(options["pool_timeout_s"]),
+        "pool_recycle": int(options["pool_recycle_s"]),
+        "pool_pre_ping": bool(options["pool_pre_ping"]),
+    }
+
+
+def _sqlite_busy_timeout_ms(options: dict[str, Any]) -> int:
+    return max(0, int(options["sqlite_busy_timeout_ms"]))
+
+
+def _build_sqlite_engine(url: URL, options: dict[str, Any]) -> Engine:
+    engine = create_engine(
+        url,
+        future=True,
+        # La sesion puede usarse desde el threadpool de FastAPI y la cola de persistencia.
+        connect_args={"check_same_thread": False, "timeout": _sqlite_busy_timeout_ms(options) / 1000.0},
+    )
+    _install_sqlite_pragmas(engine, url, options)
+    return engine
+
+
+def _install_sqlite_pragmas(engine: Engine, url: URL, options: dict[str, Any]) -> None:
+    journal_mode = str(options["sqlite_journal_mode"]).upper()
+    synchronous = str(options["sqlite_synchronous"]).upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"unsupported sqlite_journal_mode '{journal_mode}'")
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"unsupported sqlite_synchronous '{synchronous}'")
+    busy_timeout_ms = _sqlite_busy_timeout_ms(options)
+    mmap_size = max(0, int(options["sqlite_mmap_size_bytes"]))
+    in_memory = url.database in (None, "", ":memory:")
+
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            # WAL no aplica a bases en memoria; el resto de pragmas si.
+            if not in_memory:
+                cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+            cursor.execute(f"PRAGMA mmap_size={mmap_size}")
+        finally:
+            cursor.close()
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
 
 
@@ -16,3 +129,73 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+
+class SessionRunner(Protocol):
+    """Runs a function that takes a sync `Session`, without blocking the event loop."""
+
+    async def run(self, fn: Callable[[Session], T]) -> T: ...
+
+
+class ThreadpoolSessionRunner:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    async def run(self, fn: Callable[[Session], T]) -> T:
+        return await run_in_threadpool(fn, self.db)
+
+
+class AsyncSessionRunner:
+    # `run_sync` ejecuta la funcion en un greenlet sobre el driver async: no ocupa hilos.
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def run(self, fn: Callable[[Session], T]) -> T:
+        return await self.db.run_sync(fn)
+
+
+_async_session_factory: async_sessionmaker[AsyncSession] | None = None
+_async_session_factory_lock = Lock()
+
+
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    global _async_session_factory
+    if _async_session_factory is None:
+        with _async_session_factory_lock:
+            if _async_session_factory is None:
+                _async_session_factory = async_sessionmaker(
+                    bind=build_async_engine(),
+                    autoflush=False,
+                    expire_on_commit=False,
+                )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def get_db_runner() -> AsyncGenerator[SessionRunner, None]:
+    """Yield the session runner for DB endpoints.
+
+    With `DATABASE_ASYNC_ENABLED`, work runs on an `AsyncSession` opened here, so
+    the request never touches the threadpool; otherwise on a sync session whose
+    queries and close run in the threadpool.
+    """
+    if settings.database_async_enabled:
+        async with get_async_session_factory()() as async_db:
+            yield AsyncSessionRunner(async_db)
+        return
+    db = SessionLocal()
+    try:
+        yield ThreadpoolSessionRunner(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def dispose_async_engine() -> None:
+    global _async_session_factory
+    with _async_session_factory_lock:
+        factory, _async_session_factory = _async_session_factory, None
+    if factory is not None:
+        await factory.kw["bind"].dispose()
@@ -5,12 +5,19 @@ from fastapi import FastAPI
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.db.init_db import init_db
+from app.db.session import dispose_async_engine
+from app.modules.omr_reader.persistence_queue import shutdown_persistence_queue, start_persistence_queue
+from app.modules.omr_reader.process_pool import shutdown_omr_process_pool
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db()
+    start_persistence_queue()
     yield
+    shutdown_omr_process_pool()
+    shutdown_persistence_queue()
+    await dispose_async_engine()
 
 
 app = FastAPI(
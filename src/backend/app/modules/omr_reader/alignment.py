@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from typing import Any
 
 import cv2
 import numpy as np
 
+from app.core.config import settings
+from app.modules.omr_reader.aruco_detectors import get_aruco_detector
 from app.modules.omr_reader.contracts import OMRAlignmentResult
 from app.modules.omr_reader.errors import (
     ArucoDetectionError,
@@ -12,17 +15,33 @@ from app.modules.omr_reader.errors import (
     HomographyError,
     InvalidMetadataError,
 )
+from app.modules.omr_reader.stage_timing import StageTimer
 
 REQUIRED_ALIGNMENT_KEYS = {"aruco_dictionary_name", "page", "aruco_markers"}
 CORNER_ORDER = ["top_left", "top_right", "bottom_right", "bottom_left"]
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
 
 
 def align_image_to_template(
     *,
     image: np.ndarray,
-    metadata: dict[str, Any],
+    metadata: Mapping[str, Any],
     px_per_mm: float = 10.0,
+    region_px: tuple[int, int, int, int] | None = None,
+    detection_max_side_px: int | None = None,
+    timer: StageTimer | None = None,
 ) -> OMRAlignmentResult:
+    """Warp `image` onto the template plane.
+
+    With `region_px=(x0, y0, x1, y1)` only that rectangle of the page canvas is
+    rendered; pixel values match the same crop of a full-page warp.
+    Markers are first searched on a copy downscaled to `detection_max_side_px`
+    (default from settings, 0 disables it) and refined at full resolution,
+    falling back to a full-resolution search when a required marker is missing.
+    With `timer`, marker detection and the warp are recorded as the
+    `marker_detection` and `warp` stages.
+    """
+    timer = timer or StageTimer()
     if px_per_mm <= 0:
         raise HomographyError("px_per_mm must be > 0")
 
@@ -31,7 +50,17 @@ def align_image_to_template(
     dictionary_name = metadata["aruco_dictionary_name"]
     aruco_markers = metadata["aruco_markers"]
 
-    detected_centers_by_id = _detect_marker_centers(image, dictionary_name)
+    with timer.span("marker_detection"):
+        detected_centers_by_id = _detect_marker_centers(
+            image,
+            dictionary_name,
+            required_ids={int(item["marker_id"]) for item in aruco_markers if "marker_id" in item},
+            detection_max_side_px=(
+                settings.omr_aruco_detection_max_side_px
+                if detection_max_side_px is None
+                else detection_max_side_px
+            ),
+        )
 
     src_points = _build_src_points(aruco_markers, detected_centers_by_id)
     _validate_capture_quality(src_points, image.shape[1], image.shape[0])
@@ -47,18 +76,43 @@ def align_image_to_template(
     if page_width_px <= 0 or page_height_px <= 0:
         raise HomographyError("invalid output image size from metadata page dimensions")
 
-    aligned = cv2.warpPerspective(image, homography, (page_width_px, page_height_px))
+    x0, y0, x1, y1 = 0, 0, page_width_px, page_height_px
+    if region_px is not None:
+        x0, y0, x1, y1 = _clip_region(region_px, page_width_px, page_height_px)
+
+    # Traslada el origen del lienzo a la esquina de la region: warpPerspective
+    # solo calcula los pixeles de salida pedidos.
+    translation = np.array([[1.0, 0.0, -x0], [0.0, 1.0, -y0], [0.0, 0.0, 1.0]])
+    with timer.span("warp"):
+        aligned = cv2.warpPerspective(image, translation @ homography, (x1 - x0, y1 - y0))
 
     return OMRAlignmentResult(
         aligned_image=aligned,
         homography=homography,
         detected_marker_ids=sorted(detected_centers_by_id.keys()),
-        output_width_px=page_width_px,
-        output_height_px=page_height_px,
+        output_width_px=x1 - x0,
+        output_height_px=y1 - y0,
+        origin_x_px=x0,
+        origin_y_px=y0,
     )
 
 
-def _validate_alignment_metadata(metadata: dict[str, Any]) -> None:
+def _clip_region(
+    region_px: tuple[int, int, int, int],
+    page_width_px: int,
+    page_height_px: int,
+) -> tuple[int, int, int, int]:
+    x0, y0, x1, y1 = (int(value) for value in region_px)
+    x0 = max(0, x0)
+    y0 = max(0, y0)
+    x1 = min(page_width_px, x1)
+    y1 = min(page_height_px, y1)
+    if x1 <= x0 or y1 <= y0:
+        raise HomographyError("alignment region is empty or outside the page")
+    return x0, y0, x1, y1
+
+
+def _validate_alignment_metadata(metadata: Mapping[str, Any]) -> None:
     missing = REQUIRED_ALIGNMENT_KEYS - set(metadata.keys())
     if missing:
         raise InvalidMetadataError(
@@ -76,28 +130,79 @@ def _validate_alignment_metadata(metadata: dict[str, Any]) -> None:
         raise InvalidMetadataError("metadata 'page' must contain width_mm and height_mm")
 
 
-def _detect_marker_centers(image: np.ndarray, dictionary_name: str) -> dict[int, np.ndarray]:
-    aruco_module = cv2.aruco
-    if not hasattr(aruco_module, dictionary_name):
-        raise ArucoDetectionError(f"unsupported aruco dictionary '{dictionary_name}'")
-
-    dictionary_code = getattr(aruco_module, dictionary_name)
-    dictionary = aruco_module.getPredefinedDictionary(dictionary_code)
-    detector_params = aruco_module.DetectorParameters()
-    detector = aruco_module.ArucoDetector(dictionary, detector_params)
+def _detect_marker_centers(
+    image: np.ndarray,
+    dictionary_name: str,
+    *,
+    required_ids: set[int] | None = None,
+    detection_max_side_px: int = 0,
+) -> dict[int, np.ndarray]:
+    detector = get_aruco_detector(dictionary_name)
+
+    corners_by_id: dict[int, np.ndarray] = {}
+    max_side = max(image.shape[:2])
+    if 0 < detection_max_side_px < max_side:
+        # Pasada gruesa sobre una copia reducida; las esquinas se reescalan y se
+        # refinan con cornerSubPix en ventanas pequenas de la imagen original.
+        scale = max_side / float(detection_max_side_px)
+        small = cv2.resize(
+            image,
+            (int(round(image.shape[1] / scale)), int(round(image.shape[0] / scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        corners_by_id = {
+            marker_id: _refine_marker_corners(image, points * scale, scale)
+            for marker_id, points in _detect_marker_corners(detector, small).items()
+        }
+        if required_ids and not required_ids.issubset(corners_by_id):
+            corners_by_id = {}
 
-    corners, ids, _ = detector.detectMarkers(image)
+    if not corners_by_id:
+        corners_by_id = _detect_marker_corners(detector, image)
 
-    if ids is None or len(ids) == 0:
+    if not corners_by_id:
         raise ArucoDetectionError("no aruco markers were detected in image")
 
-    centers_by_id: dict[int, np.ndarray] = {}
-    for marker_corners, marker_id in zip(corners, ids.flatten(), strict=False):
-        points = marker_corners.reshape(4, 2)
-        center = points.mean(axis=0)
-        centers_by_id[int(marker_id)] = center.astype(np.float32)
+    return {
+        marker_id: points.mean(axis=0).astype(np.float32)
+        for marker_id, points in corners_by_id.items()
+    }
+
 
-    return centers_by_id
+def _detect_marker_corners(detector: Any, image: np.ndarray) -> dict[int, np.ndarray]:
+    corners, ids, _ = detector.detectMarkers(image)
+    if ids is None or len(ids) == 0:
+        return {}
+    return {
+        int(marker_id): marker_corners.reshape(4, 2).astype(np.float32)
+        for marker_corners, marker_id in zip(corners, ids.flatten(), strict=False)
+    }
+
+
+def _refine_marker_corners(image: np.ndarray, points: np.ndarray, scale: float) -> np.ndarray:
+    # La ventana debe cubrir el error de la pasada reducida (~1 px reducido).
+    half_window = max(3, int(np.ceil(2.0 * scale)))
+    pad = half_window * 2 + 2
+    h, w = image.shape[:2]
+    x0 = max(0, int(np.floor(points[:, 0].min())) - pad)
+    y0 = max(0, int(np.floor(points[:, 1].min())) - pad)
+    x1 = min(w, int(np.ceil(points[:, 0].max())) + pad + 1)
+    y1 = min(h, int(np.ceil(points[:, 1].max())) + pad + 1)
+    if x1 - x0 <= 2 * half_window + 5 or y1 - y0 <= 2 * half_window + 5:
+        return points.astype(np.float32)
+
+    patch = image[y0:y1, x0:x1]
+    if patch.ndim == 3:
+        patch = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
+    local = (points - np.array([x0, y0], dtype=np.float32)).reshape(-1, 1, 2).astype(np.float32)
+    refined = cv2.cornerSubPix(
+        patch,
+        local,
+        (half_window, half_window),
+        (-1, -1),
+        SUBPIX_CRITERIA,
+    )
+    return refined.reshape(4, 2) + np.array([x0, y0], dtype=np.float32)
 
 
 def _build_src_points(
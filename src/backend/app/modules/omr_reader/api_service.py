@@ -13,17 +13,19 @@ import numpy as np
 from app.core.config import settings
 from app.modules.omr_reader.alignment import align_image_to_template
 from app.modules.omr_reader.auxiliary_blocks import read_auxiliary_blocks
-from app.modules.omr_reader.bubble_classifier import classify_bubbles
+from app.modules.omr_reader.bubble_classifier import build_binary_map, classify_compiled_bubbles
 from app.modules.omr_reader.errors import (
     GeminiReadError,
-    InvalidImageError,
     InvalidMetadataError,
     OpenAIReadError,
     UnsupportedReaderBackendError,
 )
 from app.modules.omr_reader.gemini_reader import run_gemini_omr_read
+from app.modules.omr_reader.image_decode import decode_image_at_scale
 from app.modules.omr_reader.loader import load_read_metadata
 from app.modules.omr_reader.llm_preprocess import prepare_llm_image_bytes
+from app.modules.omr_reader.read_cache import ReadCacheLookup, lookup_cached_read, store_cached_read
+from app.modules.omr_reader.read_plan import TemplateReadPlan, get_template_read_plan
 from app.modules.omr_reader.reader_strategy import (
     BACKEND_CLASSIC,
     BACKEND_GEMINI,
@@ -35,10 +37,14 @@ from app.modules.omr_reader.reader_strategy import (
 )
 from app.modules.omr_reader.result_builder import build_omr_read_result
 from app.modules.omr_reader.openai_reader import run_openai_omr_read
+from app.modules.omr_reader.stage_timing import StageTimer
 
 DEFAULT_METADATA_PATH = settings.omr_default_metadata_path
 DEFAULT_UPLOADS_DIR = "data/input/mobile_uploads"
 DEFAULT_DEBUG_OUTPUT_DIR = "data/output/debug_preprocess"
+TRACE_JSON_SUFFIX = ".result.json"
+RATIOS_CSV_SUFFIX = ".ratios.csv"
+AUXILIARY_RATIOS_CSV_SUFFIX = ".auxiliary.ratios.csv"
 
 
 def run_omr_read_from_image_bytes(
@@ -52,10 +58,18 @@ def run_omr_read_from_image_bytes(
     save_debug_artifacts: bool = False,
     debug_base_name: str | None = None,
     debug_output_dir: str = DEFAULT_DEBUG_OUTPUT_DIR,
+    uploaded_image_path: str | None = None,
     reader_backend: str | None = None,
+    use_read_cache: bool = True,
 ) -> dict[str, Any]:
+    """Read one photo with the configured engine.
+
+    Repeated uploads of the same bytes with the same template, thresholds and
+    backend are answered from the read cache (`diagnostics.read_cache.hit`).
+    `uploaded_image_path` is only recorded as the cached result's source.
+    """
     backend = resolve_reader_backend(reader_backend)
-    request = OMRReadRequest(
+    request = build_omr_read_request(
         image_bytes=image_bytes,
         metadata_path=metadata_path,
         px_per_mm=px_per_mm,
@@ -65,14 +79,55 @@ def run_omr_read_from_image_bytes(
         save_debug_artifacts=save_debug_artifacts,
         debug_base_name=debug_base_name,
         debug_output_dir=debug_output_dir,
+        uploaded_image_path=uploaded_image_path,
     )
+    lookup = lookup_read_cache(request, backend=backend) if use_read_cache else None
+    if lookup is not None and lookup.result is not None:
+        return lookup.result
     engine = get_omr_reader_engine(backend)
     result = engine.read(request)
     result.setdefault("diagnostics", {})
     result["diagnostics"]["reader_backend"] = backend
+    store_cached_read(lookup, result)
     return result
 
 
+def build_omr_read_request(
+    *,
+    image_bytes: bytes,
+    metadata_path: str = DEFAULT_METADATA_PATH,
+    px_per_mm: float = 10.0,
+    marked_threshold: float = settings.omr_marked_threshold,
+    unmarked_threshold: float = settings.omr_unmarked_threshold,
+    robust_mode: bool = False,
+    save_debug_artifacts: bool = False,
+    debug_base_name: str | None = None,
+    debug_output_dir: str = DEFAULT_DEBUG_OUTPUT_DIR,
+    uploaded_image_path: str | None = None,
+) -> OMRReadRequest:
+    return OMRReadRequest(
+        image_bytes=image_bytes,
+        metadata_path=metadata_path,
+        px_per_mm=px_per_mm,
+        marked_threshold=marked_threshold,
+        unmarked_threshold=unmarked_threshold,
+        robust_mode=robust_mode,
+        save_debug_artifacts=save_debug_artifacts,
+        debug_base_name=debug_base_name,
+        debug_output_dir=debug_output_dir,
+        uploaded_image_path=uploaded_image_path,
+    )
+
+
+def lookup_read_cache(request: OMRReadRequest, *, backend: str) -> ReadCacheLookup | None:
+    """Return the cache lookup for `request`, or `None` when the read cache is disabled."""
+    return lookup_cached_read(
+        request,
+        backend=backend,
+        metadata_file=resolve_backend_relative_path(request.metadata_path),
+    )
+
+
 class ClassicOMRReadEngine:
     def read(self, request: OMRReadRequest) -> dict[str, Any]:
         return _run_classic_omr_read_from_image_bytes(request=request)
@@ -82,40 +137,52 @@ class GeminiOMRReadEngine:
     def read(self, request: OMRReadRequest) -> dict[str, Any]:
         if not settings.gemini_api_key:
             raise GeminiReadError("GEMINI_API_KEY is not configured")
+        timer = StageTimer()
         metadata_file = resolve_backend_relative_path(request.metadata_path)
         metadata = load_read_metadata(metadata_file)
-        image = decode_image_bytes(image_bytes=request.image_bytes)
-        prepared = prepare_llm_image_bytes(
-            image=image,
-            metadata=metadata,
-            px_per_mm=request.px_per_mm,
-        )
-        return run_gemini_omr_read(
-            image_bytes=prepared["image_bytes"],
-            metadata=metadata,
-            metadata_file=metadata_file,
-            preprocess_diagnostics=prepared["diagnostics"],
-        )
+        with timer.span("decode"):
+            image = decode_image_bytes(image_bytes=request.image_bytes)
+        with timer.span("llm_preprocess"):
+            prepared = prepare_llm_image_bytes(
+                image=image,
+                metadata=metadata,
+                px_per_mm=request.px_per_mm,
+            )
+        with timer.span("llm_read"):
+            result = run_gemini_omr_read(
+                image_bytes=prepared["image_bytes"],
+                metadata=metadata,
+                metadata_file=metadata_file,
+                preprocess_diagnostics=prepared["diagnostics"],
+            )
+        result.setdefault("diagnostics", {})["stage_timings_ms"] = timer.as_dict()
+        return result
 
 
 class OpenAIOMRReadEngine:
     def read(self, request: OMRReadRequest) -> dict[str, Any]:
         if not settings.openai_api_key:
             raise OpenAIReadError("OPENAI_API_KEY is not configured")
+        timer = StageTimer()
         metadata_file = resolve_backend_relative_path(request.metadata_path)
         metadata = load_read_metadata(metadata_file)
-        image = decode_image_bytes(image_bytes=request.image_bytes)
-        prepared = prepare_llm_image_bytes(
-            image=image,
-            metadata=metadata,
-            px_per_mm=request.px_per_mm,
-        )
-        return run_openai_omr_read(
-            image_bytes=prepared["image_bytes"],
-            metadata=metadata,
-            metadata_file=metadata_file,
-            preprocess_diagnostics=prepared["diagnostics"],
-        )
+        with timer.span("decode"):
+            image = decode_image_bytes(image_bytes=request.image_bytes)
+        with timer.span("llm_preprocess"):
+            prepared = prepare_llm_image_bytes(
+                image=image,
+                metadata=metadata,
+                px_per_mm=request.px_per_mm,
+            )
+        with timer.span("llm_read"):
+            result = run_openai_omr_read(
+                image_bytes=prepared["image_bytes"],
+                metadata=metadata,
+                metadata_file=metadata_file,
+                preprocess_diagnostics=prepared["diagnostics"],
+            )
+        result.setdefault("diagnostics", {})["stage_timings_ms"] = timer.as_dict()
+        return result
 
 
 def resolve_reader_backend(reader_backend: str | None) -> str:
@@ -140,34 +207,51 @@ def get_omr_reader_engine(backend: str) -> OMRReadEngine:
 
 
 def _run_classic_omr_read_from_image_bytes(*, request: OMRReadRequest) -> dict[str, Any]:
+    timer = StageTimer()
     metadata_file = resolve_backend_relative_path(request.metadata_path)
-    metadata = load_read_metadata(metadata_file)
-    image = decode_image_bytes(image_bytes=request.image_bytes)
+    with timer.span("read_plan"):
+        plan = get_template_read_plan(metadata_file, px_per_mm=request.px_per_mm)
+    metadata = plan.metadata
+    # Un solo canal basta para marcadores, warp y umbral; los artefactos de
+    # depuracion tambien se escriben desde la pagina en escala de grises.
+    with timer.span("decode"):
+        image = decode_image_bytes(
+            image_bytes=request.image_bytes,
+            target_size_px=plan.page_size_px,
+            grayscale=settings.omr_grayscale_pipeline,
+        )
 
     aligned = align_image_to_template(
         image=image,
         metadata=metadata,
         px_per_mm=request.px_per_mm,
+        timer=timer,
     )
-    debug_artifacts: dict[str, np.ndarray] | None = {} if request.save_debug_artifacts else None
-    bubbles = classify_bubbles(
-        aligned_image=aligned.aligned_image,
-        metadata=metadata,
-        px_per_mm=request.px_per_mm,
-        marked_threshold=request.marked_threshold,
-        unmarked_threshold=request.unmarked_threshold,
-        robust_mode=request.robust_mode,
-        debug_artifacts=debug_artifacts,
-    )
-    result = build_omr_read_result(metadata=metadata, bubble_results=bubbles)
-    auxiliary = read_auxiliary_blocks(
-        aligned_image=aligned.aligned_image,
-        metadata=metadata,
-        px_per_mm=request.px_per_mm,
-        marked_threshold=request.marked_threshold,
-        unmarked_threshold=request.unmarked_threshold,
-        robust_mode=request.robust_mode,
-    )
+    with timer.span("binarize"):
+        binary_inv = build_binary_map(
+            aligned_image=aligned.aligned_image,
+            robust_mode=request.robust_mode,
+        )
+    with timer.span("classify"):
+        bubbles = classify_compiled_bubbles(
+            bubble_set=plan.bubbles,
+            marked_threshold=request.marked_threshold,
+            unmarked_threshold=request.unmarked_threshold,
+            binary_inv=binary_inv,
+        )
+    with timer.span("result_build"):
+        result = build_omr_read_result(metadata=metadata, bubble_results=bubbles)
+    with timer.span("auxiliary"):
+        auxiliary = read_auxiliary_blocks(
+            aligned_image=aligned.aligned_image,
+            metadata=metadata,
+            px_per_mm=request.px_per_mm,
+            marked_threshold=request.marked_threshold,
+            unmarked_threshold=request.unmarked_threshold,
+            robust_mode=request.robust_mode,
+            compiled_blocks=plan.auxiliary_blocks,
+            binary_inv=binary_inv,
+        )
     result["auxiliary"] = auxiliary
     result["thresholds"] = {
         "marked": request.marked_threshold,
@@ -176,13 +260,15 @@ def _run_classic_omr_read_from_image_bytes(*, request: OMRReadRequest) -> dict[s
     result["diagnostics"] = {
         "metadata_path": str(metadata_file),
         "detected_marker_ids": aligned.detected_marker_ids,
+        "decoded_size_px": [int(image.shape[1]), int(image.shape[0])],
         "robust_mode": request.robust_mode,
         "auxiliary_summary": auxiliary.get("summary", {}),
+        "stage_timings_ms": timer.as_dict(),
     }
     if request.save_debug_artifacts:
         debug_paths = persist_debug_artifacts(
             aligned_image=aligned.aligned_image,
-            binary_inv=debug_artifacts["binary_inv"] if debug_artifacts else None,
+            binary_inv=binary_inv,
             debug_base_name=request.debug_base_name,
             output_dir=request.debug_output_dir,
         )
@@ -190,14 +276,19 @@ def _run_classic_omr_read_from_image_bytes(*, request: OMRReadRequest) -> dict[s
     return result
 
 
-def decode_image_bytes(*, image_bytes: bytes) -> np.ndarray:
-    if not image_bytes:
-        raise InvalidImageError("uploaded image is empty")
-
-    np_buffer = np.frombuffer(image_bytes, dtype=np.uint8)
-    image = cv2.imdecode(np_buffer, cv2.IMREAD_COLOR)
-    if image is None:
-        raise InvalidImageError("uploaded file is not a valid image (jpg/png)")
+def decode_image_bytes(
+    *,
+    image_bytes: bytes,
+    target_size_px: tuple[int, int] | None = None,
+    grayscale: bool = False,
+) -> np.ndarray:
+    # Con `target_size_px`, los JPEG sobredimensionados se decodifican ya reducidos (escalado DCT).
+    image, _ = decode_image_at_scale(
+        image_bytes=image_bytes,
+        target_size_px=target_size_px if settings.omr_decode_reduced_enabled else None,
+        oversample=settings.omr_decode_oversample,
+        grayscale=grayscale,
+    )
     return image
 
 
@@ -206,6 +297,16 @@ def persist_uploaded_image_bytes(
     image_bytes: bytes,
     original_filename: str | None = None,
     uploads_dir: str = DEFAULT_UPLOADS_DIR,
+) -> Path:
+    out_path = build_uploaded_image_path(original_filename=original_filename, uploads_dir=uploads_dir)
+    out_path.write_bytes(image_bytes)
+    return out_path
+
+
+def build_uploaded_image_path(
+    *,
+    original_filename: str | None = None,
+    uploads_dir: str = DEFAULT_UPLOADS_DIR,
 ) -> Path:
     uploads_path = resolve_backend_relative_path(uploads_dir)
     uploads_path.mkdir(parents=True, exist_ok=True)
@@ -218,9 +319,15 @@ def persist_uploaded_image_bytes(
 
     stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"mobile_{stamp}_{uuid4().hex[:8]}{ext}"
-    out_path = uploads_path / file_name
-    out_path.write_bytes(image_bytes)
-    return out_path
+    return uploads_path / file_name
+
+
+def build_read_artifact_paths(*, uploaded_image_path: Path) -> dict[str, Path]:
+    return {
+        "trace_json": uploaded_image_path.with_suffix(TRACE_JSON_SUFFIX),
+        "ratios_csv": uploaded_image_path.with_suffix(RATIOS_CSV_SUFFIX),
+        "auxiliary_ratios_csv": uploaded_image_path.with_suffix(AUXILIARY_RATIOS_CSV_SUFFIX),
+    }
 
 
 def persist_omr_trace_json(
@@ -228,7 +335,7 @@ def persist_omr_trace_json(
     uploaded_image_path: Path,
     result_payload: dict[str, Any],
 ) -> Path:
-    trace_path = uploaded_image_path.with_suffix(".result.json")
+    trace_path = uploaded_image_path.with_suffix(TRACE_JSON_SUFFIX)
 
     answers_by_question: list[dict[str, Any]] = []
     for question in result_payload.get("questions", []):
@@ -273,7 +380,7 @@ def persist_question_ratios_csv(
     uploaded_image_path: Path,
     result_payload: dict[str, Any],
 ) -> Path:
-    csv_path = uploaded_image_path.with_suffix(".ratios.csv")
+    csv_path = uploaded_image_path.with_suffix(RATIOS_CSV_SUFFIX)
     questions = result_payload.get("questions", [])
 
     with csv_path.open("w", newline="", encoding="utf-8") as handle:
@@ -340,7 +447,7 @@ def persist_auxiliary_ratios_csv(
     uploaded_image_path: Path,
     result_payload: dict[str, Any],
 ) -> Path:
-    csv_path = uploaded_image_path.with_suffix(".auxiliary.ratios.csv")
+    csv_path = uploaded_image_path.with_suffix(AUXILIARY_RATIOS_CSV_SUFFIX)
     auxiliary = result_payload.get("auxiliary", {})
     blocks = auxiliary.get("blocks", []) if isinstance(auxiliary, dict) else []
 
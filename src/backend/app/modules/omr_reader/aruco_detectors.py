@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from threading import Lock
+from typing import Any
+
+import cv2
+
+from app.core.config import settings
+from app.modules.omr_reader.errors import ArucoDetectionError
+
+# Perfiles de DetectorParameters: solo se listan los atributos que cambian
+# respecto a los valores por defecto de OpenCV.
+ARUCO_DETECTOR_PROFILES: dict[str, dict[str, Any]] = {
+    "default": {},
+    # Menos escalas de umbral adaptativo: mas rapido en fotos bien iluminadas.
+    "fast": {"adaptiveThreshWinSizeStep": 20},
+    "subpix": {"cornerRefinementMethod": cv2.aruco.CORNER_REFINE_SUBPIX},
+}
+
+_detectors: dict[tuple[str, str], cv2.aruco.ArucoDetector] = {}
+_detectors_lock = Lock()
+
+
+def get_aruco_detector(dictionary_name: str, profile: str | None = None) -> cv2.aruco.ArucoDetector:
+    """Return the shared detector for a dictionary and parameter profile.
+
+    Detectors are built once per process. `detectMarkers` does not mutate the
+    detector, so the same instance is safe to use from several threads.
+    """
+    profile_name = profile or settings.omr_aruco_detector_profile
+    key = (dictionary_name, profile_name)
+    detector = _detectors.get(key)
+    if detector is not None:
+        return detector
+
+    with _detectors_lock:
+        detector = _detectors.get(key)
+        if detector is None:
+            detector = _build_detector(dictionary_name, profile_name)
+            _detectors[key] = detector
+    return detector
+
+
+def clear_aruco_detectors() -> None:
+    with _detectors_lock:
+        _detectors.clear()
+
+
+def _build_detector(dictionary_name: str, profile_name: str) -> cv2.aruco.ArucoDetector:
+    aruco_module = cv2.aruco
+    if not hasattr(aruco_module, dictionary_name):
+        raise ArucoDetectionError(f"unsupported aruco dictionary '{dictionary_name}'")
+    overrides = ARUCO_DETECTOR_PROFILES.get(profile_name)
+    if overrides is None:
+        raise ArucoDetectionError(
+            f"unsupported aruco detector profile '{profile_name}'; "
+            f"valid values: {sorted(ARUCO_DETECTOR_PROFILES)}"
+        )
+
+    dictionary_code = getattr(aruco_module, dictionary_name)
+    dictionary = aruco_module.getPredefinedDictionary(dictionary_code)
+    detector_params = aruco_module.DetectorParameters()
+    for attribute, value in overrides.items():
+        setattr(detector_params, attribute, value)
+    return aruco_module.ArucoDetector(dictionary, detector_params)
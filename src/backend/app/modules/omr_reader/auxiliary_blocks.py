@@ -1,52 +1,52 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from typing import Any
 
 import numpy as np
 
-from app.modules.omr_reader.bubble_classifier import classify_bubbles
-from app.modules.omr_reader.contracts import BubbleReadResult
+from app.modules.omr_reader.bubble_classifier import (
+    DEFAULT_INNER_RADIUS_FACTOR,
+    build_binary_map,
+    classify_compiled_bubbles,
+    compile_bubble_set,
+)
+from app.modules.omr_reader.contracts import BubbleReadResult, CompiledAuxiliaryBlock
 
 
 def read_auxiliary_blocks(
     *,
     aligned_image: np.ndarray,
-    metadata: dict[str, Any],
+    metadata: Mapping[str, Any],
     px_per_mm: float,
     marked_threshold: float,
     unmarked_threshold: float,
     robust_mode: bool,
+    compiled_blocks: tuple[CompiledAuxiliaryBlock, ...] | None = None,
+    binary_inv: np.ndarray | None = None,
 ) -> dict[str, Any]:
-    blocks = metadata.get("auxiliary_blocks", [])
-    if not isinstance(blocks, list) or len(blocks) == 0:
+    if compiled_blocks is None:
+        compiled_blocks = compile_auxiliary_blocks(metadata=metadata, px_per_mm=px_per_mm)
+    if len(compiled_blocks) == 0:
         return {"blocks": [], "summary": {"total_blocks": 0, "manual_review_blocks": 0}}
 
+    # Una sola binarizacion de pagina compartida por todos los bloques.
+    if binary_inv is None:
+        binary_inv = build_binary_map(aligned_image=aligned_image, robust_mode=robust_mode)
+
     payload_blocks: list[dict[str, Any]] = []
     manual_review_blocks = 0
 
-    for block in blocks:
-        if not isinstance(block, dict):
-            continue
-        if str(block.get("block_type", "")) != "omr":
-            continue
-        omr_cfg = block.get("omr_config")
-        if not isinstance(omr_cfg, dict):
-            continue
-
-        synthetic_metadata = {
-            "bubbles": _build_block_bubbles(block=block, omr_config=omr_cfg),
-        }
-        bubble_results = classify_bubbles(
-            aligned_image=aligned_image,
-            metadata=synthetic_metadata,
-            px_per_mm=px_per_mm,
+    for compiled in compiled_blocks:
+        bubble_results = classify_compiled_bubbles(
+            bubble_set=compiled.bubbles,
             marked_threshold=marked_threshold,
             unmarked_threshold=unmarked_threshold,
-            robust_mode=robust_mode,
+            binary_inv=binary_inv,
         )
         block_payload = _build_block_payload(
-            block=block,
-            omr_config=omr_cfg,
+            block=compiled.block,
+            omr_config=compiled.omr_config,
             bubble_results=bubble_results,
         )
         payload_blocks.append(block_payload)
@@ -62,6 +62,37 @@ def read_auxiliary_blocks(
     }
 
 
+def compile_auxiliary_blocks(
+    *,
+    metadata: Mapping[str, Any],
+    px_per_mm: float,
+    inner_radius_factor: float = DEFAULT_INNER_RADIUS_FACTOR,
+) -> tuple[CompiledAuxiliaryBlock, ...]:
+    blocks = metadata.get("auxiliary_blocks", [])
+    if not isinstance(blocks, list):
+        return ()
+
+    compiled: list[CompiledAuxiliaryBlock] = []
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+        if str(block.get("block_type", "")) != "omr":
+            continue
+        omr_cfg = block.get("omr_config")
+        if not isinstance(omr_cfg, dict):
+            continue
+
+        bubble_set = compile_bubble_set(
+            _build_block_bubbles(block=block, omr_config=omr_cfg),
+            px_per_mm=px_per_mm,
+            inner_radius_factor=inner_radius_factor,
+        )
+        compiled.append(
+            CompiledAuxiliaryBlock(block=block, omr_config=omr_cfg, bubbles=bubble_set)
+        )
+    return tuple(compiled)
+
+
 def _build_block_bubbles(*, block: dict[str, Any], omr_config: dict[str, Any]) -> list[dict[str, Any]]:
     block_id = str(block.get("block_id", "aux"))
     x_mm = float(block["x_mm"])
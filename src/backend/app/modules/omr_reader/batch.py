@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import io
+import time
+import zipfile
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import cv2
+import numpy as np
+
+from app.modules.omr_reader.errors import InvalidBatchError, OMRReadInputError
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+TIFF_EXTENSIONS = {".tif", ".tiff"}
+ZIP_EXTENSIONS = {".zip"}
+
+
+# Limites por defecto al expandir ZIP/TIFF: acotan la memoria antes de leer.
+DEFAULT_MAX_SHEET_BYTES = 25 * 1024 * 1024
+DEFAULT_MAX_TOTAL_BYTES = 512 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class BatchSheet:
+    index: int
+    source_name: str
+    image_bytes: bytes
+
+
+@dataclass
+class _ByteBudget:
+    max_sheet_bytes: int
+    max_total_bytes: int
+    used_bytes: int = 0
+
+    def check(self, source_name: str, size: int) -> None:
+        """Reject a sheet of `size` bytes before it is read or kept."""
+        if size > self.max_sheet_bytes:
+            raise InvalidBatchError(
+                f"'{source_name}' exceeds the maximum of {self.max_sheet_bytes} bytes per sheet"
+            )
+        if self.used_bytes + size > self.max_total_bytes:
+            raise InvalidBatchError(f"batch exceeds the maximum of {self.max_total_bytes} bytes")
+
+    def consume(self, source_name: str, size: int) -> None:
+        self.check(source_name, size)
+        self.used_bytes += size
+
+
+def expand_batch_uploads(
+    uploads: Iterable[tuple[str | None, bytes]],
+    *,
+    max_sheets: int,
+    max_sheet_bytes: int = DEFAULT_MAX_SHEET_BYTES,
+    max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES,
+) -> list[BatchSheet]:
+    """Flatten uploaded files into one sheet per page.
+
+    ZIP archives contribute every image (or TIFF) entry in name order and
+    multipage TIFFs one sheet per page; other files are passed through as-is.
+    Entries are read one at a time and the sheet count and byte limits are
+    checked as they come, so an oversized archive is rejected before it is
+    fully decompressed.
+    """
+    budget = _ByteBudget(max_sheet_bytes=max_sheet_bytes, max_total_bytes=max_total_bytes)
+    sheets: list[BatchSheet] = []
+    for filename, payload in uploads:
+        source_name = filename or f"sheet_{len(sheets) + 1:03d}"
+        for name, image_bytes in _expand_upload(source_name, payload, budget):
+            if len(sheets) >= max_sheets:
+                raise InvalidBatchError(f"batch exceeds the maximum of {max_sheets} sheets")
+            budget.consume(name, len(image_bytes))
+            sheets.append(BatchSheet(index=len(sheets), source_name=name, image_bytes=image_bytes))
+
+    if not sheets:
+        raise InvalidBatchError("batch does not contain any image")
+    return sheets
+
+
+def run_omr_batch(
+    *,
+    sheets: list[BatchSheet],
+    read_sheet: Callable[[BatchSheet], dict[str, Any]],
+    max_workers: int,
+) -> Iterator[dict[str, Any]]:
+    """Read sheets concurrently and yield one record per sheet as it finishes.
+
+    A final `summary` record closes the stream. Per-sheet failures are
+    reported in their record and never abort the rest of the batch.
+    """
+    batch_start = time.perf_counter()
+    ok_count = 0
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = [executor.submit(_read_one, read_sheet, sheet) for sheet in sheets]
+        for future in as_completed(futures):
+            record = future.result()
+            if record["status"] == "ok":
+                ok_count += 1
+            yield record
+    finally:
+        # Si el cliente corta el stream, las hojas pendientes no se procesan.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    yield {
+        "type": "summary",
+        "total_sheets": len(sheets),
+        "ok_sheets": ok_count,
+        "error_sheets": len(sheets) - ok_count,
+        "batch_total_ms": round((time.perf_counter() - batch_start) * 1000.0, 2),
+    }
+
+
+def _read_one(read_sheet: Callable[[BatchSheet], dict[str, Any]], sheet: BatchSheet) -> dict[str, Any]:
+    record: dict[str, Any] = {
+        "type": "sheet",
+        "index": sheet.index,
+        "source_name": sheet.source_name,
+    }
+    try:
+        record["result"] = read_sheet(sheet)
+        record["status"] = "ok"
+    except OMRReadInputError as exc:
+        record["status"] = "error"
+        record["error"] = str(exc)
+    except Exception as exc:  # noqa: BLE001
+        record["status"] = "error"
+        record["error"] = f"unexpected server error: {exc}"
+    return record
+
+
+def _expand_upload(source_name: str, payload: bytes, budget: _ByteBudget) -> Iterator[tuple[str, bytes]]:
+    suffix = Path(source_name).suffix.lower()
+    if suffix in ZIP_EXTENSIONS or (not suffix and zipfile.is_zipfile(io.BytesIO(payload))):
+        return _expand_zip(source_name, payload, budget)
+    if suffix in TIFF_EXTENSIONS:
+        return _expand_tiff(source_name, payload)
+    return iter([(source_name, payload)])
+
+
+def _expand_zip(source_name: str, payload: bytes, budget: _ByteBudget) -> Iterator[tuple[str, bytes]]:
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(payload))
+    except zipfile.BadZipFile as exc:
+        raise InvalidBatchError(f"'{source_name}' is not a valid zip archive") from exc
+
+    with archive:
+        for entry in sorted(archive.infolist(), key=lambda item: item.filename):
+            if entry.is_dir():
+                continue
+            entry_suffix = Path(entry.filename).suffix.lower()
+            if entry_suffix not in IMAGE_EXTENSIONS | TIFF_EXTENSIONS:
+                continue
+            entry_name = f"{source_name}/{entry.filename}"
+            # El tamano declarado se valida antes de descomprimir; la lectura
+            # se corta igual por si la cabecera miente.
+            budget.check(entry_name, entry.file_size)
+            try:
+                with archive.open(entry) as handle:
+                    entry_bytes = handle.read(budget.max_sheet_bytes + 1)
+            except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as exc:
+                raise InvalidBatchError(f"could not read '{entry_name}': {exc}") from exc
+            budget.check(entry_name, len(entry_bytes))
+            if entry_suffix in TIFF_EXTENSIONS:
+                yield from _expand_tiff(entry_name, entry_bytes)
+            else:
+                yield entry_name, entry_bytes
+
+
+def _expand_tiff(source_name: str, payload: bytes) -> Iterator[tuple[str, bytes]]:
+    buffer = np.frombuffer(payload, dtype=np.uint8)
+    first = _decode_tiff_page(buffer, 0)
+    if first is None:
+        raise InvalidBatchError(f"'{source_name}' is not a valid tiff image")
+    second = _decode_tiff_page(buffer, 1)
+    if second is None:
+        yield source_name, payload
+        return
+
+    # Las paginas se decodifican de a una y se reempaquetan como PNG (sin
+    # perdida) para el lector de bytes; el llamador corta al llegar al limite.
+    page_number, page = 1, first
+    while page is not None:
+        encoded_ok, encoded = cv2.imencode(".png", page)
+        if not encoded_ok:
+            raise InvalidBatchError(f"could not re-encode page {page_number} of '{source_name}'")
+        yield f"{source_name}.page{page_number:03d}.png", encoded.tobytes()
+        page_number += 1
+        page = second if page_number == 2 else _decode_tiff_page(buffer, page_number - 1)
+
+
+def _decode_tiff_page(buffer: np.ndarray, page_index: int) -> np.ndarray | None:
+    ok, pages = cv2.imdecodemulti(buffer, cv2.IMREAD_COLOR, None, (page_index, page_index + 1))
+    if not ok or not pages:
+        return None
+    return pages[0]
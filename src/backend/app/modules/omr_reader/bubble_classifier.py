@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any
 
 import cv2
 import numpy as np
 
-from app.modules.omr_reader.contracts import BubbleReadResult
+from app.modules.omr_reader.contracts import BubbleReadResult, CompiledBubbleSet
 from app.modules.omr_reader.errors import BubbleReadError, InvalidMetadataError
+from app.modules.omr_reader.metadata_binary import MetadataBinary
 
 REQUIRED_BUBBLE_KEYS = {
     "bubble_id",
@@ -18,6 +20,7 @@ REQUIRED_BUBBLE_KEYS = {
     "center_y_mm",
     "radius_mm",
 }
+DEFAULT_INNER_RADIUS_FACTOR = 0.58
 
 
 def classify_bubbles(
@@ -27,67 +30,184 @@ def classify_bubbles(
     px_per_mm: float = 10.0,
     marked_threshold: float = 0.45,
     unmarked_threshold: float = 0.35,
-    inner_radius_factor: float = 0.58,
+    inner_radius_factor: float = DEFAULT_INNER_RADIUS_FACTOR,
     robust_mode: bool = False,
     robust_contrast_alpha: float = 1.25,
     robust_contrast_beta: float = -8.0,
     debug_artifacts: dict[str, np.ndarray] | None = None,
+    binary_inv: np.ndarray | None = None,
 ) -> list[BubbleReadResult]:
-    if px_per_mm <= 0:
-        raise BubbleReadError("px_per_mm must be > 0")
-    if not (0.0 <= unmarked_threshold <= marked_threshold <= 1.0):
-        raise BubbleReadError("thresholds must satisfy 0 <= unmarked <= marked <= 1")
-    if not (0.2 <= inner_radius_factor <= 1.0):
-        raise BubbleReadError("inner_radius_factor must be between 0.2 and 1.0")
-    if robust_contrast_alpha <= 0:
-        raise BubbleReadError("robust_contrast_alpha must be > 0")
-
     bubbles = metadata.get("bubbles")
-    if not isinstance(bubbles, list) or len(bubbles) == 0:
-        raise InvalidMetadataError("metadata 'bubbles' must be a non-empty list")
-
-    binary_inv = _build_binary_map(
+    bubble_set = compile_bubble_set(
+        bubbles,
+        px_per_mm=px_per_mm,
+        inner_radius_factor=inner_radius_factor,
+    )
+    return classify_compiled_bubbles(
         aligned_image=aligned_image,
+        bubble_set=bubble_set,
+        marked_threshold=marked_threshold,
+        unmarked_threshold=unmarked_threshold,
         robust_mode=robust_mode,
         robust_contrast_alpha=robust_contrast_alpha,
         robust_contrast_beta=robust_contrast_beta,
+        debug_artifacts=debug_artifacts,
+        binary_inv=binary_inv,
     )
+
+
+def classify_compiled_bubbles(
+    *,
+    aligned_image: np.ndarray | None = None,
+    bubble_set: CompiledBubbleSet,
+    marked_threshold: float = 0.45,
+    unmarked_threshold: float = 0.35,
+    robust_mode: bool = False,
+    robust_contrast_alpha: float = 1.25,
+    robust_contrast_beta: float = -8.0,
+    debug_artifacts: dict[str, np.ndarray] | None = None,
+    binary_inv: np.ndarray | None = None,
+) -> list[BubbleReadResult]:
+    """Classify a compiled bubble set.
+
+    When `binary_inv` is given (see `build_binary_map`) it is sampled directly
+    and `aligned_image` and the robust_* options are ignored, so one binarized
+    page can be shared by the main answers and every auxiliary block.
+    """
+    if not (0.0 <= unmarked_threshold <= marked_threshold <= 1.0):
+        raise BubbleReadError("thresholds must satisfy 0 <= unmarked <= marked <= 1")
+
+    if binary_inv is None:
+        if aligned_image is None:
+            raise BubbleReadError("either aligned_image or binary_inv is required")
+        binary_inv = build_binary_map(
+            aligned_image=aligned_image,
+            robust_mode=robust_mode,
+            robust_contrast_alpha=robust_contrast_alpha,
+            robust_contrast_beta=robust_contrast_beta,
+        )
     if debug_artifacts is not None:
         debug_artifacts["binary_inv"] = binary_inv.copy()
 
-    results: list[BubbleReadResult] = []
+    fill_ratios = compute_fill_ratios(
+        binary_inv,
+        centers_px=bubble_set.centers_px,
+        radii_px=bubble_set.inner_radii_px,
+    )
+    states = np.where(
+        fill_ratios >= marked_threshold,
+        "marcada",
+        np.where(fill_ratios <= unmarked_threshold, "no_marcada", "ambigua"),
+    )
+
+    return [
+        BubbleReadResult(
+            bubble_id=bubble_id,
+            group_id=bubble_set.group_ids[group_index],
+            row=row,
+            col=col,
+            label=label,
+            fill_ratio=fill_ratio,
+            state=state,
+        )
+        for bubble_id, label, group_index, row, col, fill_ratio, state in zip(
+            bubble_set.bubble_ids,
+            bubble_set.labels,
+            bubble_set.group_index.tolist(),
+            bubble_set.rows.tolist(),
+            bubble_set.cols.tolist(),
+            fill_ratios.tolist(),
+            states.tolist(),
+            strict=True,
+        )
+    ]
+
+
+def compile_bubble_set(
+    bubbles: Any,
+    *,
+    px_per_mm: float,
+    inner_radius_factor: float = DEFAULT_INNER_RADIUS_FACTOR,
+) -> CompiledBubbleSet:
+    if px_per_mm <= 0:
+        raise BubbleReadError("px_per_mm must be > 0")
+    if not (0.2 <= inner_radius_factor <= 1.0):
+        raise BubbleReadError("inner_radius_factor must be between 0.2 and 1.0")
+    if not isinstance(bubbles, list) or len(bubbles) == 0:
+        raise InvalidMetadataError("metadata 'bubbles' must be a non-empty list")
+
     for bubble in bubbles:
         _validate_bubble_metadata(bubble)
 
+    # Orden estable para trazabilidad reproducible.
+    ordered = sorted(
+        bubbles,
+        key=lambda item: (str(item["group_id"]), int(item["row"]), int(item["col"])),
+    )
+
+    group_ids: list[str] = []
+    group_positions: dict[str, int] = {}
+    group_index: list[int] = []
+    centers: list[tuple[int, int]] = []
+    inner_radii: list[int] = []
+    for bubble in ordered:
+        group_id = str(bubble["group_id"])
+        if group_id not in group_positions:
+            group_positions[group_id] = len(group_ids)
+            group_ids.append(group_id)
+        group_index.append(group_positions[group_id])
+
         cx = int(round(float(bubble["center_x_mm"]) * px_per_mm))
         cy = int(round(float(bubble["center_y_mm"]) * px_per_mm))
         radius_px = max(1, int(round(float(bubble["radius_mm"]) * px_per_mm)))
-        inner_radius_px = max(1, int(round(radius_px * inner_radius_factor)))
-
-        fill_ratio = _compute_fill_ratio(binary_inv, cx, cy, inner_radius_px)
-
-        if fill_ratio >= marked_threshold:
-            state = "marcada"
-        elif fill_ratio <= unmarked_threshold:
-            state = "no_marcada"
-        else:
-            state = "ambigua"
-
-        results.append(
-            BubbleReadResult(
-                bubble_id=str(bubble["bubble_id"]),
-                group_id=str(bubble["group_id"]),
-                row=int(bubble["row"]),
-                col=int(bubble["col"]),
-                label=str(bubble["label"]),
-                fill_ratio=float(fill_ratio),
-                state=state,
-            )
-        )
+        centers.append((cx, cy))
+        inner_radii.append(max(1, int(round(radius_px * inner_radius_factor))))
 
-    # Orden estable para trazabilidad reproducible.
-    results.sort(key=lambda item: (item.group_id, item.row, item.col))
-    return results
+    return CompiledBubbleSet(
+        bubble_ids=tuple(str(item["bubble_id"]) for item in ordered),
+        labels=tuple(str(item["label"]) for item in ordered),
+        group_ids=tuple(group_ids),
+        group_index=_readonly(np.array(group_index, dtype=np.int32)),
+        rows=_readonly(np.array([int(item["row"]) for item in ordered], dtype=np.int32)),
+        cols=_readonly(np.array([int(item["col"]) for item in ordered], dtype=np.int32)),
+        centers_px=_readonly(np.array(centers, dtype=np.int32).reshape(-1, 2)),
+        inner_radii_px=_readonly(np.array(inner_radii, dtype=np.int32)),
+    )
+
+
+def compile_bubble_set_from_binary(
+    binary: MetadataBinary,
+    *,
+    px_per_mm: float,
+    inner_radius_factor: float = DEFAULT_INNER_RADIUS_FACTOR,
+) -> CompiledBubbleSet:
+    """Same result as `compile_bubble_set`, vectorized over the binary metadata arrays."""
+    if px_per_mm <= 0:
+        raise BubbleReadError("px_per_mm must be > 0")
+    if not (0.2 <= inner_radius_factor <= 1.0):
+        raise BubbleReadError("inner_radius_factor must be between 0.2 and 1.0")
+    if len(binary.bubble_ids) == 0:
+        raise InvalidMetadataError("metadata 'bubbles' must be a non-empty list")
+
+    # np.rint redondea al par igual que round(): mismos pixeles que la ruta JSON.
+    centers = np.stack([np.rint(binary.center_x_mm * px_per_mm), np.rint(binary.center_y_mm * px_per_mm)], axis=1)
+    radii_px = np.maximum(1, np.rint(binary.radius_mm * px_per_mm))
+    inner_radii = np.maximum(1, np.rint(radii_px * inner_radius_factor))
+    return CompiledBubbleSet(
+        bubble_ids=binary.bubble_ids,
+        labels=binary.labels,
+        group_ids=binary.group_ids,
+        group_index=_readonly(binary.group_index.astype(np.int32)),
+        rows=_readonly(binary.rows.astype(np.int32)),
+        cols=_readonly(binary.cols.astype(np.int32)),
+        centers_px=_readonly(centers.astype(np.int32)),
+        inner_radii_px=_readonly(inner_radii.astype(np.int32)),
+    )
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
 
 
 def _validate_bubble_metadata(bubble: dict[str, Any]) -> None:
@@ -96,14 +216,18 @@ def _validate_bubble_metadata(bubble: dict[str, Any]) -> None:
         raise InvalidMetadataError(f"bubble metadata missing keys: {sorted(missing)}")
 
 
-def _build_binary_map(
+def build_binary_map(
     *,
     aligned_image: np.ndarray,
-    robust_mode: bool,
-    robust_contrast_alpha: float,
-    robust_contrast_beta: float,
+    robust_mode: bool = False,
+    robust_contrast_alpha: float = 1.25,
+    robust_contrast_beta: float = -8.0,
 ) -> np.ndarray:
-    gray = cv2.cvtColor(aligned_image, cv2.COLOR_BGR2GRAY)
+    if robust_contrast_alpha <= 0:
+        raise BubbleReadError("robust_contrast_alpha must be > 0")
+
+    # El motor clasico puede entregar la pagina ya en escala de grises.
+    gray = aligned_image if aligned_image.ndim == 2 else cv2.cvtColor(aligned_image, cv2.COLOR_BGR2GRAY)
 
     if not robust_mode:
         blur = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -137,24 +261,43 @@ def _build_binary_map(
     return binary_inv
 
 
-def _compute_fill_ratio(binary_inv: np.ndarray, cx: int, cy: int, radius: int) -> float:
-    h, w = binary_inv.shape[:2]
+def compute_fill_ratios(
+    binary_inv: np.ndarray,
+    *,
+    centers_px: np.ndarray,
+    radii_px: np.ndarray,
+) -> np.ndarray:
+    """Return the filled fraction of every disc in one pass per distinct radius.
 
-    x0 = max(0, cx - radius)
-    y0 = max(0, cy - radius)
-    x1 = min(w, cx + radius + 1)
-    y1 = min(h, cy + radius + 1)
+    Discs are clipped to the image bounds, so a bubble partially outside the
+    aligned page is measured only over its visible pixels.
+    """
+    h, w = binary_inv.shape[:2]
+    centers = np.asarray(centers_px, dtype=np.intp).reshape(-1, 2)
+    radii = np.asarray(radii_px, dtype=np.intp).reshape(-1)
+    ratios = np.zeros(len(radii), dtype=np.float64)
 
-    if x0 >= x1 or y0 >= y1:
-        raise BubbleReadError("bubble ROI is outside aligned image bounds")
+    for radius in np.unique(radii).tolist():
+        selected = np.flatnonzero(radii == radius)
+        offset_y, offset_x = _disk_offsets(int(radius))
+        ys = centers[selected, 1, None] + offset_y
+        xs = centers[selected, 0, None] + offset_x
+        inside = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+        visible = inside.sum(axis=1)
+        if np.any(visible == 0):
+            raise BubbleReadError("bubble ROI is outside aligned image bounds")
 
-    roi = binary_inv[y0:y1, x0:x1]
+        samples = (binary_inv[np.clip(ys, 0, h - 1), np.clip(xs, 0, w - 1)] > 0) & inside
+        ratios[selected] = samples.sum(axis=1) / visible
+    return ratios
 
-    yy, xx = np.ogrid[y0:y1, x0:x1]
-    mask = ((xx - cx) ** 2 + (yy - cy) ** 2) <= radius**2
-    mask_count = int(mask.sum())
-    if mask_count == 0:
-        raise BubbleReadError("bubble mask has zero area")
 
-    filled = int((roi[mask] > 0).sum())
-    return filled / mask_count
+@lru_cache(maxsize=64)
+def _disk_offsets(radius: int) -> tuple[np.ndarray, np.ndarray]:
+    yy, xx = np.mgrid[-radius : radius + 1, -radius : radius + 1]
+    mask = (xx**2 + yy**2) <= radius**2
+    offset_y = yy[mask].astype(np.intp)
+    offset_x = xx[mask].astype(np.intp)
+    offset_y.flags.writeable = False
+    offset_x.flags.writeable = False
+    return offset_y, offset_x
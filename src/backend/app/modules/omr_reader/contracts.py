@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
@@ -29,6 +30,10 @@ class OMRAlignmentResult(BaseModel):
     detected_marker_ids: list[int]
     output_width_px: int
     output_height_px: int
+    # Esquina superior izquierda de `aligned_image` en pixeles de pagina
+    # (0, 0) cuando se alinea la pagina completa.
+    origin_x_px: int = 0
+    origin_y_px: int = 0
 
     class Config:
         arbitrary_types_allowed = True
@@ -42,3 +47,27 @@ class BubbleReadResult(BaseModel):
     label: str
     fill_ratio: float
     state: str  # marcada | no_marcada | ambigua
+
+
+@dataclass(frozen=True)
+class CompiledBubbleSet:
+    """Bubble geometry precomputed in pixels, sorted by (group_id, row, col)."""
+
+    bubble_ids: tuple[str, ...]
+    labels: tuple[str, ...]
+    group_ids: tuple[str, ...]
+    group_index: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    centers_px: np.ndarray
+    inner_radii_px: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.bubble_ids)
+
+
+@dataclass(frozen=True)
+class CompiledAuxiliaryBlock:
+    block: dict[str, Any]
+    omr_config: dict[str, Any]
+    bubbles: CompiledBubbleSet
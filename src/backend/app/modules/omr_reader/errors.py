@@ -47,3 +47,11 @@ class GeminiReadError(OMRReadInputError):
 
 class OpenAIReadError(OMRReadInputError):
     """Raised when OpenAI read fails due to network, auth, or invalid output."""
+
+
+class InvalidBatchError(OMRReadInputError):
+    """Raised when a batch upload is empty, too large, or cannot be unpacked."""
+
+
+class ReaderBusyError(OMRReadInputError):
+    """Raised when too many classic reads are already queued or running."""
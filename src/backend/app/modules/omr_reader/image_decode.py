@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import struct
+
+import cv2
+import numpy as np
+
+from app.modules.omr_reader.errors import InvalidImageError
+
+# Factores soportados por libjpeg (escalado DCT) a traves de IMREAD_REDUCED_*.
+REDUCED_DECODE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+REDUCED_GRAYSCALE_DECODE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+}
+
+_JPEG_SOI = b"\xff\xd8"
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Marcadores SOF que traen dimensiones (excluye DHT=C4, JPG=C8 y DAC=CC).
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def decode_image_at_scale(
+    *,
+    image_bytes: bytes,
+    target_size_px: tuple[int, int] | None = None,
+    oversample: float = 1.0,
+    grayscale: bool = False,
+) -> tuple[np.ndarray, int]:
+    """Decode an upload, shrinking JPEGs at decode time when they are oversized.
+
+    `target_size_px` is the (width, height) the pipeline will resample to; the
+    reduction keeps both sides at least `oversample` times that size. With
+    `grayscale`, a single luminance channel is decoded instead of BGR. Returns
+    the image and the reduction factor applied (1 = full resolution).
+    """
+    if not image_bytes:
+        raise InvalidImageError("uploaded image is empty")
+
+    reduction = 1
+    if target_size_px is not None and image_bytes.startswith(_JPEG_SOI):
+        source_size_px = read_image_header_size(image_bytes)
+        if source_size_px is not None:
+            reduction = choose_decode_reduction(
+                source_size_px=source_size_px,
+                target_size_px=target_size_px,
+                oversample=oversample,
+            )
+
+    np_buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    if grayscale:
+        flags = REDUCED_GRAYSCALE_DECODE_FLAGS.get(reduction, cv2.IMREAD_GRAYSCALE)
+    else:
+        flags = REDUCED_DECODE_FLAGS.get(reduction, cv2.IMREAD_COLOR)
+    image = cv2.imdecode(np_buffer, flags)
+    if image is None:
+        raise InvalidImageError("uploaded file is not a valid image (jpg/png)")
+    return image, reduction
+
+
+def choose_decode_reduction(
+    *,
+    source_size_px: tuple[int, int],
+    target_size_px: tuple[int, int],
+    oversample: float = 1.0,
+) -> int:
+    """Return the largest supported factor that keeps the photo above the target size.
+
+    Sides are compared long-to-long and short-to-short, so the factor does not
+    depend on the photo orientation (EXIF rotation is applied after decoding).
+    """
+    source_long, source_short = sorted(source_size_px, reverse=True)
+    target_long, target_short = sorted(target_size_px, reverse=True)
+    needed_long = target_long * max(oversample, 0.0)
+    needed_short = target_short * max(oversample, 0.0)
+    for factor in sorted(REDUCED_DECODE_FLAGS, reverse=True):
+        if source_long / factor >= needed_long and source_short / factor >= needed_short:
+            return factor
+    return 1
+
+
+def read_image_header_size(image_bytes: bytes) -> tuple[int, int] | None:
+    """Return (width, height) from a JPEG or PNG header without decoding pixels."""
+    if image_bytes.startswith(_PNG_SIGNATURE):
+        if len(image_bytes) < 24:
+            return None
+        width, height = struct.unpack(">II", image_bytes[16:24])
+        return int(width), int(height)
+    if image_bytes.startswith(_JPEG_SOI):
+        return _read_jpeg_size(image_bytes)
+    return None
+
+
+def _read_jpeg_size(image_bytes: bytes) -> tuple[int, int] | None:
+    offset = 2
+    size = len(image_bytes)
+    while offset + 4 <= size:
+        if image_bytes[offset] != 0xFF:
+            return None
+        marker = image_bytes[offset + 1]
+        if marker == 0xFF:
+            # Relleno entre marcadores.
+            offset += 1
+            continue
+        if marker in {0x01, *range(0xD0, 0xD8)}:
+            offset += 2
+            continue
+        (segment_length,) = struct.unpack(">H", image_bytes[offset + 2 : offset + 4])
+        if marker in _JPEG_SOF_MARKERS:
+            if offset + 9 > size:
+                return None
+            height, width = struct.unpack(">HH", image_bytes[offset + 5 : offset + 9])
+            if width == 0 or height == 0:
+                return None
+            return int(width), int(height)
+        if marker == 0xDA:
+            return None
+        offset += 2 + segment_length
+    return None
@@ -15,12 +15,6 @@ def prepare_llm_image_bytes(
     metadata: dict[str, Any],
     px_per_mm: float,
 ) -> dict[str, Any]:
-    aligned = align_image_to_template(
-        image=image,
-        metadata=metadata,
-        px_per_mm=px_per_mm,
-    )
-
     block = metadata.get("main_block_bbox") or metadata.get("block")
     if not isinstance(block, dict):
         raise InvalidMetadataError("metadata must include 'main_block_bbox' or 'block' for llm preprocessing")
@@ -38,15 +32,18 @@ def prepare_llm_image_bytes(
     h = int(round(h_mm * px_per_mm))
     margin = int(round(2.0 * px_per_mm))
 
-    img_h, img_w = aligned.aligned_image.shape[:2]
-    x0 = max(0, x - margin)
-    y0 = max(0, y - margin)
-    x1 = min(img_w, x + w + margin)
-    y1 = min(img_h, y + h + margin)
-    if x1 <= x0 or y1 <= y0:
-        raise InvalidMetadataError("computed crop bbox is invalid for llm preprocessing")
-
-    crop = aligned.aligned_image[y0:y1, x0:x1]
+    # Solo se alinea el recorte que se envia al modelo, no la pagina completa.
+    aligned = align_image_to_template(
+        image=image,
+        metadata=metadata,
+        px_per_mm=px_per_mm,
+        region_px=(x - margin, y - margin, x + w + margin, y + h + margin),
+    )
+    x0 = aligned.origin_x_px
+    y0 = aligned.origin_y_px
+    x1 = x0 + aligned.output_width_px
+    y1 = y0 + aligned.output_height_px
+    crop = aligned.aligned_image
     enhanced = _enhance_crop_for_llm(crop)
 
     ok, encoded = cv2.imencode(".jpg", enhanced, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import json
 from pathlib import Path
 from typing import Any
@@ -12,6 +13,12 @@ from app.modules.omr_reader.errors import (
     InvalidImageError,
     InvalidMetadataError,
 )
+from app.modules.omr_reader.metadata_binary import (
+    MetadataBinary,
+    MetadataBinaryError,
+    metadata_binary_path,
+    read_metadata_binary,
+)
 
 REQUIRED_READ_KEYS = {
     "template_id",
@@ -73,15 +80,38 @@ def load_read_metadata(metadata_path: str | Path) -> dict[str, Any]:
     return payload
 
 
-def _validate_read_metadata(payload: dict[str, Any]) -> None:
-    missing = REQUIRED_READ_KEYS - set(payload.keys())
+def load_read_metadata_binary(metadata_path: str | Path) -> MetadataBinary | None:
+    """Return the binary companion of a metadata JSON, or None when missing, corrupt or stale.
+
+    The binary is only trusted when its stored checksum matches the current JSON
+    bytes, so editing the JSON without recompiling falls back to the JSON.
+    """
+    metadata_file = Path(metadata_path)
+    _validate_file_exists(metadata_file, "metadata")
+    binary_file = metadata_binary_path(metadata_file)
+    if not binary_file.is_file():
+        return None
+    try:
+        binary = read_metadata_binary(binary_file)
+    except MetadataBinaryError:
+        return None
+    if binary.json_sha256 != hashlib.sha256(metadata_file.read_bytes()).hexdigest():
+        return None
+    # Las burbujas ya vienen compiladas en arreglos; el resto se valida como el JSON.
+    _validate_read_metadata(binary.metadata, bubbles_compiled=True)
+    return binary
+
+
+def _validate_read_metadata(payload: dict[str, Any], *, bubbles_compiled: bool = False) -> None:
+    required = REQUIRED_READ_KEYS - {"bubbles"} if bubbles_compiled else REQUIRED_READ_KEYS
+    missing = required - set(payload.keys())
     if missing:
         raise InvalidMetadataError(f"metadata missing required keys: {sorted(missing)}")
 
     if not isinstance(payload.get("aruco_markers"), list) or len(payload["aruco_markers"]) != 4:
         raise InvalidMetadataError("metadata 'aruco_markers' must contain exactly 4 items")
 
-    if not isinstance(payload.get("bubbles"), list) or len(payload["bubbles"]) == 0:
+    if not bubbles_compiled and (not isinstance(payload.get("bubbles"), list) or len(payload["bubbles"]) == 0):
         raise InvalidMetadataError("metadata 'bubbles' must be a non-empty list")
 
     if not isinstance(payload.get("question_items"), list) or len(payload["question_items"]) == 0:
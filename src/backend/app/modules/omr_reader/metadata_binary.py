@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# Formato v1 (little endian):
+#   magic(8) | version u16 | reserved u16 | header_len u32 | sha256 del JSON (32) | header JSON compacto
+#   seguido de los arreglos de burbujas, cada uno alineado a 16 bytes; el header describe dtype/shape/offset.
+# El header lleva la metadata sin `bubbles`: con el binario vigente no se parsea el JSON fuente.
+BINARY_MAGIC = b"OMRMETA\x00"
+BINARY_FORMAT_VERSION = 1
+BINARY_SUFFIX = ".omrbin"
+_PREAMBLE = struct.Struct("<8sHHI32s")
+_BUBBLE_KEYS = ("bubble_id", "group_id", "row", "col", "label", "center_x_mm", "center_y_mm", "radius_mm")
+_ARRAY_NAMES = ("group_index", "rows", "cols", "center_x_mm", "center_y_mm", "radius_mm")
+_ALIGNMENT = 16
+
+
+class MetadataBinaryError(ValueError):
+    """Raised when a binary metadata file is corrupt or from another format version."""
+
+
+@dataclass(frozen=True)
+class MetadataBinary:
+    """Bubble arrays and the rest of the metadata of one template, backed by a read-only mmap.
+
+    Bubbles are stored sorted by (group_id, row, col), the order of `compile_bubble_set`.
+    `metadata` is the JSON payload without `bubbles`.
+    """
+
+    path: Path
+    json_sha256: str
+    metadata: dict[str, Any]
+    bubble_ids: tuple[str, ...]
+    labels: tuple[str, ...]
+    group_ids: tuple[str, ...]
+    group_index: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    center_x_mm: np.ndarray
+    center_y_mm: np.ndarray
+    radius_mm: np.ndarray
+
+
+def metadata_binary_path(json_path: str | Path) -> Path:
+    return Path(json_path).with_suffix(BINARY_SUFFIX)
+
+
+def write_metadata_binary(json_path: str | Path, output_path: str | Path | None = None) -> Path:
+    """Compile a metadata JSON into its binary companion; the JSON stays the source of truth."""
+    source = Path(json_path)
+    raw = source.read_bytes()
+    metadata = json.loads(raw)
+    if not isinstance(metadata, dict):
+        raise MetadataBinaryError("metadata root must be a JSON object")
+    out_path = Path(output_path) if output_path is not None else metadata_binary_path(source)
+
+    bubbles = metadata.get("bubbles")
+    if not isinstance(bubbles, list) or len(bubbles) == 0:
+        raise MetadataBinaryError("metadata 'bubbles' must be a non-empty list")
+    for bubble in bubbles:
+        missing = [key for key in _BUBBLE_KEYS if not isinstance(bubble, dict) or key not in bubble]
+        if missing:
+            raise MetadataBinaryError(f"bubble metadata missing keys: {missing}")
+    bubbles = sorted(bubbles, key=lambda item: (str(item["group_id"]), int(item["row"]), int(item["col"])))
+    group_ids: list[str] = []
+    group_positions: dict[str, int] = {}
+    for bubble in bubbles:
+        group_id = str(bubble["group_id"])
+        if group_id not in group_positions:
+            group_positions[group_id] = len(group_ids)
+            group_ids.append(group_id)
+
+    arrays = {
+        "group_index": np.array([group_positions[str(item["group_id"])] for item in bubbles], dtype="<i4"),
+        "rows": np.array([int(item["row"]) for item in bubbles], dtype="<i4"),
+        "cols": np.array([int(item["col"]) for item in bubbles], dtype="<i4"),
+        "center_x_mm": np.array([float(item["center_x_mm"]) for item in bubbles], dtype="<f8"),
+        "center_y_mm": np.array([float(item["center_y_mm"]) for item in bubbles], dtype="<f8"),
+        "radius_mm": np.array([float(item["radius_mm"]) for item in bubbles], dtype="<f8"),
+    }
+    header: dict[str, Any] = {
+        "metadata": {key: value for key, value in metadata.items() if key != "bubbles"},
+        "bubble_ids": [str(item["bubble_id"]) for item in bubbles],
+        "labels": [str(item["label"]) for item in bubbles],
+        "group_ids": group_ids,
+        "arrays": {},
+    }
+
+    # Los offsets dependen del largo del header, que a su vez los contiene: se itera hasta estabilizar.
+    header_bytes = b""
+    while True:
+        offset = _align(_PREAMBLE.size + len(header_bytes))
+        for name, array in arrays.items():
+            header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps(header, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        stable = len(encoded) == len(header_bytes)
+        header_bytes = encoded
+        if stable:
+            break
+
+    preamble = _PREAMBLE.pack(BINARY_MAGIC, BINARY_FORMAT_VERSION, 0, len(header_bytes), hashlib.sha256(raw).digest())
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # Nombre temporal por proceso: varios workers pueden regenerar el mismo binario a la vez.
+    tmp_path = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as file:
+            file.write(preamble)
+            file.write(header_bytes)
+            for name, array in arrays.items():
+                file.write(b"\x00" * (header["arrays"][name]["offset"] - file.tell()))
+                file.write(array.tobytes())
+        # Reemplazo atomico: un lector nunca ve un archivo a medio escribir.
+        tmp_path.replace(out_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return out_path
+
+
+def read_metadata_binary(path: str | Path) -> MetadataBinary:
+    """Memory-map a binary metadata file; bubble arrays are zero-copy, read-only views."""
+    binary_path = Path(path)
+    try:
+        with binary_path.open("rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as exc:
+        raise MetadataBinaryError(f"binary metadata '{binary_path}' could not be opened: {exc}") from exc
+
+    if len(buffer) < _PREAMBLE.size:
+        raise MetadataBinaryError(f"binary metadata '{binary_path}' is truncated")
+    magic, version, _, header_len, digest = _PREAMBLE.unpack_from(buffer, 0)
+    if magic != BINARY_MAGIC:
+        raise MetadataBinaryError(f"'{binary_path}' is not a binary metadata file")
+    if version != BINARY_FORMAT_VERSION:
+        raise MetadataBinaryError(f"binary metadata '{binary_path}' has unsupported version {version}")
+    try:
+        header = json.loads(buffer[_PREAMBLE.size : _PREAMBLE.size + header_len])
+        arrays = {name: _array_view(buffer, header["arrays"][name], binary_path) for name in _ARRAY_NAMES}
+        binary = MetadataBinary(
+            path=binary_path,
+            json_sha256=digest.hex(),
+            metadata=dict(header["metadata"]),
+            bubble_ids=tuple(header["bubble_ids"]),
+            labels=tuple(header["labels"]),
+            group_ids=tuple(header["group_ids"]),
+            **arrays,
+        )
+    except MetadataBinaryError:
+        raise
+    except (KeyError, TypeError, ValueError) as exc:
+        raise MetadataBinaryError(f"binary metadata '{binary_path}' has an invalid header") from exc
+    sizes = {len(binary.bubble_ids), len(binary.labels), *(len(array) for array in arrays.values())}
+    if len(sizes) != 1:
+        raise MetadataBinaryError(f"binary metadata '{binary_path}' has inconsistent bubble arrays")
+    return binary
+
+
+def _array_view(buffer: mmap.mmap, spec: dict[str, Any], binary_path: Path) -> np.ndarray:
+    dtype = np.dtype(spec["dtype"])
+    shape = tuple(int(value) for value in spec["shape"])
+    count = int(np.prod(shape)) if shape else 1
+    offset = int(spec["offset"])
+    if offset + count * dtype.itemsize > len(buffer):
+        raise MetadataBinaryError(f"binary metadata '{binary_path}' is truncated")
+    # ACCESS_READ hace que la vista sea de solo lectura.
+    return np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
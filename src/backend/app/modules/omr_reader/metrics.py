@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.modules.omr_reader.persistence_queue import persistence_queue_depth
+from app.modules.omr_reader.process_pool import pending_classic_reads, resolve_process_pool_workers
+
+# Llaves de uso de tokens por motor LLM -> tipo normalizado en la metrica.
+LLM_USAGE_TOKEN_KINDS = {
+    "gemini_usage": {
+        "prompt_token_count": "input",
+        "candidates_token_count": "output",
+        "thoughts_token_count": "thoughts",
+        "cached_content_token_count": "cached",
+        "total_token_count": "total",
+    },
+    "openai_usage": {
+        "input_tokens": "input",
+        "output_tokens": "output",
+        "total_tokens": "total",
+    },
+}
+
+READS = registry.counter(
+    "omr_reads_total",
+    "OMR reads finished, by backend and outcome (ok or error).",
+    label_names=("backend", "status"),
+)
+READ_FAILURES = registry.counter(
+    "omr_read_failures_total",
+    "Failed OMR reads by error type (e.g. ArucoDetectionError, CaptureQualityError, HomographyError).",
+    label_names=("backend", "error_type"),
+)
+QUESTIONS = registry.counter(
+    "omr_questions_total",
+    "Questions read.",
+    label_names=("backend",),
+)
+AMBIGUOUS_QUESTIONS = registry.counter(
+    "omr_ambiguous_questions_total",
+    "Questions with at least one ambiguous option (divide by omr_questions_total for the rate).",
+    label_names=("backend",),
+)
+LLM_TOKENS = registry.counter(
+    "omr_llm_tokens_total",
+    "LLM tokens reported by gemini_usage/openai_usage.",
+    label_names=("backend", "kind"),
+)
+READ_CACHE_LOOKUPS = registry.counter(
+    "omr_read_cache_lookups_total",
+    "Read cache lookups by outcome (hit or miss).",
+    label_names=("backend", "result"),
+)
+READ_DURATION = registry.histogram(
+    "omr_read_duration_seconds",
+    "End-to-end OMR read time per request or batch sheet.",
+    label_names=("backend",),
+)
+STAGE_DURATION = registry.histogram(
+    "omr_stage_duration_seconds",
+    "Time spent in each OMR read stage.",
+    label_names=("backend", "stage"),
+)
+PERSISTENCE_DURATION = registry.histogram(
+    "omr_persistence_duration_seconds",
+    "Time spent writing each read artifact (upload, trace, CSVs, database row).",
+    label_names=("job",),
+)
+registry.gauge(
+    "omr_process_pool_pending_reads",
+    "Classic reads queued or running in the process pool.",
+    callback=pending_classic_reads,
+)
+registry.gauge(
+    "omr_process_pool_workers",
+    "Configured process pool workers (0 when reads run in the API process).",
+    callback=lambda: resolve_process_pool_workers() if settings.omr_process_pool_enabled else 0,
+)
+registry.gauge(
+    "omr_persistence_queue_depth",
+    "Artifact writes waiting for the background writer.",
+    callback=persistence_queue_depth,
+)
+
+
+def observe_read_result(result: dict[str, Any]) -> None:
+    """Feed a finished read into the counters and histograms.
+
+    Runs in the API process: reads done in the process pool report their
+    stages through the returned diagnostics.
+    """
+    diagnostics = result.get("diagnostics", {})
+    backend = str(diagnostics.get("reader_backend", "unknown"))
+    READS.inc(backend=backend, status="ok")
+    read_cache = diagnostics.get("read_cache")
+    cache_hit = isinstance(read_cache, dict) and bool(read_cache.get("hit"))
+    if isinstance(read_cache, dict):
+        READ_CACHE_LOOKUPS.inc(backend=backend, result="hit" if cache_hit else "miss")
+
+    for stage, elapsed_ms in diagnostics.get("stage_timings_ms", {}).items():
+        STAGE_DURATION.observe(float(elapsed_ms) / 1000.0, backend=backend, stage=stage)
+    if diagnostics.get("request_total_ms") is not None:
+        READ_DURATION.observe(float(diagnostics["request_total_ms"]) / 1000.0, backend=backend)
+
+    questions = result.get("questions", [])
+    if isinstance(questions, list) and questions:
+        QUESTIONS.inc(len(questions), backend=backend)
+        ambiguous = sum(1 for item in questions if isinstance(item, dict) and item.get("ambiguous_options"))
+        if ambiguous:
+            AMBIGUOUS_QUESTIONS.inc(ambiguous, backend=backend)
+
+    if cache_hit:
+        # Los tokens ya se contaron en la lectura original.
+        return
+    for usage_key, kinds in LLM_USAGE_TOKEN_KINDS.items():
+        usage = diagnostics.get(usage_key)
+        if not isinstance(usage, dict):
+            continue
+        for key, kind in kinds.items():
+            value = usage.get(key)
+            if isinstance(value, (int, float)) and value > 0:
+                LLM_TOKENS.inc(value, backend=backend, kind=kind)
+
+
+def observe_read_failure(*, backend: str, error: BaseException) -> None:
+    READS.inc(backend=backend, status="error")
+    READ_FAILURES.inc(backend=backend, error_type=type(error).__name__)
+
+
+@contextmanager
+def observe_persistence(job: str) -> Iterator[None]:
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        PERSISTENCE_DURATION.observe(perf_counter() - start, job=job)
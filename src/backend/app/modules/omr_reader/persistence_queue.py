@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+PERSISTENCE_MODE_ASYNC = "async"
+PERSISTENCE_MODE_SYNC = "sync"
+
+# Un job escribe uno o mas archivos y devuelve sus rutas para el fsync.
+PersistenceJob = Callable[[], Iterable[Path]]
+
+_STOP = object()
+
+
+class PersistenceQueue:
+    """Bounded background writer for read artifacts.
+
+    Jobs run in submission order on a single daemon thread; the files written
+    by every job drained in one pass are fsynced together, followed by one
+    fsync per parent directory. When the queue is full, `submit` waits up to
+    `put_timeout_s` for room before writing inline.
+    """
+
+    def __init__(self, *, max_size: int, fsync: bool = True, put_timeout_s: float = 5.0) -> None:
+        self._queue: queue.Queue[object] = queue.Queue(maxsize=max(1, max_size))
+        self._fsync = fsync
+        self._put_timeout_s = max(0.0, put_timeout_s)
+        self._thread = threading.Thread(target=self._run, name="omr-persistence", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: PersistenceJob) -> None:
+        try:
+            self._queue.put(job, timeout=self._put_timeout_s)
+        except queue.Full:
+            # Sigue llena tras esperar: se escribe en el hilo del request en vez de
+            # crecer sin limite, pero solo despues de drenar lo encolado antes
+            # (p.ej. la foto antes que sus artefactos).
+            logger.warning("OMR cola de persistencia llena; escritura sincrona tras vaciarla")
+            self.flush()
+            _run_job(job, fsync=self._fsync)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while item is not _STOP:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            written: list[Path] = []
+            for job in batch:
+                if job is not _STOP:
+                    written.extend(_run_job(job, fsync=False))
+            if self._fsync:
+                _fsync_paths(written)
+            for _ in batch:
+                self._queue.task_done()
+            if batch[-1] is _STOP:
+                return
+
+
+_persistence_queue: PersistenceQueue | None = None
+_persistence_queue_lock = threading.Lock()
+_persistence_queue_closed = False
+
+
+def resolve_persistence_mode() -> str:
+    mode = str(settings.omr_persistence_mode).strip().lower()
+    return PERSISTENCE_MODE_SYNC if mode == PERSISTENCE_MODE_SYNC else PERSISTENCE_MODE_ASYNC
+
+
+def submit_persistence_job(job: PersistenceJob) -> None:
+    """Run `job` now (sync mode) or hand it to the background writer (async mode).
+
+    After `shutdown_persistence_queue` (and until `start_persistence_queue`)
+    jobs are written inline with a warning instead of starting a new writer.
+    """
+    global _persistence_queue
+    if resolve_persistence_mode() == PERSISTENCE_MODE_SYNC:
+        _run_job(job, fsync=settings.omr_persistence_fsync)
+        return
+    writer = _persistence_queue
+    if writer is None:
+        with _persistence_queue_lock:
+            if _persistence_queue is None and not _persistence_queue_closed:
+                _persistence_queue = PersistenceQueue(
+                    max_size=settings.omr_persistence_queue_size,
+                    fsync=settings.omr_persistence_fsync,
+                    put_timeout_s=settings.omr_persistence_put_timeout_s,
+                )
+            writer = _persistence_queue
+    if writer is None:
+        logger.warning("OMR cola de persistencia cerrada; escritura sincrona")
+        _run_job(job, fsync=settings.omr_persistence_fsync)
+        return
+    writer.submit(job)
+
+
+def persistence_queue_depth() -> int:
+    """Jobs waiting for the background writer (0 in sync mode or before the first job)."""
+    pending = _persistence_queue
+    return pending.depth() if pending is not None else 0
+
+
+def flush_persistence_queue() -> None:
+    if _persistence_queue is not None:
+        _persistence_queue.flush()
+
+
+def start_persistence_queue() -> None:
+    """Allow the background writer to start again (app startup)."""
+    global _persistence_queue_closed
+    with _persistence_queue_lock:
+        _persistence_queue_closed = False
+
+
+def shutdown_persistence_queue() -> None:
+    """Drain pending writes and stop the background writer until `start_persistence_queue`."""
+    global _persistence_queue, _persistence_queue_closed
+    with _persistence_queue_lock:
+        pending, _persistence_queue = _persistence_queue, None
+        _persistence_queue_closed = True
+    if pending is not None:
+        pending.close()
+
+
+def _run_job(job: PersistenceJob, *, fsync: bool) -> list[Path]:
+    try:
+        written = [Path(path) for path in job()]
+    except Exception:  # noqa: BLE001
+        logger.exception("OMR error persistiendo artefactos de lectura")
+        return []
+    if fsync:
+        _fsync_paths(written)
+    return written
+
+
+def _fsync_paths(paths: list[Path]) -> None:
+    for path in paths:
+        _fsync(path, os.O_RDONLY)
+    for directory in {path.parent for path in paths}:
+        _fsync(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+
+
+def _fsync(path: Path, flags: int) -> None:
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Algunos sistemas (p.ej. Windows con directorios) no soportan fsync aqui.
+        pass
+    finally:
+        os.close(fd)
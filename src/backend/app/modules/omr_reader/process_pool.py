@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Condition, Lock
+from typing import Any
+
+import cv2
+
+from app.core.config import settings
+from app.modules.omr_reader.api_service import (
+    build_omr_read_request,
+    lookup_read_cache,
+    resolve_backend_relative_path,
+    run_omr_read_from_image_bytes,
+)
+from app.modules.omr_reader.aruco_detectors import get_aruco_detector
+from app.modules.omr_reader.errors import ReaderBusyError
+from app.modules.omr_reader.read_cache import ReadCacheLookup, store_cached_read
+from app.modules.omr_reader.read_plan import get_template_read_plan
+from app.modules.omr_reader.reader_strategy import BACKEND_CLASSIC
+
+logger = logging.getLogger("uvicorn.error")
+
+# Escala por defecto con la que se precompila el plan en cada worker; coincide
+# con el valor por defecto de `px_per_mm` en los endpoints de lectura.
+PRELOAD_PX_PER_MM = 10.0
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = Lock()
+_pending = 0
+_pending_slots = Condition()
+
+
+def resolve_process_pool_workers() -> int:
+    """Return the configured worker count, `0` meaning one per CPU."""
+    configured = settings.omr_process_pool_workers
+    if configured > 0:
+        return configured
+    return max(1, os.cpu_count() or 1)
+
+
+def resolve_process_pool_max_pending() -> int:
+    """Return how many reads may be queued or running before rejecting new ones."""
+    configured = settings.omr_process_pool_max_pending
+    if configured > 0:
+        return configured
+    return 2 * resolve_process_pool_workers()
+
+
+def get_omr_process_pool() -> ProcessPoolExecutor | None:
+    """Return the shared classic-engine pool, creating it on first use.
+
+    Returns `None` when the pool is disabled, so callers read in-process.
+    """
+    global _pool
+    if not settings.omr_process_pool_enabled:
+        return None
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            # `spawn` evita heredar hilos/locks del servidor (uvicorn, sqlite) al hacer fork.
+            _pool = ProcessPoolExecutor(
+                max_workers=resolve_process_pool_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(
+                    settings.omr_default_metadata_path,
+                    PRELOAD_PX_PER_MM,
+                    settings.omr_opencv_threads,
+                ),
+            )
+            logger.info(
+                "OMR process pool iniciado | workers=%s max_pending=%s",
+                resolve_process_pool_workers(),
+                resolve_process_pool_max_pending(),
+            )
+        return _pool
+
+
+def discard_broken_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop `pool` after a worker died so the next read builds a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            # Otro hilo ya lo descarto (y quiza creo uno nuevo).
+            return
+        _pool = None
+    logger.warning("OMR process pool roto (un worker termino abruptamente); se recrea en la proxima lectura")
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_omr_process_pool(*, wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def submit_classic_read(*, block: bool = False, **read_kwargs: Any) -> Future[dict[str, Any]]:
+    """Queue one classic read and return its future.
+
+    The read cache is checked here, in the API process, so repeated uploads
+    are answered without taking a pool slot; workers never cache themselves.
+    When the pending-read limit is reached, raises `ReaderBusyError` instead of
+    letting the queue grow without bound, or waits for a free slot if `block`
+    is set (batch reads). Without a pool the read runs inline and an
+    already-resolved future is returned.
+    """
+    global _pending
+    lookup = None
+    if settings.omr_read_cache_enabled:
+        lookup = lookup_read_cache(build_omr_read_request(**read_kwargs), backend=BACKEND_CLASSIC)
+    future: Future[dict[str, Any]] = Future()
+    if lookup is not None and lookup.result is not None:
+        future.set_result(lookup.result)
+        return future
+
+    max_pending = resolve_process_pool_max_pending()
+    with _pending_slots:
+        if block:
+            _pending_slots.wait_for(lambda: _pending < max_pending)
+        elif _pending >= max_pending:
+            raise ReaderBusyError(f"OMR reader is busy ({_pending} reads pending); retry shortly")
+        _pending += 1
+
+    try:
+        pool = get_omr_process_pool()
+        if pool is None:
+            try:
+                _resolve_read(future, lookup, _read_classic(read_kwargs))
+            except BaseException as exc:  # noqa: BLE001
+                future.set_exception(exc)
+        else:
+            try:
+                worker_future = pool.submit(_read_classic, read_kwargs)
+            except BrokenProcessPool:
+                # La lectura no llego a correr: se reintenta una vez con un pool nuevo.
+                discard_broken_process_pool(pool)
+                pool = get_omr_process_pool()
+                if pool is None:
+                    raise
+                worker_future = pool.submit(_read_classic, read_kwargs)
+            # El resultado se guarda en cache antes de entregarlo: quien espera
+            # el future puede modificarlo en cuanto se resuelve.
+            worker_future.add_done_callback(
+                lambda done, pool=pool: _forward_read(done, future, lookup, pool=pool)
+            )
+    except BaseException:
+        _release_pending()
+        raise
+    future.add_done_callback(lambda _: _release_pending())
+    return future
+
+
+async def run_classic_read(**read_kwargs: Any) -> dict[str, Any]:
+    """Await a classic read without blocking the event loop."""
+    # El envio tambien va al threadpool: calcula el sha256 de la cache y puede
+    # consultar SQLite. Sin pool, la lectura misma corre ahi y el future ya llega resuelto.
+    future = await asyncio.to_thread(submit_classic_read, **read_kwargs)
+    return await asyncio.wrap_future(future)
+
+
+def pending_classic_reads() -> int:
+    with _pending_slots:
+        return _pending
+
+
+def _release_pending() -> None:
+    global _pending
+    with _pending_slots:
+        _pending -= 1
+        _pending_slots.notify()
+
+
+def _read_classic(read_kwargs: dict[str, Any]) -> dict[str, Any]:
+    return run_omr_read_from_image_bytes(**read_kwargs, reader_backend=BACKEND_CLASSIC, use_read_cache=False)
+
+
+def _resolve_read(future: Future[dict[str, Any]], lookup: ReadCacheLookup | None, result: dict[str, Any]) -> None:
+    store_cached_read(lookup, result)
+    future.set_result(result)
+
+
+def _forward_read(
+    worker_future: Future[dict[str, Any]],
+    future: Future[dict[str, Any]],
+    lookup: ReadCacheLookup | None,
+    *,
+    pool: ProcessPoolExecutor,
+) -> None:
+    try:
+        result = worker_future.result()
+    except BrokenProcessPool as exc:
+        discard_broken_process_pool(pool)
+        future.set_exception(exc)
+        return
+    except BaseException as exc:  # noqa: BLE001
+        future.set_exception(exc)
+        return
+    try:
+        _resolve_read(future, lookup, result)
+    except BaseException as exc:  # noqa: BLE001
+        if not future.done():
+            future.set_exception(exc)
+
+
+def _init_worker(metadata_path: str, px_per_mm: float, opencv_threads: int) -> None:
+    # Un hilo de OpenCV por proceso: el paralelismo lo aporta el pool.
+    cv2.setNumThreads(max(0, opencv_threads))
+    try:
+        plan = get_template_read_plan(resolve_backend_relative_path(metadata_path), px_per_mm=px_per_mm)
+        get_aruco_detector(plan.metadata["aruco_dictionary_name"])
+    except Exception as exc:  # noqa: BLE001
+        # Un fallo en el initializer romperia todo el pool: la plantilla se
+        # compilara en la primera lectura y el error real se reporta ahi.
+        logger.warning("OMR worker sin precarga de plantilla | error=%r", exc)
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+import cv2
+
+from app.core.config import settings
+from app.modules.omr_reader.bubble_classifier import DEFAULT_INNER_RADIUS_FACTOR
+from app.modules.omr_reader.errors import InputFileNotFoundError
+from app.modules.omr_reader.loader import load_read_metadata
+from app.modules.omr_reader.reader_strategy import BACKEND_CLASSIC, BACKEND_GEMINI, BACKEND_OPENAI, OMRReadRequest
+
+logger = logging.getLogger("uvicorn.error")
+
+# Se incrementa cuando cambia la forma del resultado: invalida lo ya guardado en disco.
+READ_CACHE_SCHEMA_VERSION = 2
+
+# Rutas propias de cada envio (foto subida, trazas, depuracion): no se comparten entre subidas.
+PER_UPLOAD_DIAGNOSTICS = (
+    "debug_artifacts",
+    "uploaded_image_path",
+    "trace_json_path",
+    "ratios_csv_path",
+    "auxiliary_ratios_csv_path",
+)
+
+TIER_MEMORY = "memory"
+TIER_DISK = "disk"
+
+
+@dataclass(frozen=True)
+class ReadCacheLookup:
+    """Outcome of a cache lookup; `result` is a private copy on hits, None on misses.
+
+    `uploaded_image_path` is the upload being read, remembered as the source
+    of the entry stored on a miss.
+    """
+
+    key: str
+    result: dict[str, Any] | None = None
+    tier: str | None = None
+    elapsed_ms: float = 0.0
+    uploaded_image_path: str | None = None
+
+
+class _SQLiteReadCacheTier:
+    """On-disk tier shared by API restarts; entries are evicted by last use."""
+
+    def __init__(self, path: Path, *, max_entries: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._max_entries = max_entries
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS omr_read_cache ("
+            "key TEXT PRIMARY KEY, payload TEXT NOT NULL, last_used_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_omr_read_cache_last_used_at ON omr_read_cache (last_used_at)"
+        )
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM omr_read_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE omr_read_cache SET last_used_at = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, payload: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO omr_read_cache (key, payload, last_used_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+            if self._max_entries > 0:
+                self._conn.execute(
+                    "DELETE FROM omr_read_cache WHERE key IN ("
+                    "SELECT key FROM omr_read_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self._max_entries,),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM omr_read_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ReadCache:
+    """Two-tier cache of finished reads keyed by `read_cache_key`.
+
+    Results are stored as JSON text, so every hit returns an independent copy
+    that callers may mutate (the endpoint adds paths and timings to it).
+    Disk hits are promoted to the in-memory LRU.
+    """
+
+    def __init__(self, *, max_entries: int, disk: _SQLiteReadCacheTier | None = None) -> None:
+        self._max_entries = max(0, max_entries)
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = Lock()
+        self.disk = disk
+
+    def get(self, key: str) -> tuple[dict[str, Any], str] | None:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+        if payload is not None:
+            return json.loads(payload), TIER_MEMORY
+        if self.disk is None:
+            return None
+        payload = self.disk.get(key)
+        if payload is None:
+            return None
+        self._remember(key, payload)
+        return json.loads(payload), TIER_DISK
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        try:
+            payload = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError) as exc:
+            logger.warning("OMR resultado no cacheable | error=%s", exc)
+            return
+        self._remember(key, payload)
+        if self.disk is not None:
+            self.disk.put(key, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _remember(self, key: str, payload: str) -> None:
+        if self._max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache: ReadCache | None = None
+_cache_lock = Lock()
+_TemplateStamp = tuple[int, int]
+_template_identities: dict[str, tuple[_TemplateStamp, tuple[str, str]]] = {}
+_template_identities_lock = Lock()
+
+
+def get_read_cache() -> ReadCache | None:
+    """Return the process-wide cache, or `None` when `OMR_READ_CACHE_ENABLED` is off."""
+    global _cache
+    if not settings.omr_read_cache_enabled:
+        return None
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            disk = None
+            if settings.omr_read_cache_db_path:
+                disk = _SQLiteReadCacheTier(
+                    _resolve_cache_db_path(settings.omr_read_cache_db_path),
+                    max_entries=settings.omr_read_cache_db_max_entries,
+                )
+            _cache = ReadCache(max_entries=settings.omr_read_cache_size, disk=disk)
+        return _cache
+
+
+def reset_read_cache() -> None:
+    """Drop the process-wide cache so the next lookup rebuilds it from settings."""
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
+    with _template_identities_lock:
+        _template_identities.clear()
+
+
+def read_cache_key(request: OMRReadRequest, *, backend: str, metadata_file: Path) -> str:
+    """Hash the image bytes together with everything that changes the read result.
+
+    Besides the request, the key covers the reader settings and a digest of
+    the reader source (`_engine_fingerprint`), so entries on disk do not
+    survive a config or code change. Debug-artifact options and the upload
+    path are left out: they do not change the result.
+    """
+    template_id, version, stamp = _template_identity(metadata_file)
+    params: list[Any] = [
+        READ_CACHE_SCHEMA_VERSION,
+        backend,
+        template_id,
+        version,
+        str(metadata_file),
+        *stamp,
+        float(request.px_per_mm),
+        float(request.marked_threshold),
+        float(request.unmarked_threshold),
+        bool(request.robust_mode),
+        *_engine_fingerprint(),
+    ]
+    # En motores LLM la respuesta depende del modelo configurado.
+    if backend == BACKEND_GEMINI:
+        params.append(settings.gemini_model)
+    elif backend == BACKEND_OPENAI:
+        params.append(settings.openai_model)
+    digest = hashlib.sha256(request.image_bytes)
+    digest.update(json.dumps(params, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def lookup_cached_read(request: OMRReadRequest, *, backend: str, metadata_file: Path) -> ReadCacheLookup | None:
+    """Look `request` up; returns `None` when the cache is disabled.
+
+    On hits the stored result is returned with `diagnostics.read_cache` marking
+    the hit and naming the upload the result was first read from (`source`),
+    and `stage_timings_ms` holding only the lookup time, so stage histograms
+    are not fed the original read's timings twice.
+
+    Only the classic engine writes debug artifacts. A classic debug read hits
+    only entries whose source read wrote them, and gets those paths back;
+    otherwise it runs so its artifacts exist.
+    """
+    cache = get_read_cache()
+    if cache is None:
+        return None
+    start = time.perf_counter()
+    key = read_cache_key(request, backend=backend, metadata_file=metadata_file)
+    cached = cache.get(key)
+    writes_debug_artifacts = backend == BACKEND_CLASSIC and request.save_debug_artifacts
+    if cached is not None and writes_debug_artifacts and not cached[0]["source"].get("debug_artifacts"):
+        cached = None
+    elapsed_ms = round((time.perf_counter() - start) * 1000.0, 3)
+    if cached is None:
+        return ReadCacheLookup(key=key, elapsed_ms=elapsed_ms, uploaded_image_path=request.uploaded_image_path)
+
+    entry, tier = cached
+    result = entry["result"]
+    source = entry["source"]
+    diagnostics = result.setdefault("diagnostics", {})
+    diagnostics["read_cache"] = {"hit": True, "tier": tier, "key": key, "source": source["uploaded_image_path"]}
+    diagnostics["stage_timings_ms"] = {"cache_lookup": elapsed_ms}
+    if writes_debug_artifacts:
+        diagnostics["debug_artifacts"] = source["debug_artifacts"]
+    return ReadCacheLookup(key=key, result=result, tier=tier, elapsed_ms=elapsed_ms)
+
+
+def store_cached_read(lookup: ReadCacheLookup | None, result: dict[str, Any]) -> None:
+    """Mark `result` as a cache miss and store a copy under the lookup key.
+
+    The stored copy drops `PER_UPLOAD_DIAGNOSTICS`; the upload path and debug
+    artifacts of this read are kept apart as the entry's source, so hits can
+    point at the files this read leaves behind.
+    """
+    if lookup is None:
+        return
+    diagnostics = result.setdefault("diagnostics", {})
+    diagnostics["read_cache"] = {"hit": False, "tier": None, "key": lookup.key}
+    cache = get_read_cache()
+    if cache is not None:
+        shared = {key: value for key, value in diagnostics.items() if key not in PER_UPLOAD_DIAGNOSTICS}
+        source = {
+            "uploaded_image_path": lookup.uploaded_image_path,
+            "debug_artifacts": diagnostics.get("debug_artifacts"),
+        }
+        cache.put(lookup.key, {"result": {**result, "diagnostics": shared}, "source": source})
+
+
+def cached_read_source(result: dict[str, Any]) -> Path | None:
+    """Return the upload a cache hit was first read from, or None for fresh reads.
+
+    Its photo, artifacts and stored row already exist, so callers reuse them
+    instead of persisting the hit again.
+    """
+    read_cache = result.get("diagnostics", {}).get("read_cache") or {}
+    source = read_cache.get("source") if read_cache.get("hit") else None
+    return Path(source) if source else None
+
+
+def _engine_fingerprint() -> list[Any]:
+    # Ajustes que cambian la lectura sin cambiar la peticion, mas la version del codigo.
+    return [
+        _reader_code_digest(),
+        cv2.__version__,
+        int(settings.omr_aruco_detection_max_side_px),
+        settings.omr_aruco_detector_profile,
+        bool(settings.omr_decode_reduced_enabled),
+        float(settings.omr_decode_oversample),
+        bool(settings.omr_grayscale_pipeline),
+        float(DEFAULT_INNER_RADIUS_FACTOR),
+    ]
+
+
+@lru_cache(maxsize=1)
+def _reader_code_digest() -> str:
+    # Fuentes del lector (sin scripts); se calcula una vez por proceso.
+    package_dir = Path(__file__).resolve().parent
+    digest = hashlib.sha256()
+    for source in sorted(package_dir.rglob("*.py")):
+        relative = source.relative_to(package_dir)
+        if relative.parts[0] == "scripts":
+            continue
+        digest.update(relative.as_posix().encode("utf-8"))
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def _template_identity(metadata_file: Path) -> tuple[str, str, _TemplateStamp]:
+    # Lee template_id/version solo cuando el archivo cambia (mtime/tamano).
+    try:
+        stat = Path(metadata_file).stat()
+    except OSError as exc:
+        raise InputFileNotFoundError(f"metadata file not found: '{metadata_file}'") from exc
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    key = str(metadata_file)
+    with _template_identities_lock:
+        cached = _template_identities.get(key)
+    if cached is not None and cached[0] == stamp:
+        return (*cached[1], stamp)
+    metadata = load_read_metadata(metadata_file)
+    identity = (str(metadata["template_id"]), str(metadata["version"]))
+    with _template_identities_lock:
+        _template_identities[key] = (stamp, identity)
+    return (*identity, stamp)
+
+
+def _resolve_cache_db_path(path_value: str) -> Path:
+    path = Path(path_value)
+    if path.is_absolute():
+        return path
+    return Path(__file__).resolve().parents[3] / path
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+LOG_FORMAT_TEXT = "text"
+LOG_FORMAT_JSON = "json"
+
+
+class _Lazy:
+    """Log argument rendered only if a handler actually formats the record."""
+
+    __slots__ = ("_render",)
+
+    def __init__(self, render: Callable[[], str]) -> None:
+        self._render = render
+
+    def __str__(self) -> str:
+        return self._render()
+
+
+def _lazy_json(value: Any) -> _Lazy:
+    return _Lazy(lambda: json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+
+def resolve_log_format() -> str:
+    value = str(settings.omr_log_format).strip().lower()
+    return LOG_FORMAT_JSON if value == LOG_FORMAT_JSON else LOG_FORMAT_TEXT
+
+
+def log_read_result(
+    *,
+    result: dict[str, Any],
+    uploaded_path: Path,
+    trace_json_path: Path,
+    ratios_csv_path: Path,
+    auxiliary_ratios_csv_path: Path,
+    configured_backend: str,
+) -> None:
+    """Log one finished read.
+
+    `text` mode keeps the human-readable lines; `json` mode emits one compact
+    record per read (WARNING when something needs manual review). In both, the
+    per-question and auxiliary ratio dump is logged at DEBUG, or at INFO for a
+    `omr_log_ratio_sample_rate` fraction of reads, and is only built if emitted.
+    """
+    summary = _read_summary(result, configured_backend=configured_backend)
+    if resolve_log_format() == LOG_FORMAT_JSON:
+        record = {
+            "event": "omr_read",
+            **summary,
+            "uploaded_image_path": str(uploaded_path),
+            "trace_json_path": str(trace_json_path),
+        }
+        level = logging.WARNING if summary["alerts"] else logging.INFO
+        logger.log(level, "%s", _lazy_json(record))
+    else:
+        _log_text_summary(
+            summary,
+            uploaded_path=uploaded_path,
+            trace_json_path=trace_json_path,
+            ratios_csv_path=ratios_csv_path,
+            auxiliary_ratios_csv_path=auxiliary_ratios_csv_path,
+        )
+    _log_ratio_dump(result, summary=summary)
+
+
+def _read_summary(result: dict[str, Any], *, configured_backend: str) -> dict[str, Any]:
+    diagnostics = result.get("diagnostics", {})
+    engine = diagnostics.get("reader_backend", configured_backend)
+    usage = diagnostics.get("gemini_usage", {})
+    report = diagnostics.get("gemini_report", {})
+    model_latency_ms = diagnostics.get("gemini_model_latency_ms")
+    if engine == "openai":
+        usage = diagnostics.get("openai_usage", usage)
+        report = diagnostics.get("openai_report", report)
+        model_latency_ms = diagnostics.get("openai_model_latency_ms")
+
+    auxiliary = result.get("auxiliary", {})
+    blocks = auxiliary.get("blocks", []) if isinstance(auxiliary, dict) else []
+    by_id = {str(item.get("block_id")): item for item in blocks if isinstance(item, dict)}
+    doc_block = by_id.get("document_type", {})
+    doc_selected = doc_block.get("selected", {}) if isinstance(doc_block, dict) else {}
+    student_block = by_id.get("student_identity_number", {})
+    exam_block = by_id.get("exam_identifier", {})
+
+    alerts: dict[str, Any] = {}
+    student_problem_cols = _problem_columns(student_block)
+    if student_problem_cols:
+        alerts["student_id_columns"] = student_problem_cols
+    exam_problem_cols = _problem_columns(exam_block)
+    if exam_problem_cols:
+        alerts["exam_id_columns"] = exam_problem_cols
+    doc_status = doc_selected.get("status") if isinstance(doc_selected, dict) else None
+    if doc_status in {"missing", "ambiguous"}:
+        alerts["document_type_status"] = doc_status
+    review_questions = diagnostics.get("manual_review_questions", [])
+    if review_questions:
+        alerts["ambiguous_questions"] = review_questions
+
+    return {
+        "template_id": result.get("template_id"),
+        "version": result.get("version"),
+        "engine": engine,
+        "quality_summary": result.get("quality_summary", {}),
+        "request_total_ms": diagnostics.get("request_total_ms"),
+        "model_latency_ms": model_latency_ms,
+        "stage_timings_ms": diagnostics.get("stage_timings_ms", {}),
+        "read_cache_hit": bool(diagnostics.get("read_cache", {}).get("hit")),
+        "usage": usage,
+        "report": report,
+        "auxiliary_summary": auxiliary.get("summary", {}) if isinstance(auxiliary, dict) else {},
+        "document_type": doc_selected.get("value") if isinstance(doc_selected, dict) else None,
+        "document_type_status": doc_status,
+        "student_id": student_block.get("value") if isinstance(student_block, dict) else None,
+        "exam_id": exam_block.get("value") if isinstance(exam_block, dict) else None,
+        "alerts": alerts,
+    }
+
+
+def _problem_columns(block_obj: Any) -> list[int]:
+    cols = []
+    for col in block_obj.get("columns", []) if isinstance(block_obj, dict) else []:
+        if str(col.get("status")) in {"missing", "ambiguous"}:
+            cols.append(int(col.get("column_index", -1)))
+    return cols
+
+
+def _log_text_summary(
+    summary: dict[str, Any],
+    *,
+    uploaded_path: Path,
+    trace_json_path: Path,
+    ratios_csv_path: Path,
+    auxiliary_ratios_csv_path: Path,
+) -> None:
+    logger.info(
+        "OMR read completed | template=%s version=%s summary=%s",
+        summary["template_id"],
+        summary["version"],
+        _lazy_json(summary["quality_summary"]),
+    )
+    logger.info("OMR image saved at: %s", uploaded_path)
+    logger.info("OMR trace json saved at: %s", trace_json_path)
+    logger.info("OMR ratios csv saved at: %s", ratios_csv_path)
+    logger.info("OMR auxiliary ratios csv saved at: %s", auxiliary_ratios_csv_path)
+    logger.info(
+        "OMR engine=%s usage=%s report=%s gemini_model_latency_ms=%s request_total_ms=%s",
+        summary["engine"],
+        _lazy_json(summary["usage"]),
+        _lazy_json(summary["report"]),
+        summary["model_latency_ms"],
+        summary["request_total_ms"],
+    )
+    logger.info(
+        "OMR auxiliary summary=%s document_type=%s (%s) student_id=%s exam_id=%s",
+        _lazy_json(summary["auxiliary_summary"]),
+        summary["document_type"],
+        summary["document_type_status"],
+        summary["student_id"],
+        summary["exam_id"],
+    )
+    alerts = summary["alerts"]
+    if "student_id_columns" in alerts:
+        logger.warning("OMR alerta revision identidad | problematic_columns=%s", alerts["student_id_columns"])
+    if "exam_id_columns" in alerts:
+        logger.warning("OMR alerta revision id_examen | problematic_columns=%s", alerts["exam_id_columns"])
+    if "document_type_status" in alerts:
+        logger.warning("OMR alerta revision tipo_documento | status=%s", alerts["document_type_status"])
+    if "ambiguous_questions" in alerts:
+        logger.warning("OMR alerta revisión manual | ambiguous_questions=%s", alerts["ambiguous_questions"])
+
+
+def _log_ratio_dump(result: dict[str, Any], *, summary: dict[str, Any]) -> None:
+    if logger.isEnabledFor(logging.DEBUG):
+        level = logging.DEBUG
+    elif random.random() < settings.omr_log_ratio_sample_rate and logger.isEnabledFor(logging.INFO):
+        level = logging.INFO
+    else:
+        return
+
+    if resolve_log_format() == LOG_FORMAT_JSON:
+        logger.log(level, "%s", _Lazy(lambda: _ratio_record_json(result, summary=summary)))
+        return
+
+    logger.log(level, "OMR respuestas leidas:\n%s", _Lazy(lambda: "\n".join(_answer_lines(result))))
+    logger.log(level, "OMR ratios por pregunta:\n%s", _Lazy(lambda: "\n".join(_question_ratio_lines(result))))
+    auxiliary = result.get("auxiliary", {})
+    if isinstance(auxiliary, dict) and auxiliary.get("blocks"):
+        logger.log(level, "OMR ratios auxiliares:\n%s", _Lazy(lambda: "\n".join(_auxiliary_ratio_lines(result))))
+
+
+def _ratio_record_json(result: dict[str, Any], *, summary: dict[str, Any]) -> str:
+    record = {
+        "event": "omr_read_ratios",
+        "template_id": summary["template_id"],
+        "version": summary["version"],
+        "questions": {
+            str(question_number): {label: round(value, 4) for label, value in ratios}
+            for question_number, ratios in _question_ratios(result)
+        },
+        "auxiliary": {
+            key: {f"row{row}": round(value, 4) for row, value in pairs}
+            for key, pairs in _auxiliary_ratio_pairs(result)
+        },
+    }
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def _answer_lines(result: dict[str, Any]) -> list[str]:
+    lines = []
+    for item in result.get("questions", []):
+        marked_options = item.get("marked_options", [])
+        marked_text = ", ".join(marked_options) if marked_options else "-"
+        ambiguous_options = item.get("ambiguous_options", [])
+        review_suffix = f" [REVISAR ambigua: {', '.join(ambiguous_options)}]" if ambiguous_options else ""
+        lines.append(f"pregunta {item.get('question_number')}: {marked_text}{review_suffix}")
+    return lines
+
+
+def _question_ratios(result: dict[str, Any]) -> list[tuple[Any, list[tuple[str, float]]]]:
+    out = []
+    for item in result.get("questions", []):
+        ratios_by_label: dict[str, float] = {}
+        for option in item.get("options", []):
+            label = str(option.get("label", ""))
+            if label:
+                ratios_by_label[label] = float(option.get("fill_ratio", 0.0))
+        out.append(
+            (
+                item.get("question_number"),
+                sorted(ratios_by_label.items(), key=lambda pair: pair[1], reverse=True),
+            )
+        )
+    return out
+
+
+def _question_ratio_lines(result: dict[str, Any]) -> list[str]:
+    lines = []
+    for question_number, sorted_ratios in _question_ratios(result):
+        margin = sorted_ratios[0][1] - sorted_ratios[1][1] if len(sorted_ratios) >= 2 else 0.0
+        ratio_text = ", ".join(f"{label}={value:.4f}" for label, value in sorted_ratios)
+        lines.append(f"pregunta {question_number}: {ratio_text} | margin={margin:.4f}")
+    return lines
+
+
+def _auxiliary_ratio_pairs(result: dict[str, Any]) -> list[tuple[str, list[tuple[int, float]]]]:
+    auxiliary = result.get("auxiliary", {})
+    blocks = auxiliary.get("blocks", []) if isinstance(auxiliary, dict) else []
+    out: list[tuple[str, list[tuple[int, float]]]] = []
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+        block_id = str(block.get("block_id", "aux"))
+        if str(block.get("selection_mode", "")) == "single_choice":
+            selected = block.get("selected", {})
+            ratios_by_row = selected.get("ratios_by_row", {}) if isinstance(selected, dict) else {}
+            out.append((block_id, _sorted_row_ratios(ratios_by_row)))
+            continue
+        for col in block.get("columns", []) if isinstance(block.get("columns"), list) else []:
+            if not isinstance(col, dict):
+                continue
+            key = f"{block_id}[col {int(col.get('column_index', -1))}]"
+            out.append((key, _sorted_row_ratios(col.get("ratios_by_row", {}))))
+    return out
+
+
+def _sorted_row_ratios(ratios_by_row: dict[Any, Any]) -> list[tuple[int, float]]:
+    return sorted(
+        ((int(row), float(value)) for row, value in ratios_by_row.items()),
+        key=lambda pair: pair[1],
+        reverse=True,
+    )
+
+
+def _auxiliary_ratio_lines(result: dict[str, Any]) -> list[str]:
+    lines = []
+    for key, pairs in _auxiliary_ratio_pairs(result):
+        lines.append(f"{key}:")
+        lines.extend(f"  row{row}={value:.4f}" for row, value in pairs)
+    return lines
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from types import MappingProxyType
+from typing import Any
+
+from app.core.config import settings
+from app.modules.omr_reader.auxiliary_blocks import compile_auxiliary_blocks
+from app.modules.omr_reader.bubble_classifier import (
+    DEFAULT_INNER_RADIUS_FACTOR,
+    compile_bubble_set,
+    compile_bubble_set_from_binary,
+)
+from app.modules.omr_reader.contracts import CompiledAuxiliaryBlock, CompiledBubbleSet
+from app.modules.omr_reader.errors import InputFileNotFoundError
+from app.modules.omr_reader.loader import load_read_metadata, load_read_metadata_binary
+from app.modules.omr_reader.metadata_binary import MetadataBinaryError, write_metadata_binary
+
+logger = logging.getLogger("uvicorn.error")
+
+
+@dataclass(frozen=True)
+class TemplateReadPlan:
+    """Immutable, per-template read state shared across requests.
+
+    `metadata` is a read-only view of the validated JSON payload; when the plan
+    comes from the binary companion (`metadata_binary_path` is set) it omits
+    `bubbles`, which are only needed compiled.
+    `page_size_px` is the full aligned page (width, height) at `px_per_mm`,
+    or None when the metadata does not declare a page size.
+    """
+
+    metadata_path: Path
+    mtime_ns: int
+    px_per_mm: float
+    inner_radius_factor: float
+    metadata: Mapping[str, Any]
+    bubbles: CompiledBubbleSet
+    auxiliary_blocks: tuple[CompiledAuxiliaryBlock, ...]
+    page_size_px: tuple[int, int] | None
+    metadata_binary_path: Path | None = None
+
+
+_PlanKey = tuple[str, float, float]
+_plan_cache: OrderedDict[_PlanKey, tuple[tuple[int, int], TemplateReadPlan]] = OrderedDict()
+_plan_cache_lock = Lock()
+
+
+def get_template_read_plan(
+    metadata_path: str | Path,
+    *,
+    px_per_mm: float,
+    inner_radius_factor: float = DEFAULT_INNER_RADIUS_FACTOR,
+) -> TemplateReadPlan:
+    metadata_file = Path(metadata_path)
+    try:
+        stat = metadata_file.stat()
+    except OSError as exc:
+        raise InputFileNotFoundError(f"metadata file not found: '{metadata_file}'") from exc
+
+    key: _PlanKey = (str(metadata_file), float(px_per_mm), float(inner_radius_factor))
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _plan_cache_lock:
+        cached = _plan_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            _plan_cache.move_to_end(key)
+            return cached[1]
+
+    # Compilacion fuera del lock: dos requests concurrentes pueden compilar el
+    # mismo plan, pero el resultado es identico y el ultimo en llegar gana.
+    plan = compile_template_read_plan(
+        metadata_file,
+        px_per_mm=px_per_mm,
+        inner_radius_factor=inner_radius_factor,
+        mtime_ns=stat.st_mtime_ns,
+    )
+    max_size = max(0, settings.omr_read_plan_cache_size)
+    with _plan_cache_lock:
+        if max_size > 0:
+            _plan_cache[key] = (stamp, plan)
+            _plan_cache.move_to_end(key)
+        else:
+            _plan_cache.pop(key, None)
+        while len(_plan_cache) > max_size:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def compile_template_read_plan(
+    metadata_path: str | Path,
+    *,
+    px_per_mm: float,
+    inner_radius_factor: float = DEFAULT_INNER_RADIUS_FACTOR,
+    mtime_ns: int | None = None,
+) -> TemplateReadPlan:
+    metadata_file = Path(metadata_path)
+    binary = load_read_metadata_binary(metadata_file) if settings.omr_metadata_binary_enabled else None
+    if binary is not None:
+        metadata = binary.metadata
+        bubbles = compile_bubble_set_from_binary(
+            binary,
+            px_per_mm=px_per_mm,
+            inner_radius_factor=inner_radius_factor,
+        )
+    else:
+        metadata = load_read_metadata(metadata_file)
+        bubbles = compile_bubble_set(
+            metadata["bubbles"],
+            px_per_mm=px_per_mm,
+            inner_radius_factor=inner_radius_factor,
+        )
+        if settings.omr_metadata_binary_enabled:
+            _refresh_metadata_binary(metadata_file)
+    auxiliary_blocks = compile_auxiliary_blocks(
+        metadata=metadata,
+        px_per_mm=px_per_mm,
+        inner_radius_factor=inner_radius_factor,
+    )
+    return TemplateReadPlan(
+        metadata_path=metadata_file,
+        mtime_ns=metadata_file.stat().st_mtime_ns if mtime_ns is None else mtime_ns,
+        px_per_mm=float(px_per_mm),
+        inner_radius_factor=float(inner_radius_factor),
+        metadata=MappingProxyType(metadata),
+        bubbles=bubbles,
+        auxiliary_blocks=auxiliary_blocks,
+        page_size_px=_page_size_px(metadata=metadata, px_per_mm=px_per_mm),
+        metadata_binary_path=binary.path if binary is not None else None,
+    )
+
+
+def _refresh_metadata_binary(metadata_file: Path) -> None:
+    # Como __pycache__: el binario se regenera al compilar desde el JSON y la
+    # siguiente compilacion (otro worker, otro proceso) ya no parsea el JSON.
+    try:
+        write_metadata_binary(metadata_file)
+    except (MetadataBinaryError, OSError, ValueError) as exc:
+        logger.warning("OMR metadata binaria no regenerada | metadata=%s error=%r", metadata_file, exc)
+
+
+def _page_size_px(*, metadata: Mapping[str, Any], px_per_mm: float) -> tuple[int, int] | None:
+    page = metadata.get("page")
+    if not isinstance(page, dict):
+        return None
+    try:
+        width_mm = float(page["width_mm"])
+        height_mm = float(page["height_mm"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return int(round(width_mm * px_per_mm)), int(round(height_mm * px_per_mm))
+
+
+def clear_template_read_plan_cache() -> None:
+    with _plan_cache_lock:
+        _plan_cache.clear()
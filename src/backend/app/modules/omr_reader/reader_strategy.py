@@ -20,6 +20,8 @@ class OMRReadRequest:
     save_debug_artifacts: bool
     debug_base_name: str | None
     debug_output_dir: str
+    # Ruta de la foto subida: no cambia la lectura, la cache la usa como origen del resultado.
+    uploaded_image_path: str | None = None
 
 
 class OMRReadEngine(Protocol):
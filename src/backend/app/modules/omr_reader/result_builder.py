@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from datetime import datetime, timezone
 from typing import Any
 
@@ -9,7 +10,7 @@ from app.modules.omr_reader.errors import BubbleReadError, InvalidMetadataError
 
 def build_omr_read_result(
     *,
-    metadata: dict[str, Any],
+    metadata: Mapping[str, Any],
     bubble_results: list[BubbleReadResult],
     timestamp_iso: str | None = None,
 ) -> dict[str, Any]:
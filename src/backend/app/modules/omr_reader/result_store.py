@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import OMRBubbleRatio, OMRRead
+from app.db.session import SessionLocal
+
+QUESTIONS_BLOCK_ID = "questions"
+
+
+def store_omr_read(
+    db: Session,
+    *,
+    result: dict[str, Any],
+    uploaded_image_path: str | None = None,
+) -> int:
+    """Insert one read and all its bubble ratios; returns the new read id.
+
+    Ratios go in a single executemany insert. The caller owns the transaction.
+    """
+    read = build_omr_read_row(result=result, uploaded_image_path=uploaded_image_path)
+    db.add(read)
+    db.flush()
+
+    ratio_rows = build_bubble_ratio_rows(result=result, read_id=read.id)
+    if ratio_rows:
+        db.execute(insert(OMRBubbleRatio), ratio_rows)
+    return read.id
+
+
+def persist_omr_read(*, result: dict[str, Any], uploaded_image_path: str | None = None) -> int:
+    """Store one read in its own session and commit."""
+    with SessionLocal() as db:
+        read_id = store_omr_read(db, result=result, uploaded_image_path=uploaded_image_path)
+        db.commit()
+    return read_id
+
+
+def build_omr_read_row(*, result: dict[str, Any], uploaded_image_path: str | None = None) -> OMRRead:
+    summary = result.get("quality_summary", {})
+    diagnostics = result.get("diagnostics", {})
+    by_block = _auxiliary_blocks_by_id(result)
+    document_type = by_block.get("document_type", {}).get("selected", {})
+    questions = [item for item in result.get("questions", []) if isinstance(item, dict)]
+
+    return OMRRead(
+        template_id=str(result.get("template_id", "")),
+        template_version=_optional_str(result.get("version")),
+        exam_identifier=_optional_str(by_block.get("exam_identifier", {}).get("value")),
+        student_document_type=_optional_str(document_type.get("value") if isinstance(document_type, dict) else None),
+        student_document_number=_optional_str(by_block.get("student_identity_number", {}).get("value")),
+        reader_backend=_optional_str(diagnostics.get("reader_backend")),
+        read_at=_parse_timestamp(result.get("timestamp")),
+        uploaded_image_path=uploaded_image_path,
+        marked_options=int(summary.get("marked_options", 0)),
+        unmarked_options=int(summary.get("unmarked_options", 0)),
+        ambiguous_options=int(summary.get("ambiguous_options", 0)),
+        manual_review_required=any(item.get("ambiguous_options") for item in questions)
+        or any(block.get("manual_review_required") for block in by_block.values()),
+        answers={
+            str(item.get("question_number")): list(item.get("marked_options", []))
+            for item in questions
+        },
+    )
+
+
+def build_bubble_ratio_rows(*, result: dict[str, Any], read_id: int) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for question in result.get("questions", []):
+        if not isinstance(question, dict):
+            continue
+        for option in question.get("options", []):
+            if not isinstance(option, dict):
+                continue
+            rows.append(
+                {
+                    "read_id": read_id,
+                    "block_id": QUESTIONS_BLOCK_ID,
+                    "question_number": question.get("question_number"),
+                    "column_index": None,
+                    "row_index": question.get("row"),
+                    "option_label": _optional_str(option.get("label")),
+                    "state": _optional_str(option.get("state")),
+                    "fill_ratio": float(option.get("fill_ratio", 0.0)),
+                }
+            )
+
+    for block_id, block in _auxiliary_blocks_by_id(result).items():
+        if block.get("selection_mode") == "single_choice":
+            selected = block.get("selected", {})
+            columns = [(None, selected if isinstance(selected, dict) else {})]
+        else:
+            columns = [
+                (col.get("column_index"), col)
+                for col in block.get("columns", [])
+                if isinstance(col, dict)
+            ]
+        for column_index, column in columns:
+            for row, ratio in column.get("ratios_by_row", {}).items():
+                rows.append(
+                    {
+                        "read_id": read_id,
+                        "block_id": block_id,
+                        "question_number": None,
+                        "column_index": column_index,
+                        "row_index": int(row),
+                        "option_label": None,
+                        "state": None,
+                        "fill_ratio": float(ratio),
+                    }
+                )
+    return rows
+
+
+def _auxiliary_blocks_by_id(result: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    auxiliary = result.get("auxiliary", {})
+    blocks = auxiliary.get("blocks", []) if isinstance(auxiliary, dict) else []
+    return {str(item.get("block_id")): item for item in blocks if isinstance(item, dict)}
+
+
+def _optional_str(value: Any) -> str | None:
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return datetime.now(tz=timezone.utc)
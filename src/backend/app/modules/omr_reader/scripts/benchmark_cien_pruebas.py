@@ -2,7 +2,12 @@ from __future__ import annotations
 
 import argparse
 import json
-import random
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -10,24 +15,24 @@ from typing import Any
 import cv2
 import numpy as np
 
-from app.modules.omr_reader import (
-    align_image_to_template,
-    build_omr_read_result,
-    classify_bubbles,
-    load_local_read_input,
-)
+from app.modules.omr_reader.api_service import ClassicOMRReadEngine, resolve_backend_relative_path
+from app.modules.omr_reader.aruco_detectors import get_aruco_detector
 from app.modules.omr_reader.errors import OMRReadInputError
+from app.modules.omr_reader.read_plan import get_template_read_plan
+from app.modules.omr_reader.reader_strategy import OMRReadRequest
+from app.modules.scoring import answers_from_key, load_answer_key_json
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
-def _extract_answer_key(result_payload: dict[str, Any]) -> dict[int, list[str]]:
-    key: dict[int, list[str]] = {}
-    for question in result_payload.get("questions", []):
-        qn = int(question["question_number"])
-        marks = list(question.get("marked_options", []))
-        key[qn] = sorted(marks)
-    if not key:
-        raise ValueError("key json does not contain questions")
-    return key
+PX_PER_MM = 10.0
+STAGES = ("decode", "marker_detection", "warp", "binarize", "classify", "result_build", "auxiliary")
+PERCENTILES = (50, 95, 99)
+
+# Estado por proceso del benchmark (imagen base y rutas), cargado una vez por worker.
+_worker_state: dict[str, Any] = {}
 
 
 def _rotate_image(image: np.ndarray, angle: float) -> np.ndarray:
@@ -70,6 +75,248 @@ def _apply_variant(
     return result
 
 
+def _variant_augmentation(rng: np.random.Generator) -> dict[str, Any]:
+    return {
+        "angle_deg": round(float(rng.uniform(-15.0, 15.0)), 4),
+        "blur_kernel": int(rng.choice([1, 3, 5, 7])),
+        "noise_sigma": round(float(rng.uniform(0.0, 20.0)), 4),
+        "alpha": round(float(rng.uniform(0.82, 1.18)), 4),
+        "beta": round(float(rng.uniform(-30.0, 30.0)), 4),
+        "jpeg_quality": int(rng.integers(55, 97)),
+    }
+
+
+def _init_worker(
+    base_image_path: str,
+    metadata_path: str,
+    answer_key: dict[int, list[str]],
+    options: dict[str, Any],
+) -> None:
+    if options["workers"] > 1:
+        # Un hilo de OpenCV por proceso: el paralelismo lo aporta el pool.
+        cv2.setNumThreads(1)
+    base_image = cv2.imread(base_image_path, cv2.IMREAD_COLOR)
+    if base_image is None:
+        raise ValueError(f"no se pudo cargar imagen base: {base_image_path}")
+    plan = get_template_read_plan(resolve_backend_relative_path(metadata_path), px_per_mm=PX_PER_MM)
+    get_aruco_detector(plan.metadata["aruco_dictionary_name"])
+    _worker_state.update(
+        base_image=base_image,
+        metadata_path=metadata_path,
+        answer_key=answer_key,
+        options=options,
+    )
+
+
+def _run_variant(index: int) -> dict[str, Any]:
+    options = _worker_state["options"]
+    answer_key = _worker_state["answer_key"]
+    # Un generador por variante: la variante i es la misma sin importar el numero de workers.
+    rng = np.random.default_rng([options["seed"], index])
+    augment_start = time.perf_counter()
+    augmentation = _variant_augmentation(rng)
+    variant = _apply_variant(
+        _worker_state["base_image"],
+        angle_deg=augmentation["angle_deg"],
+        blur_kernel=augmentation["blur_kernel"],
+        noise_sigma=augmentation["noise_sigma"],
+        alpha=augmentation["alpha"],
+        beta=augmentation["beta"],
+        rng=rng,
+    )
+    ok, encoded = cv2.imencode(".jpg", variant, [int(cv2.IMWRITE_JPEG_QUALITY), augmentation["jpeg_quality"]])
+    if not ok:
+        raise ValueError(f"no se pudo codificar la variante {index}")
+    image_bytes = encoded.tobytes()
+    augment_ms = round((time.perf_counter() - augment_start) * 1000.0, 3)
+
+    file_name = f"foto_var_{index:03d}.jpg"
+    if options["write_artifacts"]:
+        (Path(options["variants_dir"]) / file_name).write_bytes(image_bytes)
+
+    row: dict[str, Any] = {
+        "index": index,
+        "file_name": file_name,
+        "augmentation": augmentation,
+        "status": "",
+        "accuracy": 0.0,
+        "exact_match": False,
+        "wrong_questions": [],
+        "error_reason": None,
+        "augment_ms": augment_ms,
+        "latency_ms": 0.0,
+        "stage_timings_ms": {},
+    }
+
+    request = _read_request(image_bytes)
+    start = time.perf_counter()
+    try:
+        result_payload = ClassicOMRReadEngine().read(request)
+    except OMRReadInputError as exc:
+        row["latency_ms"] = round((time.perf_counter() - start) * 1000.0, 3)
+        row["status"] = "pipeline_error"
+        row["error_reason"] = str(exc)
+        return row
+    row["latency_ms"] = round((time.perf_counter() - start) * 1000.0, 3)
+    row["stage_timings_ms"] = result_payload["diagnostics"]["stage_timings_ms"]
+    row["worker_peak_rss_mb"] = _peak_rss_mb()
+
+    if options["write_artifacts"]:
+        read_json_path = Path(options["reads_dir"]) / f"foto_var_{index:03d}_resultado.json"
+        read_json_path.write_text(
+            json.dumps(result_payload, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+    wrong_questions: list[dict[str, Any]] = []
+    predicted_map = {
+        int(item["question_number"]): sorted(item.get("marked_options", []))
+        for item in result_payload.get("questions", [])
+    }
+    for qn in sorted(answer_key.keys()):
+        expected = answer_key[qn]
+        predicted = predicted_map.get(qn, [])
+        if expected != predicted:
+            wrong_questions.append({"question_number": qn, "expected": expected, "predicted": predicted})
+
+    total_questions = len(answer_key)
+    correct = total_questions - len(wrong_questions)
+    row["accuracy"] = round(correct / total_questions if total_questions else 0.0, 6)
+    row["wrong_questions"] = wrong_questions
+    row["exact_match"] = len(wrong_questions) == 0
+    if row["exact_match"]:
+        row["status"] = "ok"
+    else:
+        row["status"] = "mismatch"
+        row["error_reason"] = f"{len(wrong_questions)} preguntas difieren de la clave"
+    return row
+
+
+def _read_request(image_bytes: bytes) -> OMRReadRequest:
+    options = _worker_state["options"]
+    return OMRReadRequest(
+        image_bytes=image_bytes,
+        metadata_path=_worker_state["metadata_path"],
+        px_per_mm=PX_PER_MM,
+        marked_threshold=options["marked_threshold"],
+        unmarked_threshold=options["unmarked_threshold"],
+        robust_mode=False,
+        save_debug_artifacts=False,
+        debug_base_name=None,
+        debug_output_dir="",
+    )
+
+
+def _warm_up(_: int) -> int:
+    # Lectura real de la imagen base (fuera de la medicion): calienta caches y
+    # rutas de OpenCV del worker. Devuelve el pid para saber que worker la hizo.
+    ok, encoded = cv2.imencode(".jpg", _worker_state["base_image"])
+    if not ok:
+        raise ValueError("no se pudo codificar la imagen base")
+    ClassicOMRReadEngine().read(_read_request(encoded.tobytes()))
+    return os.getpid()
+
+
+def _warm_up_pool(pool: ProcessPoolExecutor, workers: int, *, max_rounds: int = 10) -> None:
+    # Una lectura por worker y se esperan sus resultados; se repite la ronda
+    # hasta que todos los procesos hayan leido al menos una vez.
+    warmed: set[int] = set()
+    for _ in range(max_rounds):
+        warmed.update(pool.map(_warm_up, range(workers)))
+        if len(warmed) >= workers:
+            return
+    print(f"[WARN] calentamiento incompleto: {len(warmed)}/{workers} workers")
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss viene en KiB en Linux y en bytes en macOS.
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def _distribution(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    array = np.asarray(values, dtype=np.float64)
+    summary = {"mean": round(float(array.mean()), 3)}
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}"] = round(float(np.percentile(array, percentile)), 3)
+    summary["max"] = round(float(array.max()), 3)
+    return summary
+
+
+def _performance_summary(
+    rows: list[dict[str, Any]],
+    *,
+    wall_time_s: float,
+    workers: int,
+) -> dict[str, Any]:
+    read_rows = [row for row in rows if row["stage_timings_ms"]]
+    known_rss = [row["worker_peak_rss_mb"] for row in read_rows if row.get("worker_peak_rss_mb") is not None]
+    latencies = [row["latency_ms"] for row in rows]
+    return {
+        "workers": workers,
+        "wall_time_s": round(wall_time_s, 3),
+        # Extremo a extremo: incluye generar y codificar cada variante.
+        "throughput_images_per_s": round(len(rows) / wall_time_s, 3) if wall_time_s > 0 else 0.0,
+        # Lecturas que terminaron (sin error de pipeline) por segundo de reloj medido.
+        "completed_reads": len(read_rows),
+        "completed_reads_per_s": round(len(read_rows) / wall_time_s, 3) if wall_time_s > 0 else 0.0,
+        "augment_ms": _distribution([row["augment_ms"] for row in rows]),
+        "latency_ms": _distribution(latencies),
+        "stages_ms": {
+            stage: _distribution([row["stage_timings_ms"].get(stage, 0.0) for row in read_rows])
+            for stage in STAGES
+        },
+        "peak_rss_mb": {
+            "parent": _peak_rss_mb(),
+            "worker_max": max(known_rss) if known_rss else None,
+        },
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def _print_baseline_diff(current: dict[str, Any], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    before = baseline.get("performance", {})
+    after = current["performance"]
+
+    def _line(label: str, old: float | None, new: float | None) -> None:
+        if old is None or new is None:
+            return
+        change = ((new - old) / old * 100.0) if old else 0.0
+        print(f"  {label:<32} {old:>10.3f} -> {new:>10.3f} ({change:+.1f}%)")
+
+    print(f"[DIFF] contra {baseline_path} (commit {baseline.get('git_commit')})")
+    _line("throughput_images_per_s", before.get("throughput_images_per_s"), after["throughput_images_per_s"])
+    _line("completed_reads_per_s", before.get("completed_reads_per_s"), after["completed_reads_per_s"])
+    for key in ("p50", "p95", "p99"):
+        _line(f"latency_ms.{key}", before.get("latency_ms", {}).get(key), after["latency_ms"].get(key))
+    for stage in STAGES:
+        _line(
+            f"{stage}.p50",
+            before.get("stages_ms", {}).get(stage, {}).get("p50"),
+            after["stages_ms"][stage].get("p50"),
+        )
+    _line("accuracy.avg", baseline.get("summary", {}).get("avg_accuracy"), current["summary"]["avg_accuracy"])
+
+
 def _build_html_report(report_payload: dict[str, Any]) -> str:
     rows_html: list[str] = []
     for item in report_payload["results"]:
@@ -82,11 +329,19 @@ def _build_html_report(report_payload: dict[str, Any]) -> str:
             f"<td>{item['accuracy']:.4f}</td>"
             f"<td>{'SI' if item['exact_match'] else 'NO'}</td>"
             f"<td>{wrong_count}</td>"
+            f"<td>{item['latency_ms']:.1f}</td>"
             f"<td>{item.get('error_reason', '-')}</td>"
             "</tr>"
         )
 
     summary = report_payload["summary"]
+    performance = report_payload["performance"]
+    latency = performance["latency_ms"]
+    stage_rows = "".join(
+        f"<tr><td>{stage}</td><td>{values.get('p50', 0.0):.2f}</td>"
+        f"<td>{values.get('p95', 0.0):.2f}</td><td>{values.get('p99', 0.0):.2f}</td></tr>"
+        for stage, values in performance["stages_ms"].items()
+    )
     return f"""<!doctype html>
 <html lang="es">
 <head>
@@ -97,7 +352,7 @@ def _build_html_report(report_payload: dict[str, Any]) -> str:
     body {{ font-family: Arial, sans-serif; margin: 20px; background: #f5f7fa; color: #1f2937; }}
     h1 {{ margin-bottom: 8px; }}
     .summary {{ background: #fff; border: 1px solid #d1d5db; padding: 12px; border-radius: 8px; margin-bottom: 16px; }}
-    table {{ width: 100%; border-collapse: collapse; background: #fff; border: 1px solid #d1d5db; }}
+    table {{ width: 100%; border-collapse: collapse; background: #fff; border: 1px solid #d1d5db; margin-bottom: 16px; }}
     th, td {{ border: 1px solid #e5e7eb; padding: 8px; text-align: left; font-size: 13px; }}
     th {{ background: #111827; color: #fff; position: sticky; top: 0; }}
     tr:nth-child(even) {{ background: #f9fafb; }}
@@ -106,7 +361,7 @@ def _build_html_report(report_payload: dict[str, Any]) -> str:
   </style>
 </head>
 <body>
-  <h1>Informe de pruebas OMR (100 variantes)</h1>
+  <h1>Informe de pruebas OMR ({summary['total_images']} variantes)</h1>
   <div class="summary">
     <div><strong>Generado:</strong> {report_payload['generated_at']}</div>
     <div><strong>Total:</strong> {summary['total_images']}</div>
@@ -115,7 +370,20 @@ def _build_html_report(report_payload: dict[str, Any]) -> str:
     <div><strong>Error de pipeline:</strong> <span class="bad">{summary['pipeline_errors']}</span></div>
     <div><strong>Exactitud promedio por pregunta:</strong> {summary['avg_accuracy']:.4f}</div>
     <div><strong>Exactitud minima por imagen:</strong> {summary['min_accuracy']:.4f}</div>
+    <div><strong>Workers:</strong> {performance['workers']}</div>
+    <div><strong>Throughput:</strong> {performance['throughput_images_per_s']:.2f} imagenes/s
+      (lecturas completadas: {performance['completed_reads_per_s']:.2f}/s)</div>
+    <div><strong>Latencia p50/p95/p99 (ms):</strong>
+      {latency.get('p50', 0.0):.1f} / {latency.get('p95', 0.0):.1f} / {latency.get('p99', 0.0):.1f}</div>
   </div>
+  <table>
+    <thead>
+      <tr><th>Etapa</th><th>p50 (ms)</th><th>p95 (ms)</th><th>p99 (ms)</th></tr>
+    </thead>
+    <tbody>
+      {stage_rows}
+    </tbody>
+  </table>
   <table>
     <thead>
       <tr>
@@ -125,6 +393,7 @@ def _build_html_report(report_payload: dict[str, Any]) -> str:
         <th>Exactitud</th>
         <th>Exacta</th>
         <th>Preguntas erradas</th>
+        <th>Latencia (ms)</th>
         <th>Motivo</th>
       </tr>
     </thead>
@@ -139,14 +408,14 @@ def _build_html_report(report_payload: dict[str, Any]) -> str:
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Genera 100 variantes de una foto OMR y evalua precision contra una clave."
+        description="Genera variantes de una foto OMR, las lee en paralelo y mide precision y rendimiento."
     )
     parser.add_argument("--base-image", required=True, help="Ruta de imagen base diligenciada")
     parser.add_argument("--metadata", required=True, help="Ruta metadata de plantilla")
     parser.add_argument(
         "--key-json",
         required=True,
-        help="Ruta JSON con respuestas validadas (questions[*].marked_options)",
+        help="Clave JSON: {\"answers\": {...}} o una lectura validada (questions[*].marked_options)",
     )
     parser.add_argument(
         "--output-dir",
@@ -155,11 +424,18 @@ def main() -> None:
     )
     parser.add_argument("--num-variants", type=int, default=100)
     parser.add_argument("--seed", type=int, default=23022026)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos lectores")
+    parser.add_argument("--marked-threshold", type=float, default=0.33)
+    parser.add_argument("--unmarked-threshold", type=float, default=0.18)
+    parser.add_argument(
+        "--write-artifacts",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Guardar JPEG de cada variante y JSON de cada lectura (--no-write-artifacts: solo memoria)",
+    )
+    parser.add_argument("--baseline", default=None, help="Resumen JSON de una corrida previa para comparar")
     args = parser.parse_args()
 
-    rng = np.random.default_rng(args.seed)
-    random.seed(args.seed)
-
     base_image_path = Path(args.base_image)
     metadata_path = Path(args.metadata)
     key_path = Path(args.key_json)
@@ -168,155 +444,76 @@ def main() -> None:
     results_dir = output_dir / "resultados"
     reads_dir = results_dir / "lecturas_json"
 
-    variants_dir.mkdir(parents=True, exist_ok=True)
-    reads_dir.mkdir(parents=True, exist_ok=True)
-
-    base_image = cv2.imread(str(base_image_path), cv2.IMREAD_COLOR)
-    if base_image is None:
-        raise ValueError(f"no se pudo cargar imagen base: {base_image_path}")
-
-    key_payload = json.loads(key_path.read_text(encoding="utf-8"))
-    answer_key = _extract_answer_key(key_payload)
-    total_questions = len(answer_key)
-
-    report_rows: list[dict[str, Any]] = []
-    exact_matches = 0
-    mismatches = 0
-    pipeline_errors = 0
-    accuracies: list[float] = []
-
-    for i in range(1, args.num_variants + 1):
-        angle = float(rng.uniform(-15.0, 15.0))
-        blur_kernel = random.choice([1, 3, 5, 7])
-        noise_sigma = float(rng.uniform(0.0, 20.0))
-        alpha = float(rng.uniform(0.82, 1.18))
-        beta = float(rng.uniform(-30.0, 30.0))
-        jpeg_quality = int(rng.integers(55, 97))
-
-        variant = _apply_variant(
-            base_image,
-            angle_deg=angle,
-            blur_kernel=blur_kernel,
-            noise_sigma=noise_sigma,
-            alpha=alpha,
-            beta=beta,
-            rng=rng,
-        )
-
-        file_name = f"foto_var_{i:03d}.jpg"
-        variant_path = variants_dir / file_name
-        cv2.imwrite(
-            str(variant_path),
-            variant,
-            [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality],
-        )
-
-        row: dict[str, Any] = {
-            "index": i,
-            "file_name": file_name,
-            "augmentation": {
-                "angle_deg": round(angle, 4),
-                "blur_kernel": blur_kernel,
-                "noise_sigma": round(noise_sigma, 4),
-                "alpha": round(alpha, 4),
-                "beta": round(beta, 4),
-                "jpeg_quality": jpeg_quality,
-            },
-            "status": "",
-            "accuracy": 0.0,
-            "exact_match": False,
-            "wrong_questions": [],
-            "error_reason": None,
-        }
-
-        try:
-            context = load_local_read_input(
-                image_path=str(variant_path),
-                metadata_path=str(metadata_path),
-            )
-            aligned = align_image_to_template(
-                image=context.image,
-                metadata=context.metadata,
-                px_per_mm=10.0,
-            )
-            bubbles = classify_bubbles(
-                aligned_image=aligned.aligned_image,
-                metadata=context.metadata,
-                px_per_mm=10.0,
-                marked_threshold=0.33,
-                unmarked_threshold=0.18,
-            )
-            result_payload = build_omr_read_result(
-                metadata=context.metadata,
-                bubble_results=bubbles,
-            )
-
-            read_json_path = reads_dir / f"foto_var_{i:03d}_resultado.json"
-            read_json_path.write_text(
-                json.dumps(result_payload, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
-
-            wrong_questions: list[dict[str, Any]] = []
-            predicted_map = {
-                int(item["question_number"]): sorted(item.get("marked_options", []))
-                for item in result_payload.get("questions", [])
-            }
-            for qn in sorted(answer_key.keys()):
-                expected = answer_key[qn]
-                predicted = predicted_map.get(qn, [])
-                if expected != predicted:
-                    wrong_questions.append(
-                        {
-                            "question_number": qn,
-                            "expected": expected,
-                            "predicted": predicted,
-                        }
-                    )
-
-            correct = total_questions - len(wrong_questions)
-            accuracy = correct / total_questions if total_questions else 0.0
-            accuracies.append(accuracy)
-
-            row["accuracy"] = round(accuracy, 6)
-            row["wrong_questions"] = wrong_questions
-            row["exact_match"] = len(wrong_questions) == 0
-            if row["exact_match"]:
-                row["status"] = "ok"
-                exact_matches += 1
-            else:
-                row["status"] = "mismatch"
-                row["error_reason"] = (
-                    f"{len(wrong_questions)} preguntas difieren de la clave"
-                )
-                mismatches += 1
-
-        except OMRReadInputError as exc:
-            row["status"] = "pipeline_error"
-            row["error_reason"] = str(exc)
-            row["accuracy"] = 0.0
-            accuracies.append(0.0)
-            pipeline_errors += 1
-
-        report_rows.append(row)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    if args.write_artifacts:
+        variants_dir.mkdir(parents=True, exist_ok=True)
+        reads_dir.mkdir(parents=True, exist_ok=True)
 
+    answer_key = answers_from_key(load_answer_key_json(key_path))
+    workers = max(1, args.workers)
+    options = {
+        "seed": args.seed,
+        "workers": workers,
+        "marked_threshold": args.marked_threshold,
+        "unmarked_threshold": args.unmarked_threshold,
+        "write_artifacts": args.write_artifacts,
+        "variants_dir": str(variants_dir),
+        "reads_dir": str(reads_dir),
+    }
+    init_args = (str(base_image_path), str(metadata_path), answer_key, options)
+    indices = list(range(1, args.num_variants + 1))
+
+    if workers == 1:
+        _init_worker(*init_args)
+        _warm_up(0)
+        start = time.perf_counter()
+        report_rows = [_run_variant(index) for index in indices]
+        wall_time_s = time.perf_counter() - start
+    else:
+        # `spawn` igual que el pool del servidor: cada worker arranca limpio y carga la plantilla una vez.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=init_args,
+        ) as pool:
+            # Calentamiento: todos los procesos arrancan y leen una vez antes de medir.
+            _warm_up_pool(pool, workers)
+            start = time.perf_counter()
+            report_rows = list(pool.map(_run_variant, indices))
+            wall_time_s = time.perf_counter() - start
+
+    accuracies = [row["accuracy"] for row in report_rows]
     summary = {
         "total_images": args.num_variants,
-        "exact_matches": exact_matches,
-        "mismatch_images": mismatches,
-        "pipeline_errors": pipeline_errors,
+        "exact_matches": sum(1 for row in report_rows if row["status"] == "ok"),
+        "mismatch_images": sum(1 for row in report_rows if row["status"] == "mismatch"),
+        "pipeline_errors": sum(1 for row in report_rows if row["status"] == "pipeline_error"),
         "avg_accuracy": float(sum(accuracies) / len(accuracies)) if accuracies else 0.0,
         "min_accuracy": float(min(accuracies)) if accuracies else 0.0,
     }
+    performance = _performance_summary(
+        report_rows,
+        wall_time_s=wall_time_s,
+        workers=workers,
+    )
 
-    report_payload = {
-        "generated_at": datetime.now(tz=timezone.utc).isoformat(),
+    # Resumen estable (sin fecha ni filas por imagen, llaves ordenadas) para comparar entre commits.
+    benchmark_summary = {
+        "git_commit": _git_commit(),
         "base_image": str(base_image_path),
         "metadata": str(metadata_path),
-        "key_json": str(key_path),
         "num_variants": args.num_variants,
         "seed": args.seed,
+        "thresholds": {"marked": args.marked_threshold, "unmarked": args.unmarked_threshold},
+        "write_artifacts": args.write_artifacts,
         "summary": summary,
+        "performance": performance,
+    }
+    report_payload = {
+        "generated_at": datetime.now(tz=timezone.utc).isoformat(),
+        **benchmark_summary,
+        "key_json": str(key_path),
         "results": report_rows,
     }
 
@@ -326,18 +523,39 @@ def main() -> None:
         encoding="utf-8",
     )
 
+    summary_json_path = results_dir / "resumen_rendimiento.json"
+    summary_json_path.write_text(
+        json.dumps(benchmark_summary, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
+
     report_html_path = results_dir / "reporte_cien_pruebas.html"
     report_html_path.write_text(_build_html_report(report_payload), encoding="utf-8")
 
+    latency = performance["latency_ms"]
     print("[OK] Benchmark completado")
-    print(f"  Variantes: {variants_dir}")
-    print(f"  Lecturas: {reads_dir}")
+    if args.write_artifacts:
+        print(f"  Variantes: {variants_dir}")
+        print(f"  Lecturas: {reads_dir}")
     print(f"  Reporte JSON: {report_json_path}")
+    print(f"  Resumen rendimiento: {summary_json_path}")
     print(f"  Reporte HTML: {report_html_path}")
     print(f"  Exactas: {summary['exact_matches']}/{summary['total_images']}")
     print(f"  Mismatch: {summary['mismatch_images']}")
     print(f"  Pipeline error: {summary['pipeline_errors']}")
     print(f"  Accuracy promedio: {summary['avg_accuracy']:.4f}")
+    print(
+        f"  Workers: {workers} | throughput: {performance['throughput_images_per_s']:.2f} img/s "
+        f"(lecturas completadas: {performance['completed_reads_per_s']:.2f}/s)"
+    )
+    print(
+        f"  Latencia ms p50/p95/p99: {latency.get('p50', 0.0):.1f} / "
+        f"{latency.get('p95', 0.0):.1f} / {latency.get('p99', 0.0):.1f}"
+    )
+    peak_rss = performance["peak_rss_mb"]
+    print(f"  Peak RSS MB (padre / worker max): {peak_rss['parent']} / {peak_rss['worker_max']}")
+    if args.baseline:
+        _print_baseline_diff(benchmark_summary, Path(args.baseline))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from app.modules.omr_reader.metadata_binary import MetadataBinaryError, read_metadata_binary, write_metadata_binary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compile metadata JSON files into their binary companions (.omrbin)"
+    )
+    parser.add_argument("--metadata", nargs="+", required=True, help="Metadata JSON paths")
+    args = parser.parse_args()
+
+    has_errors = False
+    for metadata_path in args.metadata:
+        try:
+            binary_path = write_metadata_binary(metadata_path)
+            binary = read_metadata_binary(binary_path)
+        except (MetadataBinaryError, OSError, json.JSONDecodeError) as exc:
+            has_errors = True
+            print(f"[ERROR] {metadata_path}: {exc}")
+            continue
+        print(f"[OK] {binary_path} ({len(binary.bubble_ids)} bubbles, sha256 {binary.json_sha256[:12]})")
+
+    if has_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
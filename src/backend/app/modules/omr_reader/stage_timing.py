@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class StageTimer:
+    """Accumulate wall-clock milliseconds per named pipeline stage.
+
+    Spans with the same name add up, so a stage run once per block (or per
+    retry) reports its total time for the read.
+    """
+
+    def __init__(self) -> None:
+        self._stages_ms: dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (perf_counter() - start) * 1000.0)
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        self._stages_ms[name] = self._stages_ms.get(name, 0.0) + elapsed_ms
+
+    def as_dict(self) -> dict[str, float]:
+        # Orden de ejecucion; milisegundos redondeados para el payload JSON.
+        return {name: round(elapsed_ms, 3) for name, elapsed_ms in self._stages_ms.items()}
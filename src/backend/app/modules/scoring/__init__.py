@@ -0,0 +1,19 @@
+from app.modules.scoring.answer_key import (
+    answer_key_from_items,
+    answers_from_key,
+    answers_from_result,
+    build_answer_key,
+    load_answer_key_json,
+)
+from app.modules.scoring.engine import encode_responses, report_to_payload, score_exam
+
+__all__ = [
+    "build_answer_key",
+    "answer_key_from_items",
+    "load_answer_key_json",
+    "answers_from_result",
+    "answers_from_key",
+    "encode_responses",
+    "score_exam",
+    "report_to_payload",
+]
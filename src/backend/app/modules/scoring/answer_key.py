@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.modules.scoring.contracts import AnswerKey
+from app.modules.scoring.errors import ScoringInputError
+
+DEFAULT_OPTION_LABELS = ("A", "B", "C", "D")
+
+
+def build_answer_key(
+    answers: Mapping[int, str | Sequence[str]],
+    *,
+    option_labels: Sequence[str] | None = None,
+) -> AnswerKey:
+    """Build a key from `{question_number: "A" | ["A", "C"]}`."""
+    if not answers:
+        raise ScoringInputError("answer key does not contain questions")
+
+    normalized: dict[int, tuple[str, ...]] = {}
+    for question_number, correct in answers.items():
+        labels = (correct,) if isinstance(correct, str) else tuple(correct)
+        normalized[_question_number(question_number)] = tuple(str(label).strip().upper() for label in labels if str(label).strip())
+
+    labels_in_key = sorted({label for labels in normalized.values() for label in labels})
+    option_order = tuple(option_labels) if option_labels is not None else DEFAULT_OPTION_LABELS
+    option_order = option_order + tuple(label for label in labels_in_key if label not in option_order)
+    option_index = {label: index for index, label in enumerate(option_order)}
+
+    question_numbers = tuple(sorted(normalized))
+    matrix = np.zeros((len(question_numbers), len(option_order)), dtype=bool)
+    for row, question_number in enumerate(question_numbers):
+        for label in normalized[question_number]:
+            matrix[row, option_index[label]] = True
+    matrix.setflags(write=False)
+    return AnswerKey(question_numbers=question_numbers, option_labels=option_order, matrix=matrix)
+
+
+def answer_key_from_items(
+    items: Iterable[Any],
+    *,
+    first_question_number: int = 1,
+) -> AnswerKey:
+    """Build a key from item-bank rows taken in exam order (`Item.correct_answer`)."""
+    answers: dict[int, str] = {}
+    option_labels: list[str] = []
+    for offset, item in enumerate(items):
+        answers[first_question_number + offset] = str(item.correct_answer)
+        for label in sorted(getattr(item, "options", None) or {}):
+            if label not in option_labels:
+                option_labels.append(label)
+    return build_answer_key(answers, option_labels=option_labels or None)
+
+
+def load_answer_key_json(path: str | Path) -> AnswerKey:
+    """Load a key JSON: either `{"answers": {"1": "A", ...}}` or a read result payload.
+
+    For read results (a marked reference sheet), the marked options of each
+    question are taken as its correct answers.
+    """
+    key_file = Path(path)
+    try:
+        payload = json.loads(key_file.read_text(encoding="utf-8"))
+    except FileNotFoundError as exc:
+        raise ScoringInputError(f"answer key file not found: '{key_file}'") from exc
+    except json.JSONDecodeError as exc:
+        raise ScoringInputError(f"answer key file is not valid JSON: '{key_file}'") from exc
+    if not isinstance(payload, dict):
+        raise ScoringInputError("answer key JSON must be an object")
+
+    option_labels = payload.get("option_labels")
+    if isinstance(payload.get("answers"), dict):
+        answers = {_question_number(question): value for question, value in payload["answers"].items()}
+    elif isinstance(payload.get("questions"), list):
+        answers = answers_from_result(payload)
+    else:
+        raise ScoringInputError("answer key JSON needs an 'answers' object or a 'questions' list")
+    return build_answer_key(answers, option_labels=option_labels)
+
+
+def answers_from_result(result: Mapping[str, Any]) -> dict[int, list[str]]:
+    """Return `{question_number: marked_options}` from an OMR read result payload."""
+    answers: dict[int, list[str]] = {}
+    for question in result.get("questions", []):
+        if not isinstance(question, dict) or question.get("question_number") is None:
+            continue
+        answers[_question_number(question["question_number"])] = sorted(question.get("marked_options", []))
+    return answers
+
+
+def answers_from_key(key: AnswerKey) -> dict[int, list[str]]:
+    """Return `{question_number: sorted correct labels}` for `key`."""
+    return {
+        question_number: sorted(label for label, correct in zip(key.option_labels, row) if correct)
+        for question_number, row in zip(key.question_numbers, key.matrix.tolist())
+    }
+
+
+def _question_number(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError) as exc:
+        raise ScoringInputError(f"question number must be an integer, got {value!r}") from exc
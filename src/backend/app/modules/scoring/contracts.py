@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """Correct options per question as a (questions x options) boolean matrix.
+
+    A question may accept several options; questions with no correct option
+    are kept in the layout but excluded from scoring.
+    """
+
+    question_numbers: tuple[int, ...]
+    option_labels: tuple[str, ...]
+    matrix: np.ndarray
+
+    @property
+    def num_questions(self) -> int:
+        return len(self.question_numbers)
+
+    @property
+    def scored_mask(self) -> np.ndarray:
+        return self.matrix.any(axis=1)
+
+
+@dataclass(frozen=True)
+class ExamScoreReport:
+    """Per-student scores and per-item statistics for one graded exam.
+
+    Item arrays are indexed like `question_numbers`; option arrays like
+    `option_labels`. Discrimination is the corrected point-biserial
+    correlation (item vs. rest score) and is NaN when undefined.
+    """
+
+    question_numbers: tuple[int, ...]
+    option_labels: tuple[str, ...]
+    num_students: int
+    num_scored_questions: int
+    student_scores: np.ndarray
+    student_correct: np.ndarray
+    item_difficulty: np.ndarray
+    item_discrimination: np.ndarray
+    option_counts: np.ndarray
+    blank_counts: np.ndarray
+    multi_mark_counts: np.ndarray
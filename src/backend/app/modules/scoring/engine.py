@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from itertools import islice
+from typing import Any
+
+import numpy as np
+
+from app.modules.scoring.contracts import AnswerKey, ExamScoreReport
+from app.modules.scoring.errors import ScoringInputError
+
+DEFAULT_CHUNK_SIZE = 2048
+
+StudentAnswers = Mapping[Any, Sequence[str]]
+
+
+def encode_responses(answers_batch: Sequence[StudentAnswers], key: AnswerKey) -> np.ndarray:
+    """Encode marked options as a (students x questions x options+1) boolean tensor.
+
+    The trailing option column flags marks on labels the key does not know,
+    so such answers never match the key. Question numbers may be int or str.
+    """
+    question_index = {question_number: index for index, question_number in enumerate(key.question_numbers)}
+    option_index = {label: index for index, label in enumerate(key.option_labels)}
+    unknown_option = len(key.option_labels)
+
+    # Se acumulan indices planos y se asignan de una vez (una sola escritura vectorizada).
+    # Recorrer cada marca en Python es inevitable: la entrada son dicts/listas de
+    # lecturas OMR, y este recorrido es O(marcas) con dos busquedas en dict por
+    # marca; la puntuacion posterior opera solo sobre el tensor.
+    stride_student = key.num_questions * (unknown_option + 1)
+    stride_question = unknown_option + 1
+    flat_indices: list[int] = []
+    for student, answers in enumerate(answers_batch):
+        base = student * stride_student
+        for question_number, marked in answers.items():
+            row = question_index.get(question_number)
+            if row is None:
+                try:
+                    row = question_index.get(int(question_number))
+                except (TypeError, ValueError):
+                    continue
+                if row is None:
+                    continue
+            row_base = base + row * stride_question
+            for label in marked:
+                column = option_index.get(label)
+                if column is None:
+                    column = option_index.get(str(label).strip().upper(), unknown_option)
+                flat_indices.append(row_base + column)
+
+    responses = np.zeros((len(answers_batch), key.num_questions, unknown_option + 1), dtype=bool)
+    responses.reshape(-1)[np.asarray(flat_indices, dtype=np.int64)] = True
+    return responses
+
+
+def score_exam(
+    answers_batch: Iterable[StudentAnswers],
+    key: AnswerKey,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> ExamScoreReport:
+    """Grade every student against `key` and compute classical item statistics.
+
+    A question is correct when the marked set equals the key set exactly.
+    Students are encoded `chunk_size` at a time, so peak memory is bounded by
+    one (chunk x questions x options) tensor plus the per-student results.
+    """
+    if chunk_size <= 0:
+        raise ScoringInputError("chunk_size must be > 0")
+
+    num_questions = key.num_questions
+    num_options = len(key.option_labels)
+    scored = key.scored_mask
+    # Columna extra en falso: una marca desconocida nunca coincide con la clave.
+    key_tensor = np.concatenate([key.matrix, np.zeros((num_questions, 1), dtype=bool)], axis=1)[None, :, :]
+
+    scores: list[np.ndarray] = []
+    correct_rows: list[np.ndarray] = []
+    option_counts = np.zeros((num_questions, num_options), dtype=np.int64)
+    blank_counts = np.zeros(num_questions, dtype=np.int64)
+    multi_mark_counts = np.zeros(num_questions, dtype=np.int64)
+    sum_x = np.zeros(num_questions, dtype=np.float64)
+    sum_xt = np.zeros(num_questions, dtype=np.float64)
+    sum_t = 0.0
+    sum_t2 = 0.0
+
+    for chunk in _chunked(answers_batch, chunk_size):
+        responses = encode_responses(chunk, key)
+        correct = np.all(responses == key_tensor, axis=2) & scored[None, :]
+        totals = correct.sum(axis=1, dtype=np.int64)
+        scores.append(totals)
+        correct_rows.append(correct)
+
+        marks_per_question = responses.sum(axis=2)
+        option_counts += responses[:, :, :num_options].sum(axis=0)
+        blank_counts += (marks_per_question == 0).sum(axis=0)
+        multi_mark_counts += (marks_per_question > 1).sum(axis=0)
+
+        x = correct.astype(np.float64)
+        t = totals.astype(np.float64)
+        sum_x += x.sum(axis=0)
+        sum_xt += x.T @ t
+        sum_t += float(t.sum())
+        sum_t2 += float(t @ t)
+
+    num_students = sum(len(item) for item in scores)
+    if num_students == 0:
+        raise ScoringInputError("no responses to score")
+
+    difficulty, discrimination = _item_statistics(
+        num_students=num_students,
+        sum_x=sum_x,
+        sum_xt=sum_xt,
+        sum_t=sum_t,
+        sum_t2=sum_t2,
+        scored=scored,
+    )
+    return ExamScoreReport(
+        question_numbers=key.question_numbers,
+        option_labels=key.option_labels,
+        num_students=num_students,
+        num_scored_questions=int(scored.sum()),
+        student_scores=np.concatenate(scores),
+        student_correct=np.concatenate(correct_rows),
+        item_difficulty=difficulty,
+        item_discrimination=discrimination,
+        option_counts=option_counts,
+        blank_counts=blank_counts,
+        multi_mark_counts=multi_mark_counts,
+    )
+
+
+def report_to_payload(report: ExamScoreReport) -> dict[str, Any]:
+    """Serialize a report to plain JSON types (NaN statistics become None)."""
+    scored_total = max(report.num_scored_questions, 1)
+    items = []
+    for index, question_number in enumerate(report.question_numbers):
+        items.append(
+            {
+                "question_number": question_number,
+                "difficulty": _finite_or_none(report.item_difficulty[index]),
+                "discrimination": _finite_or_none(report.item_discrimination[index]),
+                "option_counts": {
+                    label: int(report.option_counts[index, option])
+                    for option, label in enumerate(report.option_labels)
+                },
+                "blank_count": int(report.blank_counts[index]),
+                "multi_mark_count": int(report.multi_mark_counts[index]),
+            }
+        )
+    return {
+        "num_students": report.num_students,
+        "num_scored_questions": report.num_scored_questions,
+        "students": [
+            {"index": index, "score": int(score), "percent": round(100.0 * float(score) / scored_total, 2)}
+            for index, score in enumerate(report.student_scores)
+        ],
+        "items": items,
+    }
+
+
+def _item_statistics(
+    *,
+    num_students: int,
+    sum_x: np.ndarray,
+    sum_xt: np.ndarray,
+    sum_t: float,
+    sum_t2: float,
+    scored: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    n = float(num_students)
+    p = sum_x / n
+    # Puntaje resto r = t - x (x binario, x^2 = x) para no correlacionar el item consigo mismo.
+    mean_r = (sum_t - sum_x) / n
+    var_r = (sum_t2 - 2.0 * sum_xt + sum_x) / n - mean_r**2
+    cov_xr = (sum_xt - sum_x) / n - p * mean_r
+    denominator = np.sqrt(np.clip(p * (1.0 - p), 0.0, None) * np.clip(var_r, 0.0, None))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discrimination = np.where(denominator > 1e-12, cov_xr / denominator, np.nan)
+    difficulty = np.where(scored, p, np.nan)
+    discrimination = np.where(scored, discrimination, np.nan)
+    return difficulty, discrimination
+
+
+def _chunked(items: Iterable[StudentAnswers], size: int) -> Iterator[list[StudentAnswers]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _finite_or_none(value: float) -> float | None:
+    return round(float(value), 6) if np.isfinite(value) else None
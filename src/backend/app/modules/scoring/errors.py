@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+
+class ScoringInputError(Exception):
+    """Raised when an answer key or response batch cannot be graded."""
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 import cv2
+import numpy as np
 from PIL import Image
 from reportlab.lib.utils import ImageReader
 
@@ -11,16 +14,36 @@ def build_aruco_image_reader(
     marker_id: int,
     marker_pixels: int,
 ) -> ImageReader:
+    marker_img = build_aruco_marker_bitmap(
+        dictionary_name=dictionary_name,
+        marker_id=marker_id,
+        marker_pixels=marker_pixels,
+    )
+    return ImageReader(Image.fromarray(marker_img))
+
+
+def build_aruco_marker_bitmap(
+    *,
+    dictionary_name: str,
+    marker_id: int,
+    marker_pixels: int,
+) -> np.ndarray:
+    """Return the (read-only, shared) marker image for this dictionary and size."""
     if marker_pixels <= 0:
         raise ValueError("marker_pixels must be > 0")
-
-    aruco_module = cv2.aruco
-    if not hasattr(aruco_module, dictionary_name):
+    if not hasattr(cv2.aruco, dictionary_name):
         raise ValueError(f"unsupported aruco dictionary '{dictionary_name}'")
+    return _render_marker_bitmap(dictionary_name, int(marker_id), int(marker_pixels))
+
+
+@lru_cache(maxsize=256)
+def _render_marker_bitmap(dictionary_name: str, marker_id: int, marker_pixels: int) -> np.ndarray:
+    dictionary = _get_predefined_dictionary(dictionary_name)
+    marker_img = cv2.aruco.generateImageMarker(dictionary, marker_id, marker_pixels)
+    marker_img.flags.writeable = False
+    return marker_img
 
-    dictionary_code = getattr(aruco_module, dictionary_name)
-    dictionary = aruco_module.getPredefinedDictionary(dictionary_code)
-    marker_img = aruco_module.generateImageMarker(dictionary, marker_id, marker_pixels)
-    marker_img_pil = Image.fromarray(marker_img)
 
-    return ImageReader(marker_img_pil)
+@lru_cache(maxsize=32)
+def _get_predefined_dictionary(dictionary_name: str) -> cv2.aruco.Dictionary:
+    return cv2.aruco.getPredefinedDictionary(getattr(cv2.aruco, dictionary_name))
@@ -7,6 +7,7 @@ from app.modules.template_generator.contracts import (
     QuestionItem,
     QuestionNumberPlacement,
 )
+from app.modules.template_generator.geometry import UniformGridIndex
 
 
 def build_bubble_layout(
@@ -16,6 +17,9 @@ def build_bubble_layout(
     question_numbers: list[QuestionNumberPlacement] = []
     question_items_map: dict[tuple[str, int], QuestionItem] = {}
     used_ids: set[str] = set()
+    # Celdas del tamano del diametro mas grande: cada chequeo de solapamiento mira O(1) burbujas.
+    max_radius_mm = max((group.radius_mm for group in bubble_config.groups), default=1.0)
+    bubble_index: UniformGridIndex[BubblePlacement] = UniformGridIndex(cell_size_mm=2.0 * max_radius_mm)
 
     for group in bubble_config.groups:
         total_rows = group.num_questions if group.num_questions is not None else group.rows
@@ -35,7 +39,7 @@ def build_bubble_layout(
                     center_x_mm=center_x,
                     center_y_mm=center_y,
                     radius_mm=group.radius_mm,
-                    existing=bubbles,
+                    existing=bubble_index,
                     group_id=group.group_id,
                 )
 
@@ -73,6 +77,13 @@ def build_bubble_layout(
                     radius_mm=group.radius_mm,
                 )
                 bubbles.append(bubble)
+                bubble_index.insert(
+                    bubble,
+                    x_mm=center_x - group.radius_mm,
+                    y_mm=center_y - group.radius_mm,
+                    width_mm=2.0 * group.radius_mm,
+                    height_mm=2.0 * group.radius_mm,
+                )
                 if bubble_config.question_number_style.enabled:
                     question_items_map[(group.group_id, row)].options.append(bubble)
 
@@ -111,10 +122,16 @@ def _validate_bubble_not_overlapping_existing(
     center_x_mm: float,
     center_y_mm: float,
     radius_mm: float,
-    existing: list[BubblePlacement],
+    existing: UniformGridIndex[BubblePlacement],
     group_id: str,
 ) -> None:
-    for bubble in existing:
+    candidates = existing.candidates(
+        x_mm=center_x_mm - radius_mm,
+        y_mm=center_y_mm - radius_mm,
+        width_mm=2.0 * radius_mm,
+        height_mm=2.0 * radius_mm,
+    )
+    for bubble in candidates:
         dx = center_x_mm - bubble.center_x_mm
         dy = center_y_mm - bubble.center_y_mm
         min_distance = radius_mm + bubble.radius_mm
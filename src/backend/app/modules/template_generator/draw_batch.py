@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from collections import defaultdict
+
+from reportlab.lib.colors import Color
+from reportlab.pdfgen import canvas
+
+
+class DrawBatch:
+    """Collect repeated page primitives and emit them grouped by style.
+
+    Bubbles sharing radius and stroke width are drawn once as a form XObject
+    and placed by reference; strings sharing font, size and gray go through a
+    single text object instead of one font/color change per string.
+    """
+
+    def __init__(self, pdf: canvas.Canvas) -> None:
+        self.pdf = pdf
+        self._bubbles: dict[tuple[float, float], list[tuple[float, float]]] = defaultdict(list)
+        self._texts: dict[tuple[str, float, float], list[tuple[float, float, str]]] = defaultdict(list)
+
+    def bubble(self, x_pt: float, y_pt: float, radius_pt: float, *, line_width: float) -> None:
+        self._bubbles[(round(radius_pt, 3), round(line_width, 3))].append((x_pt, y_pt))
+
+    def text(self, x_pt: float, y_pt: float, value: str, *, font_name: str, font_size_pt: float, gray: float) -> None:
+        self._texts[(font_name, font_size_pt, gray)].append((x_pt, y_pt, value))
+
+    def centered_text(
+        self,
+        center_x_pt: float,
+        y_pt: float,
+        value: str,
+        *,
+        font_name: str,
+        font_size_pt: float,
+        gray: float,
+    ) -> None:
+        text_width = self.pdf.stringWidth(value, font_name, font_size_pt)
+        self.text(center_x_pt - (text_width / 2.0), y_pt, value, font_name=font_name, font_size_pt=font_size_pt, gray=gray)
+
+    def flush(self) -> None:
+        pdf = self.pdf
+        for (radius_pt, line_width), centers in self._bubbles.items():
+            form_name = _bubble_form(pdf, radius_pt=radius_pt, line_width=line_width)
+            for x_pt, y_pt in centers:
+                pdf.saveState()
+                pdf.translate(x_pt, y_pt)
+                pdf.doForm(form_name)
+                pdf.restoreState()
+
+        for (font_name, font_size_pt, gray), items in self._texts.items():
+            pdf.setFillColor(Color(gray, gray, gray))
+            text = pdf.beginText()
+            text.setFont(font_name, font_size_pt)
+            for x_pt, y_pt, value in items:
+                text.setTextOrigin(x_pt, y_pt)
+                text.textOut(value)
+            pdf.drawText(text)
+        pdf.setFillColorRGB(0, 0, 0)
+
+        self._bubbles.clear()
+        self._texts.clear()
+
+
+def _bubble_form(pdf: canvas.Canvas, *, radius_pt: float, line_width: float) -> str:
+    # Un formulario por (radio, grosor); se reutiliza en todas las paginas del documento.
+    name = f"bubble_{round(radius_pt * 1000)}_{round(line_width * 1000)}"
+    if not pdf.hasForm(name):
+        extent = radius_pt + line_width
+        pdf.beginForm(name, lowerx=-extent, lowery=-extent, upperx=extent, uppery=extent)
+        pdf.setLineWidth(line_width)
+        pdf.circle(0, 0, radius_pt, stroke=1, fill=0)
+        pdf.endForm()
+    return name
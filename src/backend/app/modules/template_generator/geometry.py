@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import math
+from collections import defaultdict
+from typing import Generic, TypeVar
+
 from app.modules.template_generator.contracts import BlockGeometry, PageConfig
 
+T = TypeVar("T")
+
 
 def compute_printable_area(page: PageConfig) -> BlockGeometry:
     return BlockGeometry(
@@ -41,3 +47,44 @@ def rectangles_overlap(a: BlockGeometry, b: BlockGeometry) -> bool:
     if b.y_mm + b.height_mm <= a.y_mm:
         return False
     return True
+
+
+class UniformGridIndex(Generic[T]):
+    """Uniform-grid spatial index over axis-aligned boxes (mm).
+
+    `candidates` returns the items whose box shares a grid cell with the query
+    box, in insertion order; callers still run their exact overlap test. With
+    a cell size close to the typical item size each query touches O(1) cells.
+    """
+
+    def __init__(self, cell_size_mm: float) -> None:
+        if cell_size_mm <= 0:
+            raise ValueError("cell_size_mm must be > 0")
+        self.cell_size_mm = cell_size_mm
+        self._cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self._items: list[T] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def insert(self, item: T, *, x_mm: float, y_mm: float, width_mm: float, height_mm: float) -> None:
+        index = len(self._items)
+        self._items.append(item)
+        for cell in self._cells_for(x_mm, y_mm, width_mm, height_mm):
+            self._cells[cell].append(index)
+
+    def candidates(self, *, x_mm: float, y_mm: float, width_mm: float, height_mm: float) -> list[T]:
+        indices: set[int] = set()
+        for cell in self._cells_for(x_mm, y_mm, width_mm, height_mm):
+            bucket = self._cells.get(cell)
+            if bucket:
+                indices.update(bucket)
+        return [self._items[index] for index in sorted(indices)]
+
+    def _cells_for(self, x_mm: float, y_mm: float, width_mm: float, height_mm: float) -> list[tuple[int, int]]:
+        size = self.cell_size_mm
+        min_col = math.floor(x_mm / size)
+        max_col = math.floor((x_mm + width_mm) / size)
+        min_row = math.floor(y_mm / size)
+        max_row = math.floor((y_mm + height_mm) / size)
+        return [(col, row) for col in range(min_col, max_col + 1) for row in range(min_row, max_row + 1)]
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import csv
+import math
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+from reportlab.lib.colors import Color
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from app.modules.template_generator.metadata_renderer import (
+    HeaderFieldSlot,
+    draw_metadata_page,
+    header_field_slots,
+    metadata_page_size_pt,
+    omr_block_grid,
+)
+
+STATIC_PAGE_FORM = "omr_static_page"
+STUDENT_TEXT_FONT_NAME = "Helvetica"
+STUDENT_TEXT_FONT_SIZE_PT = 8.0
+STUDENT_TEXT_COLOR = Color(0.1, 0.1, 0.2)
+ROSTER_CSV_COLUMNS = ("document_number", "document_type", "full_name", "group")
+
+
+@dataclass(frozen=True)
+class RosterStudent:
+    document_number: str
+    document_type: str | None = None
+    full_name: str | None = None
+    group: str | None = None
+
+
+@dataclass(frozen=True)
+class PrefilledBubble:
+    block_id: str
+    row: int
+    col: int
+    center_x_mm: float
+    center_y_mm: float
+    radius_mm: float
+
+
+def load_roster_csv(path: str | Path) -> list[RosterStudent]:
+    """Load students from a CSV with columns `document_number`, `document_type`, `full_name`, `group`."""
+    roster_path = Path(path)
+    with roster_path.open(encoding="utf-8-sig", newline="") as handle:
+        reader = csv.DictReader(handle)
+        if reader.fieldnames is None or "document_number" not in reader.fieldnames:
+            raise ValueError(f"roster CSV '{roster_path}' needs a 'document_number' column")
+        students = []
+        for row in reader:
+            values = {column: (row.get(column) or "").strip() for column in ROSTER_CSV_COLUMNS}
+            if not values["document_number"]:
+                continue
+            students.append(
+                RosterStudent(
+                    document_number=values["document_number"],
+                    document_type=values["document_type"] or None,
+                    full_name=values["full_name"] or None,
+                    group=values["group"] or None,
+                )
+            )
+    return students
+
+
+def render_roster_pdf(
+    *,
+    metadata: dict[str, Any],
+    students: Sequence[RosterStudent],
+    output_path: str | Path,
+    exam_identifier: str | None = None,
+    shard_size: int | None = None,
+    workers: int = 1,
+) -> list[Path]:
+    """Render one pre-filled answer sheet per student from a single layout.
+
+    The blank sheet is drawn once per PDF as a form XObject; each page only
+    references it and adds the student's bubbles and header text. Without
+    `shard_size` (and with one worker) a single multi-page PDF is written to
+    `output_path`; otherwise students are split into `<stem>_NNN.pdf` shards
+    rendered across `workers` processes. Returns the written paths.
+    """
+    if not students:
+        raise ValueError("roster does not contain students")
+    if shard_size is not None and shard_size <= 0:
+        raise ValueError("shard_size must be > 0")
+    # Validar todo el roster antes de lanzar procesos: un error no deja shards a medias.
+    for index, student in enumerate(students):
+        try:
+            resolve_prefilled_bubbles(metadata, student=student, exam_identifier=exam_identifier)
+        except ValueError as exc:
+            raise ValueError(f"roster row {index + 1}: {exc}") from exc
+
+    out_path = Path(output_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if workers > 1 and shard_size is None:
+        shard_size = math.ceil(len(students) / workers)
+    if shard_size is None or shard_size >= len(students):
+        _render_students_pdf(metadata, list(students), out_path, exam_identifier)
+        return [out_path]
+
+    shards = [list(students[start : start + shard_size]) for start in range(0, len(students), shard_size)]
+    shard_paths = [out_path.with_name(f"{out_path.stem}_{index:03d}{out_path.suffix}") for index in range(1, len(shards) + 1)]
+    if workers <= 1:
+        for shard, shard_path in zip(shards, shard_paths, strict=True):
+            _render_students_pdf(metadata, shard, shard_path, exam_identifier)
+        return shard_paths
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards)), mp_context=get_context("spawn")) as pool:
+        list(
+            pool.map(
+                _render_students_pdf,
+                [metadata] * len(shards),
+                shards,
+                shard_paths,
+                [exam_identifier] * len(shards),
+            )
+        )
+    return shard_paths
+
+
+def resolve_prefilled_bubbles(
+    metadata: dict[str, Any],
+    *,
+    student: RosterStudent,
+    exam_identifier: str | None = None,
+) -> list[PrefilledBubble]:
+    """Return the auxiliary bubbles to pre-fill for a student (document type, id, exam id)."""
+    values = {
+        "document_type": student.document_type,
+        "student_identity_number": student.document_number,
+        "exam_identifier": exam_identifier,
+    }
+    bubbles: list[PrefilledBubble] = []
+    for block in metadata.get("auxiliary_blocks", []):
+        block_id = str(block.get("block_id", ""))
+        value = values.get(block_id)
+        cfg = block.get("omr_config")
+        if value is None or str(block.get("block_type")) != "omr" or not isinstance(cfg, dict):
+            continue
+        grid = {(row, col): (cx, cy, radius) for row, col, cx, cy, radius in omr_block_grid(block)}
+        for row, col in _cells_for_value(block_id, cfg, str(value).strip().upper()):
+            cx, cy, radius = grid[(row, col)]
+            bubbles.append(PrefilledBubble(block_id, row, col, cx, cy, radius))
+    return bubbles
+
+
+def _cells_for_value(block_id: str, cfg: dict[str, Any], value: str) -> list[tuple[int, int]]:
+    row_labels = [str(label).upper() for label in cfg.get("row_labels") or []]
+    if cfg.get("selection_mode") == "single_choice":
+        if value not in row_labels:
+            raise ValueError(f"value '{value}' is not an option of block '{block_id}'")
+        return [(row_labels.index(value), 0)]
+
+    # single_per_column: un caracter por columna, alineado a la izquierda como lo lee el lector.
+    cols = int(cfg["cols"])
+    if len(value) > cols:
+        raise ValueError(f"value '{value}' does not fit block '{block_id}' ({cols} columns)")
+    cells = []
+    for col, char in enumerate(value):
+        if char not in row_labels:
+            raise ValueError(f"character '{char}' is not an option of block '{block_id}'")
+        cells.append((row_labels.index(char), col))
+    return cells
+
+
+def _render_students_pdf(
+    metadata: dict[str, Any],
+    students: list[RosterStudent],
+    output_path: Path,
+    exam_identifier: str | None,
+) -> Path:
+    page_height_mm = float(metadata["page"]["height_mm"])
+    pdf = canvas.Canvas(str(output_path), pagesize=metadata_page_size_pt(metadata))
+    pdf.setTitle(f"Roster {metadata.get('template_id')} v{metadata.get('version')}")
+
+    pdf.beginForm(STATIC_PAGE_FORM)
+    draw_metadata_page(pdf, metadata)
+    pdf.endForm()
+
+    header_slots = _header_slots(metadata)
+    for student in students:
+        pdf.doForm(STATIC_PAGE_FORM)
+        pdf.setFillColorRGB(0, 0, 0)
+        for bubble in resolve_prefilled_bubbles(metadata, student=student, exam_identifier=exam_identifier):
+            pdf.circle(
+                bubble.center_x_mm * mm,
+                (page_height_mm - bubble.center_y_mm) * mm,
+                bubble.radius_mm * mm,
+                stroke=0,
+                fill=1,
+            )
+        _draw_student_text(pdf, header_slots, student=student, page_height_mm=page_height_mm)
+        pdf.showPage()
+    pdf.save()
+    return output_path
+
+
+def _header_slots(metadata: dict[str, Any]) -> dict[str, HeaderFieldSlot]:
+    for block in metadata.get("auxiliary_blocks", []):
+        if str(block.get("block_id")) == "header":
+            return header_field_slots(
+                x_mm=float(block["x_mm"]),
+                y_mm=float(block["y_mm"]),
+                width_mm=float(block["width_mm"]),
+                height_mm=float(block["height_mm"]),
+            )
+    return {}
+
+
+def _draw_student_text(
+    pdf: canvas.Canvas,
+    header_slots: dict[str, HeaderFieldSlot],
+    *,
+    student: RosterStudent,
+    page_height_mm: float,
+) -> None:
+    fields = {
+        "NOMBRE": student.full_name,
+        "GRUPO": student.group,
+        "TIPO DE DOCUMENTO": student.document_type,
+        "NUMERO DE DOCUMENTO": student.document_number,
+    }
+    pdf.setFillColor(STUDENT_TEXT_COLOR)
+    pdf.setFont(STUDENT_TEXT_FONT_NAME, STUDENT_TEXT_FONT_SIZE_PT)
+    for label, value in fields.items():
+        slot = header_slots.get(label)
+        if slot is None or not value:
+            continue
+        pdf.drawString(
+            (slot.line_start_mm + 0.5) * mm,
+            (page_height_mm - slot.baseline_y_mm) * mm - (STUDENT_TEXT_FONT_SIZE_PT * 0.35),
+            value,
+        )
+    pdf.setFillColorRGB(0, 0, 0)
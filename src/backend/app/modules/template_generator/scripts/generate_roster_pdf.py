@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from app.modules.template_generator.roster_renderer import load_roster_csv, render_roster_pdf
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate one pre-filled answer sheet per student from metadata JSON and a roster CSV"
+    )
+    parser.add_argument("--metadata", required=True, help="Path to metadata JSON")
+    parser.add_argument("--roster", required=True, help="CSV with document_number, document_type, full_name, group")
+    parser.add_argument("--output", required=True, help="Output PDF path (shards get a _NNN suffix)")
+    parser.add_argument("--exam-identifier", default=None, help="Exam id pre-filled on every sheet")
+    parser.add_argument("--shard-size", type=int, default=None, help="Max pages per PDF")
+    parser.add_argument("--workers", type=int, default=1, help="Processes rendering shards in parallel")
+    args = parser.parse_args()
+
+    metadata = json.loads(Path(args.metadata).read_text(encoding="utf-8"))
+    students = load_roster_csv(args.roster)
+    start = time.perf_counter()
+    paths = render_roster_pdf(
+        metadata=metadata,
+        students=students,
+        output_path=Path(args.output),
+        exam_identifier=args.exam_identifier,
+        shard_size=args.shard_size,
+        workers=args.workers,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Roster PDF: {len(students)} sheets in {len(paths)} file(s), {elapsed:.2f}s")
+    for path in paths:
+        print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main()
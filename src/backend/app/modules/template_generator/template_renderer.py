@@ -8,11 +8,18 @@ from reportlab.pdfgen import canvas
 
 from app.modules.template_generator.aruco_assets import build_aruco_image_reader
 from app.modules.template_generator.contracts import TemplateLayout
+from app.modules.template_generator.draw_batch import DrawBatch
 
 PRINTABLE_AREA_COLOR = Color(0.78, 0.78, 0.78)
 
 
-def render_template_pdf(layout: TemplateLayout, output_path: str | Path) -> Path:
+STATIC_PAGE_FORM = "template_static_page"
+
+
+def render_template_pdf(layout: TemplateLayout, output_path: str | Path, *, copies: int = 1) -> Path:
+    """Render the template; with `copies` > 1 every page references one static form XObject."""
+    if copies <= 0:
+        raise ValueError("copies must be > 0")
     out_path = Path(output_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -22,15 +29,25 @@ def render_template_pdf(layout: TemplateLayout, output_path: str | Path) -> Path
     pdf = canvas.Canvas(str(out_path), pagesize=(page_width_pt, page_height_pt))
     pdf.setTitle(f"Template {layout.template_id} v{layout.version}")
 
+    pdf.beginForm(STATIC_PAGE_FORM)
+    draw_template_page(pdf, layout)
+    pdf.endForm()
+    for _ in range(copies):
+        pdf.doForm(STATIC_PAGE_FORM)
+        pdf.showPage()
+    pdf.save()
+    return out_path
+
+
+def draw_template_page(pdf: canvas.Canvas, layout: TemplateLayout) -> None:
+    """Draw the blank template on the current page (or form)."""
+    batch = DrawBatch(pdf)
     _draw_printable_area(pdf, layout)
     _draw_block(pdf, layout)
     _draw_markers(pdf, layout)
-    _draw_bubbles(pdf, layout)
-    _draw_question_numbers(pdf, layout)
-
-    pdf.showPage()
-    pdf.save()
-    return out_path
+    _draw_bubbles(batch, layout)
+    _draw_question_numbers(batch, layout)
+    batch.flush()
 
 
 def _draw_printable_area(pdf: canvas.Canvas, layout: TemplateLayout) -> None:
@@ -95,49 +112,34 @@ def _draw_markers(pdf: canvas.Canvas, layout: TemplateLayout) -> None:
         )
 
 
-def _draw_bubbles(pdf: canvas.Canvas, layout: TemplateLayout) -> None:
-    pdf.setLineWidth(0.7)
+def _draw_bubbles(batch: DrawBatch, layout: TemplateLayout) -> None:
+    style = layout.bubble_label_style
     for bubble in layout.bubbles:
-        pdf.circle(
+        center_y_pt = _invert_y(layout.page.height_mm, bubble.center_y_mm) * mm
+        batch.bubble(bubble.center_x_mm * mm, center_y_pt, bubble.radius_mm * mm, line_width=0.7)
+        batch.centered_text(
             bubble.center_x_mm * mm,
-            _invert_y(layout.page.height_mm, bubble.center_y_mm) * mm,
-            bubble.radius_mm * mm,
-            stroke=1,
-            fill=0,
+            center_y_pt - (style.font_size_pt * 0.35),
+            bubble.label,
+            font_name=style.font_name,
+            font_size_pt=style.font_size_pt,
+            gray=style.gray_level,
         )
-        _draw_bubble_label(pdf, layout, bubble)
-
-
-def _draw_bubble_label(pdf: canvas.Canvas, layout: TemplateLayout, bubble) -> None:
-    style = layout.bubble_label_style
-    gray = style.gray_level
-    pdf.setFillColor(Color(gray, gray, gray))
-    pdf.setFont(style.font_name, style.font_size_pt)
-    text_width = pdf.stringWidth(bubble.label, style.font_name, style.font_size_pt)
-    text_x = (bubble.center_x_mm * mm) - (text_width / 2.0)
-    text_y = _invert_y(layout.page.height_mm, bubble.center_y_mm) * mm - (
-        style.font_size_pt * 0.35
-    )
-    pdf.drawString(text_x, text_y, bubble.label)
-    pdf.setFillColorRGB(0, 0, 0)
 
 
-def _draw_question_numbers(pdf: canvas.Canvas, layout: TemplateLayout) -> None:
+def _draw_question_numbers(batch: DrawBatch, layout: TemplateLayout) -> None:
     style = layout.question_number_style
     if not style.enabled:
         return
-    gray = style.gray_level
-    pdf.setFillColor(Color(gray, gray, gray))
-    pdf.setFont(style.font_name, style.font_size_pt)
     for item in layout.question_numbers:
-        value = str(item.question_number)
-        text_width = pdf.stringWidth(value, style.font_name, style.font_size_pt)
-        text_x = (item.center_x_mm * mm) - (text_width / 2.0)
-        text_y = _invert_y(layout.page.height_mm, item.center_y_mm) * mm - (
-            style.font_size_pt * 0.35
+        batch.centered_text(
+            item.center_x_mm * mm,
+            _invert_y(layout.page.height_mm, item.center_y_mm) * mm - (style.font_size_pt * 0.35),
+            str(item.question_number),
+            font_name=style.font_name,
+            font_size_pt=style.font_size_pt,
+            gray=style.gray_level,
         )
-        pdf.drawString(text_x, text_y, value)
-    pdf.setFillColorRGB(0, 0, 0)
 
 
 def _invert_y(page_height_mm: float, y_mm: float) -> float:
@@ -55,3 +55,13 @@ class ItemRead(ItemBase):
     created_at: datetime
     updated_at: datetime
 
+
+class ItemImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class ItemImportResult(BaseModel):
+    imported: int
+    standards_created: int
+    competencies_created: int
@@ -0,0 +1,41 @@
+-- OMR read results (one row per sheet) and per-bubble fill ratios.
+
+CREATE TABLE IF NOT EXISTS omr_read (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    template_id VARCHAR(120) NOT NULL,
+    template_version VARCHAR(32),
+    exam_identifier VARCHAR(64),
+    student_document_type VARCHAR(16),
+    student_document_number VARCHAR(32),
+    reader_backend VARCHAR(16),
+    read_at DATETIME NOT NULL,
+    uploaded_image_path VARCHAR(512),
+    marked_options INTEGER NOT NULL DEFAULT 0,
+    unmarked_options INTEGER NOT NULL DEFAULT 0,
+    ambiguous_options INTEGER NOT NULL DEFAULT 0,
+    manual_review_required BOOLEAN NOT NULL DEFAULT 0,
+    answers JSON NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS omr_bubble_ratio (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    read_id INTEGER NOT NULL,
+    block_id VARCHAR(64) NOT NULL,
+    question_number INTEGER,
+    column_index INTEGER,
+    row_index INTEGER,
+    option_label VARCHAR(16),
+    state VARCHAR(16),
+    fill_ratio FLOAT NOT NULL,
+    CONSTRAINT fk_omr_bubble_ratio_read FOREIGN KEY (read_id) REFERENCES omr_read(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_omr_read_template_id ON omr_read(template_id);
+CREATE INDEX IF NOT EXISTS ix_omr_read_exam_identifier ON omr_read(exam_identifier);
+CREATE INDEX IF NOT EXISTS ix_omr_read_student_document_number ON omr_read(student_document_number);
+CREATE INDEX IF NOT EXISTS ix_omr_read_read_at ON omr_read(read_at);
+CREATE INDEX IF NOT EXISTS ix_omr_read_manual_review_required ON omr_read(manual_review_required);
+CREATE INDEX IF NOT EXISTS ix_omr_read_exam_student ON omr_read(exam_identifier, student_document_number);
+CREATE INDEX IF NOT EXISTS ix_omr_read_template_read_at ON omr_read(template_id, read_at);
+CREATE INDEX IF NOT EXISTS ix_omr_bubble_ratio_read_id ON omr_bubble_ratio(read_id);
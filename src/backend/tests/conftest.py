@@ -5,6 +5,33 @@ from pathlib import Path
 
 import pytest
 
+from app.db import init_db as init_db_module
+from app.db import session as session_module
+from app.modules.omr_reader.read_cache import reset_read_cache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_database(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # Ninguna prueba escribe en data/omr_app.db: el engine global apunta a una base temporal.
+    database_url = f"sqlite:///{tmp_path / 'omr_app_test.db'}"
+    engine = session_module.build_engine(database_url)
+    previous_bind = session_module.SessionLocal.kw["bind"]
+    monkeypatch.setattr(session_module.settings, "database_url", database_url)
+    monkeypatch.setattr(session_module, "engine", engine)
+    monkeypatch.setattr(init_db_module, "engine", engine)
+    session_module.SessionLocal.configure(bind=engine)
+    yield
+    session_module.SessionLocal.configure(bind=previous_bind)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_read_cache():
+    # Cada prueba parte sin lecturas cacheadas por pruebas anteriores.
+    reset_read_cache()
+    yield
+    reset_read_cache()
+
 
 @pytest.fixture
 def base_config_dict() -> dict:
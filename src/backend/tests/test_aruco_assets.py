@@ -3,7 +3,10 @@ from __future__ import annotations
 import pytest
 from reportlab.lib.utils import ImageReader
 
-from app.modules.template_generator.aruco_assets import build_aruco_image_reader
+from app.modules.template_generator.aruco_assets import (
+    build_aruco_image_reader,
+    build_aruco_marker_bitmap,
+)
 
 
 def test_build_aruco_image_reader_success() -> None:
@@ -23,3 +26,18 @@ def test_build_aruco_image_reader_invalid_dictionary() -> None:
             marker_id=1,
             marker_pixels=128,
         )
+
+
+def test_build_aruco_marker_bitmap_is_cached_and_read_only() -> None:
+    bitmap = build_aruco_marker_bitmap(
+        dictionary_name="DICT_4X4_50",
+        marker_id=2,
+        marker_pixels=96,
+    )
+
+    assert bitmap.shape == (96, 96)
+    assert not bitmap.flags.writeable
+    assert (
+        build_aruco_marker_bitmap(dictionary_name="DICT_4X4_50", marker_id=2, marker_pixels=96)
+        is bitmap
+    )
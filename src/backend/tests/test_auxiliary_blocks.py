@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import numpy as np
+
 from app.modules.omr_reader.contracts import BubbleReadResult
 from app.modules.omr_reader.auxiliary_blocks import read_auxiliary_blocks
 
@@ -46,11 +48,23 @@ def test_read_auxiliary_blocks_single_choice_and_single_per_column(monkeypatch)
         ]
     }
 
-    calls = {"count": 0}
+    calls = {"count": 0, "binary_maps": set()}
+    binary_inv = np.zeros((10, 10), dtype=np.uint8)
 
-    def fake_classify_bubbles(**kwargs):
+    def fake_classify_compiled_bubbles(**kwargs):
         calls["count"] += 1
-        bubbles = kwargs["metadata"]["bubbles"]
+        calls["binary_maps"].add(id(kwargs["binary_inv"]))
+        bubble_set = kwargs["bubble_set"]
+        bubbles = [
+            {
+                "bubble_id": bubble_id,
+                "group_id": bubble_set.group_ids[int(bubble_set.group_index[index])],
+                "row": int(bubble_set.rows[index]),
+                "col": int(bubble_set.cols[index]),
+                "label": bubble_set.labels[index],
+            }
+            for index, bubble_id in enumerate(bubble_set.bubble_ids)
+        ]
         block_id = bubbles[0]["group_id"]
 
         if block_id == "document_type":
@@ -90,20 +104,22 @@ def test_read_auxiliary_blocks_single_choice_and_single_per_column(monkeypatch)
         return out
 
     monkeypatch.setattr(
-        "app.modules.omr_reader.auxiliary_blocks.classify_bubbles",
-        fake_classify_bubbles,
+        "app.modules.omr_reader.auxiliary_blocks.classify_compiled_bubbles",
+        fake_classify_compiled_bubbles,
     )
 
     payload = read_auxiliary_blocks(
-        aligned_image=None,  # not used due monkeypatch
+        aligned_image=None,  # not used: binary map is provided
         metadata=metadata,
         px_per_mm=10.0,
         marked_threshold=0.12,
         unmarked_threshold=0.1,
         robust_mode=True,
+        binary_inv=binary_inv,
     )
 
     assert calls["count"] == 2
+    assert calls["binary_maps"] == {id(binary_inv)}
     assert payload["summary"]["total_blocks"] == 2
     assert payload["summary"]["manual_review_blocks"] == 1
 
@@ -91,6 +91,41 @@ def test_bubble_layout_rejects_overlapping_bubbles() -> None:
         build_bubble_layout(block, bubble_config)
 
 
+def test_bubble_layout_reports_overlap_across_groups_with_different_radii() -> None:
+    block = BlockGeometry(x_mm=0.0, y_mm=0.0, width_mm=200.0, height_mm=200.0)
+    bubble_config = BubbleConfig.model_validate(
+        {
+            "groups": [
+                {
+                    "group_id": "G01",
+                    "rows": 20,
+                    "cols": 4,
+                    "radius_mm": 2.0,
+                    "spacing_x_mm": 6.0,
+                    "spacing_y_mm": 6.0,
+                    "offset_x_mm": 10.0,
+                    "offset_y_mm": 10.0,
+                },
+                {
+                    "group_id": "G02",
+                    "rows": 1,
+                    "cols": 1,
+                    "radius_mm": 9.0,
+                    "spacing_x_mm": 20.0,
+                    "spacing_y_mm": 20.0,
+                    "offset_x_mm": 36.0,
+                    "offset_y_mm": 100.0,
+                    "question_start_number": 21,
+                },
+            ]
+        }
+    )
+
+    # G02 (radio 9) alcanza burbujas de G01 en filas 14-16; se reporta la primera colocada.
+    with pytest.raises(ValueError, match="bubble in group 'G02' overlaps bubble 'G01_14_03'"):
+        build_bubble_layout(block, bubble_config)
+
+
 def test_template_config_rejects_duplicate_bubble_group_ids(base_config_dict: dict) -> None:
     payload = dict(base_config_dict)
     payload["bubble_config"] = {
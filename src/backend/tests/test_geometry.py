@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 from app.modules.template_generator.contracts import BlockGeometry, PageConfig
-from app.modules.template_generator.geometry import compute_printable_area, is_rect_within_bounds
+from app.modules.template_generator.geometry import (
+    UniformGridIndex,
+    compute_printable_area,
+    is_rect_within_bounds,
+)
 
 
 def test_compute_printable_area() -> None:
@@ -29,3 +33,15 @@ def test_is_rect_within_bounds_true_and_false() -> None:
 
     assert is_rect_within_bounds(inside, bounds)
     assert not is_rect_within_bounds(outside, bounds)
+
+
+def test_uniform_grid_index_returns_nearby_items_in_insertion_order() -> None:
+    index: UniformGridIndex[str] = UniformGridIndex(cell_size_mm=4.0)
+    index.insert("far", x_mm=100.0, y_mm=100.0, width_mm=4.0, height_mm=4.0)
+    index.insert("wide", x_mm=0.0, y_mm=0.0, width_mm=20.0, height_mm=2.0)
+    index.insert("near", x_mm=9.0, y_mm=1.0, width_mm=4.0, height_mm=4.0)
+
+    assert len(index) == 3
+    assert index.candidates(x_mm=10.0, y_mm=0.5, width_mm=1.0, height_mm=1.0) == ["wide", "near"]
+    assert index.candidates(x_mm=50.0, y_mm=50.0, width_mm=4.0, height_mm=4.0) == []
+
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, func, select
 from sqlalchemy.orm import Session, sessionmaker
 
+from app.core.config import settings
+from app.db import session as session_module
 from app.db.base import Base
-from app.db.models import Teacher
-from app.db.session import get_db
+from app.db.models import Competency, Item, Standard, Teacher
+from app.db.session import ThreadpoolSessionRunner, get_db, get_db_runner
 from app.main import app
 
 
@@ -18,14 +22,14 @@ def _build_test_db(tmp_path: Path) -> sessionmaker:
     TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
     Base.metadata.create_all(bind=engine)
 
-    def override_get_db():
+    async def override_get_db_runner():
         db = TestingSessionLocal()
         try:
-            yield db
+            yield ThreadpoolSessionRunner(db)
         finally:
             db.close()
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_runner] = override_get_db_runner
     return TestingSessionLocal
 
 
@@ -103,3 +107,194 @@ def test_reject_item_with_incomplete_options(tmp_path: Path) -> None:
         assert response.status_code == 422
 
     app.dependency_overrides.clear()
+
+
+def _add_teacher(SessionLocal: sessionmaker, suffix: str) -> int:
+    with SessionLocal() as db:
+        teacher = Teacher(
+            external_uuid=f"teacher-{suffix}",
+            email=f"teacher{suffix}@example.com",
+            first_name="Katherine",
+            last_name="Johnson",
+        )
+        db.add(teacher)
+        db.commit()
+        return teacher.id
+
+
+def _item_line(teacher_id: int, index: int, **extra) -> str:
+    payload = {
+        "teacher_id": teacher_id,
+        "statement": f"Pregunta {index}",
+        "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+        "correct_answer": "C",
+        "subject": "matematicas" if index % 2 else "ciencias",
+        "curriculum": {"standard_code": f"STD-{index % 3}", "competency_code": f"COMP-{index % 2}"},
+    }
+    payload.update(extra)
+    return json.dumps(payload)
+
+
+def test_import_items_jsonl_in_one_transaction_and_page_by_key(tmp_path: Path) -> None:
+    SessionLocal = _build_test_db(tmp_path)
+    teacher_id = _add_teacher(SessionLocal, "003")
+    with SessionLocal() as db:
+        db.add(Standard(code="STD-0", name="Existente"))
+        db.commit()
+    content = "\n".join(_item_line(teacher_id, index) for index in range(30))
+
+    with TestClient(app) as client:
+        imported = client.post(
+            "/api/v1/items/import",
+            files={"file": ("items.jsonl", content.encode("utf-8"), "application/x-ndjson")},
+        )
+        assert imported.status_code == 201
+        assert imported.json() == {"imported": 30, "standards_created": 2, "competencies_created": 6}
+
+        first_page = client.get("/api/v1/items", params={"limit": 10, "subject": "matematicas"})
+        assert first_page.status_code == 200
+        assert len(first_page.json()) == 10
+        assert all(item["subject"] == "matematicas" for item in first_page.json())
+        cursor = first_page.headers["X-Next-After-Id"]
+
+        second_page = client.get("/api/v1/items", params={"limit": 10, "subject": "matematicas", "after_id": cursor})
+        assert len(second_page.json()) == 5
+        assert "X-Next-After-Id" not in second_page.headers
+        assert second_page.json()[0]["id"] > int(cursor)
+
+        by_standard = client.get("/api/v1/items", params={"standard_code": "STD-0", "competency_code": "COMP-1"})
+        assert {item["curriculum"]["standard_code"] for item in by_standard.json()} == {"STD-0"}
+        assert {item["curriculum"]["competency_code"] for item in by_standard.json()} == {"COMP-1"}
+        assert len(by_standard.json()) == 5
+
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(Standard)) == 3
+        assert db.scalar(select(func.count()).select_from(Competency)) == 6
+    app.dependency_overrides.clear()
+
+
+def test_list_items_loads_curriculum_without_per_row_queries(tmp_path: Path) -> None:
+    SessionLocal = _build_test_db(tmp_path)
+    teacher_id = _add_teacher(SessionLocal, "004")
+    content = "\n".join(_item_line(teacher_id, index) for index in range(20))
+    statements: list[str] = []
+
+    with TestClient(app) as client:
+        client.post("/api/v1/items/import", files={"file": ("items.jsonl", content.encode("utf-8"))})
+        engine = SessionLocal.kw["bind"]
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            listed = client.get("/api/v1/items")
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(listed.json()) == 20
+    assert len([sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]) == 1
+    app.dependency_overrides.clear()
+
+
+def test_import_items_csv_and_rejects_whole_file_on_errors(tmp_path: Path) -> None:
+    SessionLocal = _build_test_db(tmp_path)
+    teacher_id = _add_teacher(SessionLocal, "005")
+    header = "teacher_id,statement,option_a,option_b,option_c,option_d,correct_answer,subject,standard_code"
+    valid_csv = f"{header}\n{teacher_id},Uno,a,b,c,d,A,lenguaje,STD-L\n{teacher_id},Dos,a,b,c,d,D,,\n"
+    invalid_csv = f"{header}\n{teacher_id},Tres,a,b,c,d,A,,\n999,Cuatro,a,b,c,d,A,,\n{teacher_id},Cinco,a,b,,d,A,,\n"
+
+    with TestClient(app) as client:
+        imported = client.post("/api/v1/items/import", files={"file": ("items.csv", valid_csv.encode("utf-8"))})
+        assert imported.status_code == 201
+        assert imported.json()["imported"] == 2
+
+        rejected = client.post("/api/v1/items/import", files={"file": ("items.csv", invalid_csv.encode("utf-8"))})
+        assert rejected.status_code == 422
+        assert [error["line"] for error in rejected.json()["detail"]] == [3, 4]
+
+    with SessionLocal() as db:
+        statements = db.scalars(select(Item.statement).order_by(Item.id)).all()
+        assert statements == ["Uno", "Dos"]
+    app.dependency_overrides.clear()
+
+
+def test_import_items_rejects_non_utf8_and_oversized_files(tmp_path: Path, monkeypatch) -> None:
+    SessionLocal = _build_test_db(tmp_path)
+    teacher_id = _add_teacher(SessionLocal, "006")
+    header = "teacher_id,statement,option_a,option_b,option_c,option_d,correct_answer"
+    latin1_csv = f"{header}\n{teacher_id},Cancion,a,b,c,d,A\n".replace("Cancion", "Canci\u00f3n").encode("latin-1")
+    rows = "".join(_item_line(teacher_id, index) + "\n" for index in range(5))
+
+    with TestClient(app) as client:
+        not_utf8 = client.post("/api/v1/items/import", files={"file": ("items.csv", latin1_csv)})
+        assert not_utf8.status_code == 422
+        assert not_utf8.json()["detail"][0]["line"] == 0
+
+        monkeypatch.setattr(settings, "item_import_max_rows", 3)
+        too_many = client.post("/api/v1/items/import", files={"file": ("items.jsonl", rows.encode("utf-8"))})
+        assert too_many.status_code == 422
+        assert too_many.json()["detail"] == [{"line": 0, "detail": "import exceeds 3 items"}]
+
+        monkeypatch.setattr(settings, "item_import_max_bytes", 64)
+        too_large = client.post("/api/v1/items/import", files={"file": ("items.jsonl", rows.encode("utf-8"))})
+        assert too_large.status_code == 422
+        assert too_large.json()["detail"] == [{"line": 0, "detail": "import exceeds 64 bytes"}]
+
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count(Item.id))) == 0
+    app.dependency_overrides.clear()
+
+
+def test_items_endpoints_use_async_session_when_enabled(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("aiosqlite")
+    SessionLocal = _build_test_db(tmp_path)
+    with SessionLocal() as db:
+        teacher = Teacher(external_uuid="teacher-async", email="async@example.com", first_name="Ada", last_name="L")
+        db.add(teacher)
+        db.commit()
+        teacher_id = teacher.id
+
+    # Sin sesion sincrona ni threadpool: cualquier uso del camino sincrono fallaria.
+    app.dependency_overrides.pop(get_db_runner)
+
+    def _sync_session_used():
+        raise AssertionError("async mode must not open a sync session")
+
+    async def _threadpool_used(*_args, **_kwargs):
+        raise AssertionError("async mode must not use the threadpool")
+
+    app.dependency_overrides[get_db] = _sync_session_used
+    monkeypatch.setattr(session_module, "run_in_threadpool", _threadpool_used)
+    monkeypatch.setattr(session_module.settings, "database_async_enabled", True)
+    monkeypatch.setattr(
+        session_module.settings, "database_async_url", f"sqlite+aiosqlite:///{tmp_path / 'items_api_test.db'}"
+    )
+    monkeypatch.setattr(session_module, "_async_session_factory", None)
+    payload = {
+        "teacher_id": teacher_id,
+        "statement": "3 x 3 es:",
+        "options": {"A": "6", "B": "9", "C": "12", "D": "3"},
+        "correct_answer": "B",
+        "curriculum": {"standard_code": "STD-ASYNC", "competency_code": "COMP-ASYNC"},
+    }
+    try:
+        with TestClient(app) as client:
+            created = client.post("/api/v1/items", json=payload)
+            assert created.status_code == 201
+            assert created.json()["curriculum"]["competency_code"] == "COMP-ASYNC"
+
+            imported = client.post(
+                "/api/v1/items/import",
+                files={"file": ("items.jsonl", json.dumps(payload).encode("utf-8"), "application/x-ndjson")},
+            )
+            assert imported.status_code == 201
+            assert imported.json() == {"imported": 1, "standards_created": 0, "competencies_created": 0}
+
+            listed = client.get("/api/v1/items", params={"limit": 1})
+            assert listed.status_code == 200
+            assert listed.headers["X-Next-After-Id"] == str(created.json()["id"])
+            assert client.get(f"/api/v1/items/{created.json()['id']}").json()["statement"] == "3 x 3 es:"
+            assert client.get("/api/v1/items/999").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(Item)) == 2
@@ -8,7 +8,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.db.base import Base
 from app.db.models import Teacher
-from app.db.session import get_db
+from app.db.session import ThreadpoolSessionRunner, get_db_runner
 from app.main import app
 
 
@@ -18,14 +18,14 @@ def test_items_end_to_end_http(tmp_path: Path) -> None:
     testing_session_local = sessionmaker(bind=engine, autocommit=False, autoflush=False)
     Base.metadata.create_all(bind=engine)
 
-    def override_get_db():
+    async def override_get_db_runner():
         db = testing_session_local()
         try:
-            yield db
+            yield ThreadpoolSessionRunner(db)
         finally:
             db.close()
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_runner] = override_get_db_runner
 
     with testing_session_local() as db:
         teacher = Teacher(
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "omr_test_seconds",
+        "Test histogram.",
+        label_names=("stage",),
+        buckets=(0.01, 0.1),
+    )
+
+    histogram.observe(0.01, stage="decode")
+    histogram.observe(0.05, stage="decode")
+    histogram.observe(3.0, stage="decode")
+
+    assert registry.render().splitlines() == [
+        "# HELP omr_test_seconds Test histogram.",
+        "# TYPE omr_test_seconds histogram",
+        'omr_test_seconds_bucket{stage="decode",le="0.01"} 1',
+        'omr_test_seconds_bucket{stage="decode",le="0.1"} 2',
+        'omr_test_seconds_bucket{stage="decode",le="+Inf"} 3',
+        'omr_test_seconds_sum{stage="decode"} 3.06',
+        'omr_test_seconds_count{stage="decode"} 3',
+    ]
+
+
+def test_histogram_validates_labels_and_registry_names() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("omr_test_seconds", "Test histogram.", label_names=("stage",))
+
+    with pytest.raises(ValueError, match="expects labels"):
+        histogram.observe(0.1, backend="classic")
+    with pytest.raises(ValueError, match="already registered"):
+        registry.histogram("omr_test_seconds", "Duplicate.")
+
+
+def test_counter_and_gauge_render_current_values() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("omr_test_total", "Test counter.", label_names=("backend",))
+    depth = [3]
+    registry.gauge("omr_test_depth", "Test gauge.", callback=lambda: depth[0])
+
+    counter.inc(backend="classic")
+    counter.inc(2, backend="classic")
+    depth[0] = 5
+
+    assert registry.render().splitlines()[2:] == [
+        'omr_test_total{backend="classic"} 3.0',
+        "# HELP omr_test_depth Test gauge.",
+        "# TYPE omr_test_depth gauge",
+        "omr_test_depth 5.0",
+    ]
+    with pytest.raises(ValueError, match="can only increase"):
+        counter.inc(-1, backend="classic")
+
+
+def test_registry_reset_keeps_definitions() -> None:
+    registry = MetricsRegistry()
+    registry.histogram("omr_test_seconds", "Test histogram.").observe(0.2)
+
+    registry.reset()
+
+    assert registry.render().splitlines() == [
+        "# HELP omr_test_seconds Test histogram.",
+        "# TYPE omr_test_seconds histogram",
+    ]
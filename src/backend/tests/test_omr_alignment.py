@@ -4,8 +4,17 @@ import cv2
 import numpy as np
 import pytest
 
-from app.modules.omr_reader.alignment import align_image_to_template, _validate_capture_quality
-from app.modules.omr_reader.errors import ArucoDetectionError, CaptureQualityError, InvalidMetadataError
+from app.modules.omr_reader.alignment import (
+    _detect_marker_centers,
+    _validate_capture_quality,
+    align_image_to_template,
+)
+from app.modules.omr_reader.errors import (
+    ArucoDetectionError,
+    CaptureQualityError,
+    HomographyError,
+    InvalidMetadataError,
+)
 
 
 def _synthetic_metadata() -> dict:
@@ -74,6 +83,69 @@ def test_align_image_to_template_success() -> None:
     assert result.detected_marker_ids == [0, 1, 2, 3]
 
 
+def test_align_image_to_template_region_matches_full_page_crop() -> None:
+    image = _build_synthetic_aruco_image()
+    metadata = _synthetic_metadata()
+
+    full = align_image_to_template(image=image, metadata=metadata, px_per_mm=10.0)
+    region = align_image_to_template(
+        image=image,
+        metadata=metadata,
+        px_per_mm=10.0,
+        region_px=(-20, 150, 400, 700),
+    )
+
+    assert (region.origin_x_px, region.origin_y_px) == (0, 150)
+    assert (region.output_width_px, region.output_height_px) == (400, 550)
+    diff = np.abs(
+        region.aligned_image.astype(np.int16) - full.aligned_image[150:700, 0:400].astype(np.int16)
+    )
+    assert int(diff.max()) <= 1
+
+
+def test_align_image_to_template_fails_with_empty_region() -> None:
+    image = _build_synthetic_aruco_image()
+    metadata = _synthetic_metadata()
+
+    with pytest.raises(HomographyError, match="alignment region is empty"):
+        align_image_to_template(
+            image=image,
+            metadata=metadata,
+            px_per_mm=10.0,
+            region_px=(2000, 2000, 2100, 2100),
+        )
+
+
+def test_detect_marker_centers_downscaled_pass_matches_full_resolution() -> None:
+    image = cv2.resize(_build_synthetic_aruco_image(), (3000, 3600), interpolation=cv2.INTER_NEAREST)
+
+    full = _detect_marker_centers(image, "DICT_4X4_50")
+    coarse = _detect_marker_centers(
+        image,
+        "DICT_4X4_50",
+        required_ids={0, 1, 2, 3},
+        detection_max_side_px=900,
+    )
+
+    assert sorted(coarse) == [0, 1, 2, 3]
+    for marker_id, center in full.items():
+        assert float(np.linalg.norm(coarse[marker_id] - center)) < 1.0
+
+
+def test_detect_marker_centers_falls_back_to_full_resolution() -> None:
+    image = _build_synthetic_aruco_image()
+
+    # A 100 px los marcadores quedan de ~10 px y no se detectan en la pasada reducida.
+    centers = _detect_marker_centers(
+        image,
+        "DICT_4X4_50",
+        required_ids={0, 1, 2, 3},
+        detection_max_side_px=100,
+    )
+
+    assert sorted(centers) == [0, 1, 2, 3]
+
+
 def test_align_image_to_template_fails_without_markers() -> None:
     image = np.full((600, 600, 3), 255, dtype=np.uint8)
     metadata = _synthetic_metadata()
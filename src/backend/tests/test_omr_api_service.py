@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from pathlib import Path
 from types import SimpleNamespace
 
 import numpy as np
@@ -31,30 +32,42 @@ def test_resolve_backend_relative_path_blocks_escape() -> None:
         resolve_backend_relative_path("../../etc/passwd")
 
 
-def test_run_omr_read_from_image_bytes_orchestrates_pipeline(monkeypatch) -> None:
+def test_run_omr_read_from_image_bytes_orchestrates_pipeline(monkeypatch, tmp_path) -> None:
     fake_metadata = {"template_id": "template_test", "version": "v1"}
-    fake_image = np.zeros((10, 10, 3), dtype=np.uint8)
-    fake_aligned = SimpleNamespace(aligned_image=fake_image, detected_marker_ids=[0, 1, 2, 3])
+    fake_image = np.zeros((10, 10), dtype=np.uint8)
+    fake_aligned = SimpleNamespace(
+        aligned_image=fake_image,
+        detected_marker_ids=[0, 1, 2, 3],
+        origin_x_px=0,
+        origin_y_px=0,
+    )
     fake_bubbles = [SimpleNamespace(bubble_id="B1", state="marcada", fill_ratio=0.9)]
 
     monkeypatch.setattr(
         "app.modules.omr_reader.api_service.resolve_backend_relative_path",
-        lambda path_value: path_value,
+        lambda path_value: Path(path_value),
     )
     monkeypatch.setattr(
-        "app.modules.omr_reader.api_service.load_read_metadata",
-        lambda metadata_file: fake_metadata,
+        "app.modules.omr_reader.api_service.get_template_read_plan",
+        lambda metadata_file, px_per_mm: SimpleNamespace(
+            metadata=fake_metadata,
+            bubbles=None,
+            auxiliary_blocks=(),
+            page_size_px=(10, 10),
+        ),
     )
+    decode_calls = []
     monkeypatch.setattr(
         "app.modules.omr_reader.api_service.decode_image_bytes",
-        lambda image_bytes: fake_image,
+        lambda image_bytes, target_size_px, grayscale: decode_calls.append(grayscale) or fake_image,
     )
+    align_calls = []
     monkeypatch.setattr(
         "app.modules.omr_reader.api_service.align_image_to_template",
-        lambda **kwargs: fake_aligned,
+        lambda **kwargs: align_calls.append(kwargs) or fake_aligned,
     )
     monkeypatch.setattr(
-        "app.modules.omr_reader.api_service.classify_bubbles",
+        "app.modules.omr_reader.api_service.classify_compiled_bubbles",
         lambda **kwargs: fake_bubbles,
     )
     monkeypatch.setattr(
@@ -73,6 +86,9 @@ def test_run_omr_read_from_image_bytes_orchestrates_pipeline(monkeypatch) -> Non
         px_per_mm=10.0,
         marked_threshold=0.33,
         unmarked_threshold=0.18,
+        save_debug_artifacts=True,
+        debug_base_name="foto",
+        debug_output_dir=str(tmp_path),
     )
 
     assert payload["template_id"] == "template_test"
@@ -80,8 +96,21 @@ def test_run_omr_read_from_image_bytes_orchestrates_pipeline(monkeypatch) -> Non
     assert payload["diagnostics"]["detected_marker_ids"] == [0, 1, 2, 3]
     assert payload["diagnostics"]["robust_mode"] is False
     assert payload["diagnostics"]["reader_backend"] == "classic"
+    assert list(payload["diagnostics"]["stage_timings_ms"]) == [
+        "read_plan",
+        "decode",
+        "binarize",
+        "classify",
+        "result_build",
+        "auxiliary",
+    ]
     assert payload["thresholds"]["marked"] == 0.33
+    # Otsu global depende del histograma de la pagina completa: no se alinea solo una region.
+    assert align_calls[0].get("region_px") is None
     assert payload["thresholds"]["unmarked"] == 0.18
+    # Los artefactos de depuracion no obligan a decodificar en color.
+    assert decode_calls == [True]
+    assert Path(payload["diagnostics"]["debug_artifacts"]["aligned"]).exists()
 
 
 def test_resolve_reader_backend_rejects_unknown() -> None:
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+
+from app.modules.omr_reader.aruco_detectors import get_aruco_detector
+from app.modules.omr_reader.errors import ArucoDetectionError
+
+
+def test_get_aruco_detector_reuses_instance_per_dictionary_and_profile() -> None:
+    detector = get_aruco_detector("DICT_4X4_50", "default")
+
+    assert get_aruco_detector("DICT_4X4_50", "default") is detector
+    assert get_aruco_detector("DICT_4X4_50", "subpix") is not detector
+    assert get_aruco_detector("DICT_5X5_50", "default") is not detector
+
+
+def test_get_aruco_detector_uses_configured_profile(monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.modules.omr_reader.aruco_detectors.settings.omr_aruco_detector_profile",
+        "fast",
+    )
+
+    assert get_aruco_detector("DICT_4X4_50") is get_aruco_detector("DICT_4X4_50", "fast")
+
+
+def test_get_aruco_detector_rejects_unknown_dictionary_and_profile() -> None:
+    with pytest.raises(ArucoDetectionError, match="unsupported aruco dictionary"):
+        get_aruco_detector("DICT_FAKE", "default")
+    with pytest.raises(ArucoDetectionError, match="unsupported aruco detector profile"):
+        get_aruco_detector("DICT_4X4_50", "otro")
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import zipfile
+from concurrent.futures import Future
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints import omr_read
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.base import Base
+from app.db.models import OMRRead
+from app.main import app
+from app.modules.omr_reader.batch import BatchSheet, expand_batch_uploads, run_omr_batch
+from app.modules.omr_reader.errors import CaptureQualityError, InvalidBatchError, InvalidImageError
+
+
+def _png_bytes(value: int) -> bytes:
+    ok, encoded = cv2.imencode(".png", np.full((8, 8, 3), value, dtype=np.uint8))
+    assert ok
+    return encoded.tobytes()
+
+
+def _resolved(value: dict) -> Future:
+    future: Future = Future()
+    future.set_result(value)
+    return future
+
+
+def _zip_bytes(entries: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, payload in entries.items():
+            archive.writestr(name, payload)
+    return buffer.getvalue()
+
+
+def test_expand_batch_uploads_flattens_zip_and_multipage_tiff() -> None:
+    ok, tiff = cv2.imencodemulti(
+        ".tiff",
+        [np.full((8, 8, 3), 10, dtype=np.uint8), np.full((8, 8, 3), 20, dtype=np.uint8)],
+    )
+    assert ok
+    archive = _zip_bytes({"b.jpg": _png_bytes(1), "a.png": _png_bytes(2), "notes.txt": b"x"})
+
+    sheets = expand_batch_uploads(
+        [("foto.jpg", _png_bytes(3)), ("lote.zip", archive), ("scan.tiff", tiff.tobytes())],
+        max_sheets=10,
+    )
+
+    assert [sheet.source_name for sheet in sheets] == [
+        "foto.jpg",
+        "lote.zip/a.png",
+        "lote.zip/b.jpg",
+        "scan.tiff.page001.png",
+        "scan.tiff.page002.png",
+    ]
+    assert [sheet.index for sheet in sheets] == [0, 1, 2, 3, 4]
+
+
+def test_expand_batch_uploads_enforces_limits() -> None:
+    with pytest.raises(InvalidBatchError, match="maximum of 1 sheets"):
+        expand_batch_uploads([("a.jpg", b"1"), ("b.jpg", b"2")], max_sheets=1)
+    with pytest.raises(InvalidBatchError, match="does not contain any image"):
+        expand_batch_uploads([("vacio.zip", _zip_bytes({"notes.txt": b"x"}))], max_sheets=5)
+
+
+def test_expand_batch_uploads_rejects_oversized_entries_before_reading(monkeypatch) -> None:
+    # 5 MB de ceros comprimen a unos pocos KB: el limite mira el tamano descomprimido.
+    bomb = _zip_bytes({"bomba.png": b"\0" * 5_000_000})
+    opened = []
+    original_open = zipfile.ZipFile.open
+    monkeypatch.setattr(
+        zipfile.ZipFile,
+        "open",
+        lambda self, name, *args, **kwargs: opened.append(name) or original_open(self, name, *args, **kwargs),
+    )
+
+    with pytest.raises(InvalidBatchError, match="exceeds the maximum of 1000000 bytes per sheet"):
+        expand_batch_uploads([("lote.zip", bomb)], max_sheets=10, max_sheet_bytes=1_000_000)
+    assert opened == []
+
+    archive = _zip_bytes({f"{index}.png": b"x" * 400 for index in range(3)})
+    with pytest.raises(InvalidBatchError, match="maximum of 1000 bytes"):
+        expand_batch_uploads([("lote.zip", archive)], max_sheets=10, max_total_bytes=1000)
+
+
+def test_expand_batch_uploads_stops_reading_past_max_sheets(monkeypatch) -> None:
+    archive = _zip_bytes({f"{index:03d}.png": _png_bytes(index) for index in range(50)})
+    opened = []
+    original_open = zipfile.ZipFile.open
+    monkeypatch.setattr(
+        zipfile.ZipFile,
+        "open",
+        lambda self, name, *args, **kwargs: opened.append(name) or original_open(self, name, *args, **kwargs),
+    )
+
+    with pytest.raises(InvalidBatchError, match="maximum of 3 sheets"):
+        expand_batch_uploads([("lote.zip", archive)], max_sheets=3)
+    assert len(opened) == 4
+
+    decoded = []
+    original_decode = cv2.imdecodemulti
+    monkeypatch.setattr(
+        cv2,
+        "imdecodemulti",
+        lambda *args: decoded.append(args[-1]) or original_decode(*args),
+    )
+    ok, tiff = cv2.imencodemulti(".tiff", [np.full((8, 8, 3), value, dtype=np.uint8) for value in range(20)])
+    assert ok
+    with pytest.raises(InvalidBatchError, match="maximum of 3 sheets"):
+        expand_batch_uploads([("scan.tiff", tiff.tobytes())], max_sheets=3)
+    assert decoded == [(0, 1), (1, 2), (2, 3), (3, 4)]
+
+
+def test_run_omr_batch_isolates_sheet_errors_and_closes_with_summary() -> None:
+    sheets = [BatchSheet(index=i, source_name=f"s{i}.jpg", image_bytes=b"x") for i in range(3)]
+
+    def read_sheet(sheet: BatchSheet) -> dict:
+        if sheet.index == 1:
+            raise InvalidImageError("uploaded file is not a valid image (jpg/png)")
+        return {"sheet": sheet.index}
+
+    records = list(run_omr_batch(sheets=sheets, read_sheet=read_sheet, max_workers=2))
+
+    by_index = {item["index"]: item for item in records if item["type"] == "sheet"}
+    assert by_index[0]["status"] == "ok"
+    assert by_index[0]["result"] == {"sheet": 0}
+    assert by_index[1]["status"] == "error"
+    assert "not a valid image" in by_index[1]["error"]
+    assert records[-1]["type"] == "summary"
+    assert records[-1]["ok_sheets"] == 2
+    assert records[-1]["error_sheets"] == 1
+
+
+def test_read_batch_endpoint_streams_ndjson(tmp_path: Path, monkeypatch) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'reads.db'}")
+    Base.metadata.create_all(bind=engine)
+    testing_session_local = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    monkeypatch.setattr("app.modules.omr_reader.result_store.SessionLocal", testing_session_local)
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.omr_read.build_uploaded_image_path",
+        lambda original_filename: tmp_path / Path(original_filename).name,
+    )
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.omr_read.submit_classic_read",
+        lambda **kwargs: _resolved(
+            {
+                "template_id": "template_test",
+                "questions": [],
+                "auxiliary": {"blocks": []},
+                "diagnostics": {"reader_backend": "classic", "stage_timings_ms": {"decode": 1.5}},
+            }
+        ),
+    )
+    logged: list[str] = []
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.omr_read.log_read_result",
+        lambda **kwargs: logged.append(kwargs["uploaded_path"].name),
+    )
+    registry.reset()
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/omr/read-batch",
+            files=[
+                ("photos", ("a.png", _png_bytes(1), "image/png")),
+                ("photos", ("b.png", _png_bytes(2), "image/png")),
+            ],
+        )
+        metrics = client.get("/api/v1/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    sheets = [item for item in records if item["type"] == "sheet"]
+    assert sorted(item["source_name"] for item in sheets) == ["a.png", "b.png"]
+    assert all(item["result"]["diagnostics"]["reader_backend"] == "classic" for item in sheets)
+    assert records[-1]["total_sheets"] == 2
+    assert sorted(logged) == ["a.png", "b.png"]
+    stages = sheets[0]["result"]["diagnostics"]["stage_timings_ms"]
+    assert list(stages) == ["decode", "dispatch", "upload_queue", "persistence_queue"]
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'omr_stage_duration_seconds_count{backend="classic",stage="decode"} 2' in metrics.text
+    assert 'omr_read_duration_seconds_count{backend="classic"} 2' in metrics.text
+    # El lifespan vacia la cola de persistencia al cerrar la app.
+    assert (tmp_path / "a.png").read_bytes() == _png_bytes(1)
+    assert (tmp_path / "b.result.json").exists()
+    with testing_session_local() as db:
+        assert db.scalar(select(func.count()).select_from(OMRRead)) == 2
+
+
+def test_read_batch_endpoint_counts_failures_by_error_type(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.omr_read.build_uploaded_image_path",
+        lambda original_filename: tmp_path / Path(original_filename).name,
+    )
+
+    def failing_read(**kwargs) -> Future:
+        future: Future = Future()
+        future.set_exception(CaptureQualityError("capture area too small"))
+        return future
+
+    monkeypatch.setattr("app.api.v1.endpoints.omr_read.submit_classic_read", failing_read)
+    registry.reset()
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/omr/read-batch",
+            files=[("photos", ("a.png", _png_bytes(1), "image/png"))],
+        )
+        metrics = client.get("/api/v1/metrics")
+
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[-1])["error_sheets"] == 1
+    assert 'omr_read_failures_total{backend="classic",error_type="CaptureQualityError"} 1.0' in metrics.text
+    assert 'omr_reads_total{backend="classic",status="error"} 1.0' in metrics.text
+
+
+@pytest.mark.parametrize(
+    ("setting", "value", "message"),
+    [
+        ("omr_batch_max_sheets", 1, "maximum of 1 sheets"),
+        ("omr_batch_max_total_bytes", 100, "maximum of 100 bytes"),
+    ],
+)
+def test_read_batch_endpoint_rejects_oversized_uploads_before_reading(monkeypatch, setting, value, message) -> None:
+    reads = []
+    monkeypatch.setattr(settings, setting, value)
+    monkeypatch.setattr("app.api.v1.endpoints.omr_read.submit_classic_read", lambda **kwargs: reads.append(kwargs))
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/omr/read-batch",
+            files=[
+                ("photos", ("a.png", _png_bytes(1), "image/png")),
+                ("photos", ("b.png", _png_bytes(2), "image/png")),
+            ],
+        )
+
+    assert response.status_code == 400
+    assert message in response.json()["detail"]
+    assert reads == []
+
+
+def test_batch_uploads_without_declared_size_stop_at_the_byte_budget(monkeypatch) -> None:
+    class _Upload:
+        filename = "big.zip"
+        size = None
+
+        def __init__(self) -> None:
+            self.chunks_read = 0
+
+        async def read(self, size: int = -1) -> bytes:
+            self.chunks_read += 1
+            return b"x" * size
+
+    upload = _Upload()
+    monkeypatch.setattr(settings, "omr_batch_max_total_bytes", 10_000)
+    monkeypatch.setattr(omr_read, "UPLOAD_READ_CHUNK_BYTES", 4096)
+
+    with pytest.raises(InvalidBatchError, match="maximum of 10000 bytes"):
+        asyncio.run(omr_read._read_batch_uploads([upload]))
+    assert upload.chunks_read == 3
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import cv2
 import numpy as np
 import pytest
 
-from app.modules.omr_reader.bubble_classifier import classify_bubbles
-from app.modules.omr_reader.errors import InvalidMetadataError
+from app.modules.omr_reader.bubble_classifier import build_binary_map, classify_bubbles, compute_fill_ratios
+from app.modules.omr_reader.errors import BubbleReadError, InvalidMetadataError
 
 
 def _base_metadata() -> dict:
@@ -101,3 +102,45 @@ def test_classify_bubbles_fails_with_invalid_metadata() -> None:
 
     with pytest.raises(InvalidMetadataError, match="bubble metadata missing keys"):
         classify_bubbles(aligned_image=image, metadata=metadata, px_per_mm=10.0)
+
+
+def test_compute_fill_ratios_batches_mixed_radii_and_clips_borders() -> None:
+    binary_inv = np.zeros((100, 100), dtype=np.uint8)
+    binary_inv[:, :50] = 255
+
+    ratios = compute_fill_ratios(
+        binary_inv,
+        centers_px=np.array([[20, 20], [80, 80], [50, 50], [0, 0]]),
+        radii_px=np.array([5, 5, 10, 4]),
+    )
+
+    assert ratios[0] == pytest.approx(1.0)
+    assert ratios[1] == pytest.approx(0.0)
+    # Columna central x=50 queda en blanco: poco menos de la mitad del disco.
+    assert 0.4 < ratios[2] < 0.5
+    # Disco recortado en la esquina: solo cuentan los pixeles visibles.
+    assert ratios[3] == pytest.approx(1.0)
+
+
+def test_compute_fill_ratios_fails_outside_bounds() -> None:
+    binary_inv = np.zeros((50, 50), dtype=np.uint8)
+
+    with pytest.raises(BubbleReadError, match="outside aligned image bounds"):
+        compute_fill_ratios(
+            binary_inv,
+            centers_px=np.array([[200, 200]]),
+            radii_px=np.array([5]),
+        )
+
+
+@pytest.mark.parametrize("robust_mode", [False, True])
+def test_build_binary_map_accepts_grayscale_input(robust_mode: bool) -> None:
+    image = np.full((120, 160, 3), 235, dtype=np.uint8)
+    cv2.circle(image, (40, 60), 12, (20, 30, 40), -1)
+    cv2.circle(image, (110, 60), 12, (90, 90, 90), 2)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    from_bgr = build_binary_map(aligned_image=image, robust_mode=robust_mode)
+    from_gray = build_binary_map(aligned_image=gray, robust_mode=robust_mode)
+
+    assert np.array_equal(from_bgr, from_gray)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+
+from app.modules.omr_reader.errors import InvalidImageError
+from app.modules.omr_reader.image_decode import (
+    choose_decode_reduction,
+    decode_image_at_scale,
+    read_image_header_size,
+)
+
+
+def _encoded(ext: str, width: int, height: int) -> bytes:
+    image = np.full((height, width, 3), 200, dtype=np.uint8)
+    cv2.rectangle(image, (width // 4, height // 4), (width // 2, height // 2), (0, 0, 0), -1)
+    ok, encoded = cv2.imencode(ext, image)
+    assert ok
+    return encoded.tobytes()
+
+
+@pytest.mark.parametrize("ext", [".jpg", ".png"])
+def test_read_image_header_size_reads_dimensions_without_decoding(ext: str) -> None:
+    assert read_image_header_size(_encoded(ext, 320, 240)) == (320, 240)
+
+
+def test_read_image_header_size_returns_none_for_unknown_formats() -> None:
+    assert read_image_header_size(b"not an image") is None
+    assert read_image_header_size(b"\xff\xd8\xff") is None
+
+
+def test_choose_decode_reduction_keeps_both_sides_above_target() -> None:
+    assert choose_decode_reduction(source_size_px=(4000, 3000), target_size_px=(500, 700)) == 4
+    # La orientacion de la foto no cambia el factor.
+    assert choose_decode_reduction(source_size_px=(3000, 4000), target_size_px=(500, 700)) == 4
+    assert choose_decode_reduction(source_size_px=(4000, 3000), target_size_px=(500, 700), oversample=2.0) == 2
+    assert choose_decode_reduction(source_size_px=(4000, 3000), target_size_px=(2159, 2794)) == 1
+
+
+def test_decode_image_at_scale_reduces_oversized_jpeg_only() -> None:
+    jpeg = _encoded(".jpg", 1600, 1200)
+    png = _encoded(".png", 1600, 1200)
+
+    image, reduction = decode_image_at_scale(image_bytes=jpeg, target_size_px=(300, 400))
+    assert reduction == 4
+    assert image.shape == (300, 400, 3)
+
+    full, reduction = decode_image_at_scale(image_bytes=jpeg)
+    assert reduction == 1
+    assert full.shape == (1200, 1600, 3)
+
+    image, reduction = decode_image_at_scale(image_bytes=png, target_size_px=(300, 400))
+    assert reduction == 1
+    assert image.shape == (1200, 1600, 3)
+
+
+def test_decode_image_at_scale_can_decode_a_single_channel() -> None:
+    jpeg = _encoded(".jpg", 1600, 1200)
+
+    gray, reduction = decode_image_at_scale(image_bytes=jpeg, grayscale=True)
+    assert reduction == 1
+    assert gray.shape == (1200, 1600)
+
+    gray, reduction = decode_image_at_scale(image_bytes=jpeg, target_size_px=(300, 400), grayscale=True)
+    assert reduction == 4
+    assert gray.shape == (300, 400)
+
+
+def test_decode_image_at_scale_rejects_invalid_payloads() -> None:
+    with pytest.raises(InvalidImageError, match="empty"):
+        decode_image_at_scale(image_bytes=b"")
+    with pytest.raises(InvalidImageError, match="not a valid image"):
+        decode_image_at_scale(image_bytes=b"\xff\xd8garbage", target_size_px=(10, 10))
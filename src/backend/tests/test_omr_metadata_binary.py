@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.modules.omr_reader import read_plan as read_plan_module
+from app.modules.omr_reader.metadata_binary import (
+    BINARY_MAGIC,
+    MetadataBinaryError,
+    metadata_binary_path,
+    read_metadata_binary,
+    write_metadata_binary,
+)
+from app.modules.omr_reader.read_plan import clear_template_read_plan_cache, compile_template_read_plan
+
+METADATA_PATH = Path(__file__).resolve().parents[1] / "data" / "output" / "template_basica_omr_v2_wireframe.json"
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    clear_template_read_plan_cache()
+    yield
+    clear_template_read_plan_cache()
+
+
+def _copy_metadata(tmp_path: Path) -> Path:
+    metadata_file = tmp_path / "meta.json"
+    metadata_file.write_bytes(METADATA_PATH.read_bytes())
+    return metadata_file
+
+
+def test_binary_round_trip_keeps_geometry_metadata_and_checksum(tmp_path: Path) -> None:
+    metadata_file = _copy_metadata(tmp_path)
+    payload = json.loads(metadata_file.read_text(encoding="utf-8"))
+
+    binary = read_metadata_binary(write_metadata_binary(metadata_file))
+
+    assert binary.path == metadata_binary_path(metadata_file)
+    assert binary.json_sha256 == hashlib.sha256(metadata_file.read_bytes()).hexdigest()
+    assert binary.metadata == {key: value for key, value in payload.items() if key != "bubbles"}
+    by_id = {bubble["bubble_id"]: bubble for bubble in payload["bubbles"]}
+    assert set(binary.bubble_ids) == set(by_id)
+    for index, bubble_id in enumerate(binary.bubble_ids):
+        assert binary.center_x_mm[index] == by_id[bubble_id]["center_x_mm"]
+        assert binary.radius_mm[index] == by_id[bubble_id]["radius_mm"]
+        assert binary.labels[index] == by_id[bubble_id]["label"]
+    assert not binary.center_x_mm.flags.writeable
+
+
+def test_plan_from_fresh_binary_matches_json_without_parsing_it(tmp_path: Path, monkeypatch) -> None:
+    metadata_file = _copy_metadata(tmp_path)
+    monkeypatch.setattr(read_plan_module.settings, "omr_metadata_binary_enabled", False)
+    from_json = compile_template_read_plan(metadata_file, px_per_mm=10.0)
+
+    write_metadata_binary(metadata_file)
+    monkeypatch.setattr(read_plan_module.settings, "omr_metadata_binary_enabled", True)
+
+    def _json_parsed(*_args, **_kwargs):
+        raise AssertionError("a fresh binary must not parse the metadata JSON")
+
+    monkeypatch.setattr(read_plan_module, "load_read_metadata", _json_parsed)
+    from_binary = compile_template_read_plan(metadata_file, px_per_mm=10.0)
+
+    assert from_json.metadata_binary_path is None
+    assert from_binary.metadata_binary_path == metadata_binary_path(metadata_file)
+    assert dict(from_binary.metadata) == {key: value for key, value in from_json.metadata.items() if key != "bubbles"}
+    assert from_binary.bubbles.bubble_ids == from_json.bubbles.bubble_ids
+    assert from_binary.bubbles.labels == from_json.bubbles.labels
+    assert np.array_equal(from_binary.bubbles.group_index, from_json.bubbles.group_index)
+    assert np.array_equal(from_binary.bubbles.centers_px, from_json.bubbles.centers_px)
+    assert np.array_equal(from_binary.bubbles.inner_radii_px, from_json.bubbles.inner_radii_px)
+    assert from_binary.page_size_px == from_json.page_size_px
+
+
+def test_stale_binary_falls_back_to_json_and_is_regenerated(tmp_path: Path) -> None:
+    metadata_file = _copy_metadata(tmp_path)
+    write_metadata_binary(metadata_file)
+    payload = json.loads(metadata_file.read_text(encoding="utf-8"))
+    payload["version"] = "edited"
+    metadata_file.write_text(json.dumps(payload), encoding="utf-8")
+
+    stale = compile_template_read_plan(metadata_file, px_per_mm=10.0)
+    refreshed = compile_template_read_plan(metadata_file, px_per_mm=10.0)
+
+    assert stale.metadata_binary_path is None
+    assert stale.metadata["version"] == "edited"
+    assert refreshed.metadata_binary_path == metadata_binary_path(metadata_file)
+    assert refreshed.metadata["version"] == "edited"
+
+
+def test_corrupt_binary_falls_back_to_json(tmp_path: Path) -> None:
+    metadata_file = _copy_metadata(tmp_path)
+    binary_path = write_metadata_binary(metadata_file)
+    binary_path.write_bytes(binary_path.read_bytes()[:200])
+
+    with pytest.raises(MetadataBinaryError):
+        read_metadata_binary(binary_path)
+    plan = compile_template_read_plan(metadata_file, px_per_mm=10.0)
+
+    assert plan.metadata_binary_path is None
+    assert len(plan.bubbles) > 0
+
+
+def test_read_binary_rejects_foreign_or_newer_files(tmp_path: Path) -> None:
+    binary_path = write_metadata_binary(_copy_metadata(tmp_path))
+    raw = bytearray(binary_path.read_bytes())
+
+    foreign = tmp_path / "foreign.omrbin"
+    foreign.write_bytes(b"NOTMETA\x00" + bytes(raw[len(BINARY_MAGIC) :]))
+    with pytest.raises(MetadataBinaryError, match="not a binary metadata file"):
+        read_metadata_binary(foreign)
+
+    newer = tmp_path / "newer.omrbin"
+    raw[len(BINARY_MAGIC)] = 99
+    newer.write_bytes(bytes(raw))
+    with pytest.raises(MetadataBinaryError, match="unsupported version 99"):
+        read_metadata_binary(newer)
+
+
+def test_write_binary_rejects_incomplete_bubbles(tmp_path: Path) -> None:
+    metadata_file = tmp_path / "meta.json"
+    metadata_file.write_text(json.dumps({"bubbles": [{"bubble_id": "G01_00_00"}]}), encoding="utf-8")
+
+    with pytest.raises(MetadataBinaryError, match="missing keys"):
+        write_metadata_binary(metadata_file)
+    assert list(tmp_path.iterdir()) == [metadata_file]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from app.core.metrics import registry
+from app.modules.omr_reader.errors import ArucoDetectionError
+from app.modules.omr_reader.metrics import observe_read_failure, observe_read_result
+
+
+def test_observe_read_result_counts_questions_ambiguity_and_tokens() -> None:
+    registry.reset()
+
+    observe_read_result(
+        {
+            "questions": [
+                {"question_number": 1, "ambiguous_options": ["B"]},
+                {"question_number": 2, "ambiguous_options": []},
+            ],
+            "diagnostics": {
+                "reader_backend": "gemini",
+                "stage_timings_ms": {"llm_read": 1200.0},
+                "request_total_ms": 1500.0,
+                "gemini_usage": {"prompt_token_count": 900, "candidates_token_count": 40, "total_token_count": 940},
+            },
+        }
+    )
+    text = registry.render()
+
+    assert 'omr_reads_total{backend="gemini",status="ok"} 1.0' in text
+    assert 'omr_questions_total{backend="gemini"} 2.0' in text
+    assert 'omr_ambiguous_questions_total{backend="gemini"} 1.0' in text
+    assert 'omr_llm_tokens_total{backend="gemini",kind="input"} 900.0' in text
+    assert 'omr_llm_tokens_total{backend="gemini",kind="total"} 940.0' in text
+    assert 'omr_stage_duration_seconds_bucket{backend="gemini",stage="llm_read",le="2.5"} 1' in text
+    assert 'omr_read_duration_seconds_count{backend="gemini"} 1' in text
+
+
+def test_observe_read_failure_labels_error_type() -> None:
+    registry.reset()
+
+    observe_read_failure(backend="classic", error=ArucoDetectionError("no aruco markers"))
+    text = registry.render()
+
+    assert 'omr_reads_total{backend="classic",status="error"} 1.0' in text
+    assert 'omr_read_failures_total{backend="classic",error_type="ArucoDetectionError"} 1.0' in text
+    assert "omr_process_pool_pending_reads 0.0" in text
+    assert "omr_persistence_queue_depth" in text
+
+
+def test_observe_read_result_counts_cache_hits_without_tokens() -> None:
+    registry.reset()
+
+    observe_read_result(
+        {
+            "questions": [{"question_number": 1, "ambiguous_options": []}],
+            "diagnostics": {
+                "reader_backend": "gemini",
+                "read_cache": {"hit": True, "tier": "memory", "key": "abc"},
+                "stage_timings_ms": {"cache_lookup": 0.4},
+                "gemini_usage": {"prompt_token_count": 900, "total_token_count": 940},
+            },
+        }
+    )
+    text = registry.render()
+
+    assert 'omr_read_cache_lookups_total{backend="gemini",result="hit"} 1.0' in text
+    assert 'omr_questions_total{backend="gemini"} 1.0' in text
+    assert "omr_llm_tokens_total{" not in text
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.modules.omr_reader import persistence_queue
+from app.modules.omr_reader.persistence_queue import (
+    PersistenceQueue,
+    flush_persistence_queue,
+    shutdown_persistence_queue,
+    start_persistence_queue,
+    submit_persistence_job,
+)
+
+
+def _write_job(path: Path, text: str, calls: list[str] | None = None):
+    def job() -> list[Path]:
+        if calls is not None:
+            calls.append(threading.current_thread().name)
+        path.write_text(text, encoding="utf-8")
+        return [path]
+
+    return job
+
+
+def test_persistence_queue_writes_in_order_and_flushes(tmp_path: Path) -> None:
+    target = tmp_path / "trace.json"
+    writer = PersistenceQueue(max_size=8)
+    try:
+        for index in range(5):
+            writer.submit(_write_job(target, f"v{index}"))
+        writer.flush()
+        assert target.read_text(encoding="utf-8") == "v4"
+    finally:
+        writer.close()
+
+
+def test_persistence_queue_survives_failing_jobs(tmp_path: Path) -> None:
+    def failing_job() -> list[Path]:
+        raise OSError("disk full")
+
+    writer = PersistenceQueue(max_size=8)
+    try:
+        writer.submit(failing_job)
+        writer.submit(_write_job(tmp_path / "ok.csv", "ok"))
+        writer.flush()
+        assert (tmp_path / "ok.csv").read_text(encoding="utf-8") == "ok"
+    finally:
+        writer.close()
+
+
+def test_full_queue_drains_earlier_jobs_before_writing_inline(tmp_path: Path) -> None:
+    release = threading.Event()
+    order: list[str] = []
+
+    def job(name: str, wait: bool = False):
+        def run() -> list[Path]:
+            if wait:
+                release.wait(5)
+            order.append(name)
+            return []
+
+        return run
+
+    writer = PersistenceQueue(max_size=1, fsync=False, put_timeout_s=0.05)
+    try:
+        writer.submit(job("upload", wait=True))
+        # Espera a que el hilo tome el primer job para que el segundo ocupe la cola.
+        while writer.depth():
+            time.sleep(0.001)
+        writer.submit(job("trace"))
+        threading.Timer(0.2, release.set).start()
+        writer.submit(job("ratios"))
+        assert order == ["upload", "trace", "ratios"]
+    finally:
+        release.set()
+        writer.close()
+
+
+def test_submit_after_shutdown_writes_inline_without_a_new_queue(tmp_path: Path, monkeypatch, caplog) -> None:
+    monkeypatch.setattr(settings, "omr_persistence_mode", "async")
+    calls: list[str] = []
+    shutdown_persistence_queue()
+    try:
+        submit_persistence_job(_write_job(tmp_path / "late.jpg", "img", calls))
+    finally:
+        start_persistence_queue()
+
+    assert (tmp_path / "late.jpg").read_text(encoding="utf-8") == "img"
+    assert calls == [threading.current_thread().name]
+    assert persistence_queue._persistence_queue is None
+    assert "cola de persistencia cerrada" in caplog.text
+
+
+def test_submit_persistence_job_sync_mode_writes_before_returning(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "omr_persistence_mode", "sync")
+    calls: list[str] = []
+
+    submit_persistence_job(_write_job(tmp_path / "upload.jpg", "img", calls))
+
+    assert (tmp_path / "upload.jpg").read_text(encoding="utf-8") == "img"
+    assert calls == [threading.current_thread().name]
+    assert persistence_queue._persistence_queue is None
+
+
+def test_submit_persistence_job_async_mode_is_drained_on_shutdown(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "omr_persistence_mode", "async")
+    calls: list[str] = []
+    start_persistence_queue()
+    try:
+        submit_persistence_job(_write_job(tmp_path / "upload.jpg", "img", calls))
+        flush_persistence_queue()
+    finally:
+        shutdown_persistence_queue()
+
+    assert (tmp_path / "upload.jpg").read_text(encoding="utf-8") == "img"
+    assert calls == ["omr-persistence"]
+    assert persistence_queue._persistence_queue is None
+
+
+def test_read_photo_runs_inline_persistence_off_the_event_loop(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "omr_persistence_mode", "sync")
+    monkeypatch.setattr(settings, "omr_store_reads_in_db", False)
+    monkeypatch.setattr(settings, "omr_reader_backend", "classic")
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.omr_read.build_uploaded_image_path",
+        lambda original_filename: tmp_path / "foto.jpg",
+    )
+
+    async def fake_read(**kwargs) -> dict:
+        return {"template_id": "template_test", "questions": [], "diagnostics": {"reader_backend": "classic"}}
+
+    monkeypatch.setattr("app.api.v1.endpoints.omr_read.run_classic_read", fake_read)
+    on_event_loop: list[bool] = []
+
+    def recording_submit(job) -> None:
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        job()
+
+    monkeypatch.setattr("app.api.v1.endpoints.omr_read.submit_persistence_job", recording_submit)
+
+    with TestClient(app) as client:
+        response = client.post("/api/v1/omr/read-photo", files={"photo": ("foto.jpg", b"img", "image/jpeg")})
+
+    assert response.status_code == 200
+    # Subida + artefactos, ambos escritos en un hilo sin event loop.
+    assert on_event_loop == [False, False]
+    assert (tmp_path / "foto.jpg").read_bytes() == b"img"
+    assert (tmp_path / "foto.result.json").exists()
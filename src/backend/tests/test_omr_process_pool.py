@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.core.config import settings
+from app.modules.omr_reader import process_pool
+from app.modules.omr_reader.errors import InvalidImageError, ReaderBusyError
+
+
+@pytest.fixture(autouse=True)
+def _without_read_cache(monkeypatch) -> None:
+    # Estas pruebas pasan kwargs de juguete; la cache se cubre en test_omr_read_cache.
+    monkeypatch.setattr(settings, "omr_read_cache_enabled", False)
+
+
+def _wait_for_idle(timeout_s: float = 5.0) -> int:
+    # El callback que libera el cupo corre justo despues de resolver el future.
+    deadline = time.monotonic() + timeout_s
+    while process_pool.pending_classic_reads() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return process_pool.pending_classic_reads()
+
+
+def test_submit_classic_read_rejects_when_pending_limit_is_reached(monkeypatch) -> None:
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(settings, "omr_process_pool_max_pending", 1)
+    monkeypatch.setattr(process_pool, "get_omr_process_pool", lambda: executor)
+    monkeypatch.setattr(process_pool, "_read_classic", lambda kwargs: release.wait(5) and {"ok": kwargs["tag"]})
+
+    try:
+        first = process_pool.submit_classic_read(tag=1)
+        with pytest.raises(ReaderBusyError):
+            process_pool.submit_classic_read(tag=2)
+        assert process_pool.pending_classic_reads() == 1
+
+        release.set()
+        assert first.result(timeout=5) == {"ok": 1}
+        assert _wait_for_idle() == 0
+        assert process_pool.submit_classic_read(tag=3).result(timeout=5) == {"ok": 3}
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+
+
+def test_submit_classic_read_blocks_for_a_slot_when_requested(monkeypatch) -> None:
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(settings, "omr_process_pool_max_pending", 1)
+    monkeypatch.setattr(process_pool, "get_omr_process_pool", lambda: executor)
+    monkeypatch.setattr(process_pool, "_read_classic", lambda kwargs: release.wait(5) and {"ok": kwargs["tag"]})
+
+    try:
+        first = process_pool.submit_classic_read(tag=1)
+        threading.Timer(0.05, release.set).start()
+        second = process_pool.submit_classic_read(block=True, tag=2)
+
+        assert first.result(timeout=5) == {"ok": 1}
+        assert second.result(timeout=5) == {"ok": 2}
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+    assert _wait_for_idle() == 0
+
+
+def test_submit_classic_read_runs_inline_when_pool_is_disabled(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "omr_process_pool_enabled", False)
+
+    future = process_pool.submit_classic_read(image_bytes=b"not an image")
+
+    with pytest.raises(InvalidImageError):
+        future.result()
+    assert process_pool.pending_classic_reads() == 0
+
+
+@pytest.mark.parametrize("pool_enabled", [False, True])
+def test_run_classic_read_looks_up_the_cache_off_the_event_loop(monkeypatch, pool_enabled) -> None:
+    executor = ThreadPoolExecutor(max_workers=1)
+    on_loop: list[bool] = []
+
+    def lookup(request, *, backend):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return None
+
+    monkeypatch.setattr(settings, "omr_read_cache_enabled", True)
+    monkeypatch.setattr(process_pool, "lookup_read_cache", lookup)
+    monkeypatch.setattr(process_pool, "get_omr_process_pool", lambda: executor if pool_enabled else None)
+    monkeypatch.setattr(process_pool, "_read_classic", lambda kwargs: {"ok": kwargs["image_bytes"]})
+
+    try:
+        result = asyncio.run(process_pool.run_classic_read(image_bytes=b"photo", metadata_path="template.json"))
+    finally:
+        executor.shutdown(wait=True)
+
+    assert result == {"ok": b"photo"}
+    assert on_loop == [False]
+    assert _wait_for_idle() == 0
+
+
+def test_process_pool_propagates_reader_errors_from_workers(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "omr_process_pool_enabled", True)
+    monkeypatch.setattr(settings, "omr_process_pool_workers", 1)
+    try:
+        future = process_pool.submit_classic_read(image_bytes=b"not an image")
+        with pytest.raises(InvalidImageError):
+            future.result(timeout=120)
+    finally:
+        process_pool.shutdown_omr_process_pool()
+    assert _wait_for_idle() == 0
+
+
+def test_process_pool_is_rebuilt_after_a_worker_dies(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "omr_process_pool_enabled", True)
+    monkeypatch.setattr(settings, "omr_process_pool_workers", 1)
+    try:
+        with pytest.raises(InvalidImageError):
+            process_pool.submit_classic_read(image_bytes=b"not an image").result(timeout=120)
+        broken = process_pool.get_omr_process_pool()
+        for worker in list(broken._processes.values()):
+            worker.kill()
+            worker.join(timeout=10)
+
+        # La lectura en curso (o el envio) falla una vez; las siguientes usan un pool nuevo.
+        with pytest.raises((BrokenProcessPool, InvalidImageError)):
+            process_pool.submit_classic_read(image_bytes=b"not an image").result(timeout=120)
+        with pytest.raises(InvalidImageError):
+            process_pool.submit_classic_read(image_bytes=b"not an image").result(timeout=120)
+        assert process_pool.get_omr_process_pool() is not broken
+    finally:
+        process_pool.shutdown_omr_process_pool()
+    assert _wait_for_idle() == 0
+
+
+def test_discard_broken_process_pool_only_drops_the_current_pool(monkeypatch) -> None:
+    current = ThreadPoolExecutor(max_workers=1)
+    stale = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(process_pool, "_pool", current)
+
+    process_pool.discard_broken_process_pool(stale)
+    assert process_pool._pool is current
+
+    process_pool.discard_broken_process_pool(current)
+    assert process_pool._pool is None
+    stale.shutdown()
+
+
+def test_init_worker_survives_unexpected_preload_errors(monkeypatch, caplog) -> None:
+    def broken_plan(*args, **kwargs):
+        raise KeyError("aruco_dictionary_name")
+
+    monkeypatch.setattr(process_pool, "get_template_read_plan", broken_plan)
+
+    process_pool._init_worker(settings.omr_default_metadata_path, 10.0, 1)
+
+    assert "OMR worker sin precarga de plantilla" in caplog.text
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.modules.omr_reader import process_pool
+from app.modules.omr_reader.api_service import build_omr_read_request, run_omr_read_from_image_bytes
+from app.modules.omr_reader.errors import InputFileNotFoundError
+from app.modules.omr_reader.read_cache import ReadCache, get_read_cache, read_cache_key, reset_read_cache
+
+METADATA_PATH = "data/output/template_basica_omr_v1.json"
+METADATA_FILE = Path(__file__).resolve().parents[1] / METADATA_PATH
+
+
+class _CountingEngine:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def read(self, request) -> dict:
+        self.calls += 1
+        return {
+            "template_id": "template_test",
+            "questions": [{"question_number": 1, "marked_options": ["A"]}],
+            "diagnostics": {"stage_timings_ms": {"decode": 12.0, "classify": 3.0}},
+        }
+
+
+@pytest.fixture
+def engine(monkeypatch) -> _CountingEngine:
+    fake = _CountingEngine()
+    monkeypatch.setattr("app.modules.omr_reader.api_service.get_omr_reader_engine", lambda backend: fake)
+    return fake
+
+
+def _read(**overrides) -> dict:
+    kwargs = {
+        "image_bytes": b"same-photo",
+        "metadata_path": METADATA_PATH,
+        "marked_threshold": 0.33,
+        "unmarked_threshold": 0.18,
+        "reader_backend": "classic",
+    }
+    kwargs.update(overrides)
+    return run_omr_read_from_image_bytes(**kwargs)
+
+
+def test_repeated_upload_is_answered_from_memory(engine) -> None:
+    first = _read()
+    first["diagnostics"]["uploaded_image_path"] = "uploads/a.jpg"
+    second = _read()
+
+    assert engine.calls == 1
+    assert first["diagnostics"]["read_cache"]["hit"] is False
+    assert second["diagnostics"]["read_cache"]["hit"] is True
+    assert second["diagnostics"]["read_cache"]["tier"] == "memory"
+    assert second["diagnostics"]["read_cache"]["key"] == first["diagnostics"]["read_cache"]["key"]
+    assert list(second["diagnostics"]["stage_timings_ms"]) == ["cache_lookup"]
+    assert second["questions"] == first["questions"]
+    # Cada acierto es una copia: lo que el endpoint agrega no queda en la cache.
+    assert "uploaded_image_path" not in second["diagnostics"]
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"image_bytes": b"other-photo"},
+        {"marked_threshold": 0.4},
+        {"unmarked_threshold": 0.1},
+        {"px_per_mm": 12.0},
+        {"robust_mode": True},
+        {"metadata_path": "data/output/template_basica_omr_v2.json"},
+    ],
+)
+def test_read_inputs_that_change_the_result_change_the_key(engine, overrides) -> None:
+    _read()
+    result = _read(**overrides)
+
+    assert engine.calls == 2
+    assert result["diagnostics"]["read_cache"]["hit"] is False
+
+
+def test_backend_and_llm_model_are_part_of_the_key(monkeypatch) -> None:
+    request = build_omr_read_request(image_bytes=b"same-photo", metadata_path=METADATA_PATH)
+    classic = read_cache_key(request, backend="classic", metadata_file=METADATA_FILE)
+    gemini = read_cache_key(request, backend="gemini", metadata_file=METADATA_FILE)
+    monkeypatch.setattr(settings, "gemini_model", "otro-modelo")
+
+    assert classic != gemini
+    assert read_cache_key(request, backend="gemini", metadata_file=METADATA_FILE) != gemini
+    assert read_cache_key(request, backend="classic", metadata_file=METADATA_FILE) == classic
+
+
+def test_per_upload_diagnostics_are_not_stored(monkeypatch) -> None:
+    class _EngineWithPaths(_CountingEngine):
+        def read(self, request) -> dict:
+            result = super().read(request)
+            result["diagnostics"]["debug_artifacts"] = {"aligned": "debug/a_aligned.png"}
+            result["diagnostics"]["trace_json_path"] = "uploads/a.result.json"
+            return result
+
+    fake = _EngineWithPaths()
+    monkeypatch.setattr("app.modules.omr_reader.api_service.get_omr_reader_engine", lambda backend: fake)
+
+    first = _read()
+    second = _read()
+
+    assert first["diagnostics"]["debug_artifacts"] == {"aligned": "debug/a_aligned.png"}
+    assert second["diagnostics"]["read_cache"]["hit"] is True
+    assert "debug_artifacts" not in second["diagnostics"]
+    assert "trace_json_path" not in second["diagnostics"]
+
+
+def test_read_cache_is_enabled_by_default() -> None:
+    assert settings.omr_read_cache_enabled is True
+    assert get_read_cache() is not None
+
+
+def test_classic_debug_reads_hit_only_entries_that_wrote_debug_artifacts(monkeypatch) -> None:
+    class _DebugEngine(_CountingEngine):
+        def read(self, request) -> dict:
+            result = super().read(request)
+            if request.save_debug_artifacts:
+                result["diagnostics"]["debug_artifacts"] = {"aligned": f"debug/{request.debug_base_name}.aligned.jpg"}
+            return result
+
+    fake = _DebugEngine()
+    monkeypatch.setattr("app.modules.omr_reader.api_service.get_omr_reader_engine", lambda backend: fake)
+
+    _read()
+    first_debug = _read(save_debug_artifacts=True, debug_base_name="first")
+    retry_debug = _read(save_debug_artifacts=True, debug_base_name="retry")
+    plain = _read()
+
+    # La primera lectura no escribio artefactos: la de depuracion corre y los deja para los reintentos.
+    assert fake.calls == 2
+    assert first_debug["diagnostics"]["read_cache"]["hit"] is False
+    assert retry_debug["diagnostics"]["read_cache"]["hit"] is True
+    assert retry_debug["diagnostics"]["debug_artifacts"] == {"aligned": "debug/first.aligned.jpg"}
+    assert plain["diagnostics"]["read_cache"]["hit"] is True
+    assert "debug_artifacts" not in plain["diagnostics"]
+
+
+def test_llm_debug_reads_use_the_cache(engine) -> None:
+    # Los motores LLM no escriben artefactos de depuracion: el flag no impide el acierto.
+    _read(reader_backend="gemini", save_debug_artifacts=True, uploaded_image_path="uploads/first.jpg")
+    retry = _read(reader_backend="gemini", save_debug_artifacts=True, uploaded_image_path="uploads/retry.jpg")
+
+    assert engine.calls == 1
+    assert retry["diagnostics"]["read_cache"]["hit"] is True
+    assert retry["diagnostics"]["read_cache"]["source"] == "uploads/first.jpg"
+
+
+def test_read_photo_retry_reuses_the_first_upload(engine, monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(settings, "omr_persistence_mode", "sync")
+    monkeypatch.setattr(settings, "omr_reader_backend", "gemini")
+    monkeypatch.setattr(settings, "omr_default_metadata_path", METADATA_PATH)
+    upload_paths = iter([tmp_path / "first.jpg", tmp_path / "retry.jpg"])
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.omr_read.build_uploaded_image_path",
+        lambda original_filename: next(upload_paths),
+    )
+    stored_reads: list[str] = []
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.omr_read.persist_omr_read",
+        lambda *, result, uploaded_image_path: stored_reads.append(uploaded_image_path),
+    )
+
+    with TestClient(app) as client:
+        first, retry = (
+            client.post(
+                "/api/v1/omr/read-photo",
+                files={"photo": ("foto.jpg", b"same-photo", "image/jpeg")},
+                data={"save_debug_artifacts": "true"},
+            ).json()
+            for _ in range(2)
+        )
+
+    assert engine.calls == 1
+    assert retry["diagnostics"]["read_cache"]["hit"] is True
+    assert retry["diagnostics"]["uploaded_image_path"] == str(tmp_path / "first.jpg")
+    assert retry["diagnostics"]["trace_json_path"] == first["diagnostics"]["trace_json_path"]
+    # Ni foto, ni artefactos, ni fila nueva para el reintento.
+    assert stored_reads == [str(tmp_path / "first.jpg")]
+    assert (tmp_path / "first.jpg").read_bytes() == b"same-photo"
+    assert not [path.name for path in tmp_path.iterdir() if path.name.startswith("retry")]
+
+
+@pytest.mark.parametrize(
+    ("name", "value"),
+    [
+        ("omr_aruco_detection_max_side_px", 1200),
+        ("omr_aruco_detector_profile", "fast"),
+        ("omr_decode_reduced_enabled", False),
+        ("omr_decode_oversample", 1.5),
+        ("omr_grayscale_pipeline", False),
+    ],
+)
+def test_reader_settings_are_part_of_the_key(monkeypatch, name, value) -> None:
+    request = build_omr_read_request(image_bytes=b"same-photo", metadata_path=METADATA_PATH)
+    before = read_cache_key(request, backend="classic", metadata_file=METADATA_FILE)
+    monkeypatch.setattr(settings, name, value)
+
+    assert read_cache_key(request, backend="classic", metadata_file=METADATA_FILE) != before
+
+
+def test_reader_code_digest_is_part_of_the_key(monkeypatch) -> None:
+    request = build_omr_read_request(image_bytes=b"same-photo", metadata_path=METADATA_PATH)
+    before = read_cache_key(request, backend="classic", metadata_file=METADATA_FILE)
+    monkeypatch.setattr("app.modules.omr_reader.read_cache._reader_code_digest", lambda: "otro-codigo")
+
+    assert read_cache_key(request, backend="classic", metadata_file=METADATA_FILE) != before
+
+
+def test_missing_metadata_is_reported_as_input_error() -> None:
+    request = build_omr_read_request(image_bytes=b"x", metadata_path="data/output/no_existe.json")
+    with pytest.raises(InputFileNotFoundError, match="metadata file not found"):
+        read_cache_key(request, backend="classic", metadata_file=METADATA_FILE.with_name("no_existe.json"))
+
+
+def test_disabled_cache_always_reads(engine, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "omr_read_cache_enabled", False)
+
+    _read()
+    result = _read()
+
+    assert engine.calls == 2
+    assert "read_cache" not in result["diagnostics"]
+
+
+def test_memory_tier_evicts_least_recently_used() -> None:
+    cache = ReadCache(max_entries=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == ({"v": 1}, "memory")
+    cache.put("c", {"v": 3})
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_disk_tier_survives_restart_and_is_bounded(engine, monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(settings, "omr_read_cache_db_path", str(tmp_path / "cache" / "reads.db"))
+    monkeypatch.setattr(settings, "omr_read_cache_db_max_entries", 2)
+
+    _read()
+    reset_read_cache()
+    restored = _read()
+
+    assert engine.calls == 1
+    assert restored["diagnostics"]["read_cache"]["tier"] == "disk"
+    assert _read()["diagnostics"]["read_cache"]["tier"] == "memory"
+
+    _read(image_bytes=b"photo-2")
+    _read(image_bytes=b"photo-3")
+    reset_read_cache()
+    assert _read(image_bytes=b"photo-3")["diagnostics"]["read_cache"]["tier"] == "disk"
+    assert _read()["diagnostics"]["read_cache"]["hit"] is False
+
+
+def test_classic_reads_are_cached_in_the_api_process(monkeypatch) -> None:
+    calls = []
+
+    def read_classic(read_kwargs: dict) -> dict:
+        calls.append(read_kwargs)
+        return {"questions": [], "diagnostics": {"reader_backend": "classic", "stage_timings_ms": {"decode": 1.0}}}
+
+    monkeypatch.setattr(settings, "omr_process_pool_enabled", False)
+    monkeypatch.setattr(process_pool, "_read_classic", read_classic)
+    read_kwargs = {"image_bytes": b"same-photo", "metadata_path": METADATA_PATH}
+
+    first = process_pool.submit_classic_read(**read_kwargs).result()
+    second = process_pool.submit_classic_read(**read_kwargs)
+
+    assert isinstance(second, Future) and second.done()
+    assert len(calls) == 1
+    assert first["diagnostics"]["read_cache"]["hit"] is False
+    assert second.result()["diagnostics"]["read_cache"]["hit"] is True
+    assert process_pool.pending_classic_reads() == 0
+    assert len(get_read_cache()) == 1
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+
+import pytest
+
+from app.modules.omr_reader import read_logging
+from app.modules.omr_reader.read_logging import log_read_result
+
+LOGGER_NAME = "uvicorn.error"
+
+
+def _result() -> dict:
+    return {
+        "template_id": "template_test",
+        "version": "v1",
+        "quality_summary": {"total_questions": 2, "ambiguous_questions": 1},
+        "questions": [
+            {
+                "question_number": 1,
+                "marked_options": ["A"],
+                "ambiguous_options": [],
+                "options": [{"label": "A", "fill_ratio": 0.8}, {"label": "B", "fill_ratio": 0.1}],
+            },
+            {
+                "question_number": 2,
+                "marked_options": [],
+                "ambiguous_options": ["C"],
+                "options": [{"label": "C", "fill_ratio": 0.4}, {"label": "D", "fill_ratio": 0.05}],
+            },
+        ],
+        "auxiliary": {
+            "summary": {"blocks": 1},
+            "blocks": [
+                {
+                    "block_id": "document_type",
+                    "selection_mode": "single_choice",
+                    "selected": {"status": "ok", "value": "TI", "ratios_by_row": {"0": 0.05, "1": 0.7}},
+                }
+            ],
+        },
+        "diagnostics": {
+            "reader_backend": "classic",
+            "request_total_ms": 120.5,
+            "stage_timings_ms": {"decode": 10.0},
+            "manual_review_questions": [2],
+        },
+    }
+
+
+def _log(result: dict) -> None:
+    log_read_result(
+        result=result,
+        uploaded_path=Path("uploads/a.jpg"),
+        trace_json_path=Path("uploads/a.result.json"),
+        ratios_csv_path=Path("uploads/a.ratios.csv"),
+        auxiliary_ratios_csv_path=Path("uploads/a.auxiliary.ratios.csv"),
+        configured_backend="classic",
+    )
+
+
+def test_json_mode_emits_one_compact_record_per_read(caplog, monkeypatch) -> None:
+    monkeypatch.setattr(read_logging.settings, "omr_log_format", "json")
+    monkeypatch.setattr(read_logging.settings, "omr_log_ratio_sample_rate", 0.0)
+    caplog.set_level(logging.INFO, logger=LOGGER_NAME)
+
+    _log(_result())
+
+    assert len(caplog.records) == 1
+    record = caplog.records[0]
+    payload = json.loads(record.getMessage())
+    assert record.levelno == logging.WARNING
+    assert "\n" not in record.getMessage()
+    assert payload["event"] == "omr_read"
+    assert payload["engine"] == "classic"
+    assert payload["document_type"] == "TI"
+    assert payload["alerts"] == {"ambiguous_questions": [2]}
+    assert payload["stage_timings_ms"] == {"decode": 10.0}
+
+
+def test_ratio_dump_is_sampled_at_info(caplog, monkeypatch) -> None:
+    monkeypatch.setattr(read_logging.settings, "omr_log_format", "json")
+    caplog.set_level(logging.INFO, logger=LOGGER_NAME)
+
+    monkeypatch.setattr(read_logging.settings, "omr_log_ratio_sample_rate", 1.0)
+    _log(_result())
+    ratios = json.loads(caplog.records[-1].getMessage())
+    assert ratios["event"] == "omr_read_ratios"
+    assert ratios["questions"]["1"] == {"A": 0.8, "B": 0.1}
+    assert ratios["auxiliary"]["document_type"] == {"row1": 0.7, "row0": 0.05}
+
+    caplog.clear()
+    monkeypatch.setattr(read_logging.random, "random", lambda: 0.5)
+    monkeypatch.setattr(read_logging.settings, "omr_log_ratio_sample_rate", 0.25)
+    _log(_result())
+    assert [json.loads(item.getMessage())["event"] for item in caplog.records] == ["omr_read"]
+
+
+def test_text_mode_keeps_readable_lines_and_debug_dump(caplog, monkeypatch) -> None:
+    monkeypatch.setattr(read_logging.settings, "omr_log_format", "text")
+    monkeypatch.setattr(read_logging.settings, "omr_log_ratio_sample_rate", 0.0)
+    caplog.set_level(logging.DEBUG, logger=LOGGER_NAME)
+
+    _log(_result())
+
+    messages = {item.levelno: [] for item in caplog.records}
+    for item in caplog.records:
+        messages[item.levelno].append(item.getMessage())
+    assert any(message.startswith("OMR read completed | template=template_test") for message in messages[logging.INFO])
+    assert "OMR alerta revisión manual | ambiguous_questions=[2]" in messages[logging.WARNING]
+    assert "OMR respuestas leidas:\npregunta 1: A\npregunta 2: - [REVISAR ambigua: C]" in messages[logging.DEBUG]
+    assert "OMR ratios por pregunta:\npregunta 1: A=0.8000, B=0.1000 | margin=0.7000\npregunta 2: C=0.4000, D=0.0500 | margin=0.3500" in messages[logging.DEBUG]
+    assert "OMR ratios auxiliares:\ndocument_type:\n  row1=0.7000\n  row0=0.0500" in messages[logging.DEBUG]
+
+
+def test_ratio_dump_is_not_rendered_when_not_emitted(caplog, monkeypatch) -> None:
+    monkeypatch.setattr(read_logging.settings, "omr_log_format", "text")
+    monkeypatch.setattr(read_logging.settings, "omr_log_ratio_sample_rate", 1.0)
+
+    def fail(_: dict) -> list[str]:
+        raise AssertionError("ratio lines must not be built")
+
+    monkeypatch.setattr(read_logging, "_answer_lines", fail)
+    monkeypatch.setattr(read_logging, "_question_ratio_lines", fail)
+    caplog.set_level(logging.WARNING, logger=LOGGER_NAME)
+
+    _log(_result())
+
+    assert [item.levelno for item in caplog.records] == [logging.WARNING]
+
+
+@pytest.fixture(autouse=True)
+def _restore_logger_level():
+    logger = logging.getLogger(LOGGER_NAME)
+    level = logger.level
+    yield
+    logger.setLevel(level)
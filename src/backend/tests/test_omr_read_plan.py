@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from app.modules.omr_reader.errors import InputFileNotFoundError
+from app.modules.omr_reader.read_plan import (
+    clear_template_read_plan_cache,
+    get_template_read_plan,
+)
+
+
+def _metadata() -> dict:
+    return {
+        "template_id": "template_test",
+        "version": "v1",
+        "aruco_markers": [{}, {}, {}, {}],
+        "bubbles": [
+            {
+                "bubble_id": "G01_00_01",
+                "group_id": "G01",
+                "row": 0,
+                "col": 1,
+                "label": "B",
+                "center_x_mm": 30.0,
+                "center_y_mm": 10.0,
+                "radius_mm": 2.5,
+            },
+            {
+                "bubble_id": "G01_00_00",
+                "group_id": "G01",
+                "row": 0,
+                "col": 0,
+                "label": "A",
+                "center_x_mm": 10.0,
+                "center_y_mm": 10.0,
+                "radius_mm": 2.5,
+            },
+        ],
+        "question_items": [
+            {
+                "question_number": 1,
+                "options": [
+                    {"bubble_id": "G01_00_00", "label": "A"},
+                    {"bubble_id": "G01_00_01", "label": "B"},
+                ],
+            }
+        ],
+        "auxiliary_blocks": [
+            {
+                "block_id": "document_type",
+                "block_type": "omr",
+                "x_mm": 10,
+                "y_mm": 10,
+                "width_mm": 30,
+                "height_mm": 40,
+                "omr_config": {
+                    "rows": 3,
+                    "cols": 1,
+                    "bubble_diameter_mm": 4.0,
+                    "spacing_x_mm": 8.0,
+                    "spacing_y_mm": 8.0,
+                    "selection_mode": "single_choice",
+                },
+            },
+            {"block_id": "header", "block_type": "handwrite", "omr_config": None},
+        ],
+    }
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    clear_template_read_plan_cache()
+    yield
+    clear_template_read_plan_cache()
+
+
+def _write_metadata(path: Path, payload: dict) -> Path:
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    return path
+
+
+def test_read_plan_compiles_sorted_pixel_geometry(tmp_path: Path) -> None:
+    metadata_file = _write_metadata(tmp_path / "meta.json", _metadata())
+
+    plan = get_template_read_plan(metadata_file, px_per_mm=10.0)
+
+    assert plan.bubbles.bubble_ids == ("G01_00_00", "G01_00_01")
+    assert plan.bubbles.centers_px.tolist() == [[100, 100], [300, 100]]
+    assert plan.bubbles.inner_radii_px.tolist() == [14, 14]
+    assert len(plan.auxiliary_blocks) == 1
+    assert len(plan.auxiliary_blocks[0].bubbles) == 3
+    assert not plan.bubbles.centers_px.flags.writeable
+    with pytest.raises(TypeError):
+        plan.metadata["template_id"] = "otro"
+    assert plan.page_size_px is None
+
+    with_page = _metadata()
+    with_page["page"] = {"width_mm": 215.9, "height_mm": 279.4}
+    plan = get_template_read_plan(_write_metadata(tmp_path / "page.json", with_page), px_per_mm=10.0)
+    assert plan.page_size_px == (2159, 2794)
+
+
+def test_read_plan_is_cached_and_invalidated_on_file_change(tmp_path: Path) -> None:
+    metadata_file = _write_metadata(tmp_path / "meta.json", _metadata())
+
+    first = get_template_read_plan(metadata_file, px_per_mm=10.0)
+    assert get_template_read_plan(metadata_file, px_per_mm=10.0) is first
+    assert get_template_read_plan(metadata_file, px_per_mm=5.0) is not first
+
+    payload = _metadata()
+    payload["version"] = "v2"
+    _write_metadata(metadata_file, payload)
+    stat = metadata_file.stat()
+    os.utime(metadata_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    refreshed = get_template_read_plan(metadata_file, px_per_mm=10.0)
+    assert refreshed is not first
+    assert refreshed.metadata["version"] == "v2"
+
+
+def test_read_plan_cache_evicts_least_recently_used(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr("app.modules.omr_reader.read_plan.settings.omr_read_plan_cache_size", 2)
+    files = [_write_metadata(tmp_path / f"meta_{i}.json", _metadata()) for i in range(3)]
+
+    first = get_template_read_plan(files[0], px_per_mm=10.0)
+    get_template_read_plan(files[1], px_per_mm=10.0)
+    get_template_read_plan(files[2], px_per_mm=10.0)
+
+    assert get_template_read_plan(files[0], px_per_mm=10.0) is not first
+
+
+def test_read_plan_fails_on_missing_file(tmp_path: Path) -> None:
+    with pytest.raises(InputFileNotFoundError, match="metadata file not found"):
+        get_template_read_plan(tmp_path / "missing.json", px_per_mm=10.0)
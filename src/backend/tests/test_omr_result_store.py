@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import OMRBubbleRatio, OMRRead
+from app.modules.omr_reader.result_store import build_bubble_ratio_rows, store_omr_read
+
+
+def _result() -> dict:
+    return {
+        "template_id": "template_test",
+        "version": "v1",
+        "timestamp": "2026-03-01T12:30:00+00:00",
+        "quality_summary": {"marked_options": 1, "unmarked_options": 2, "ambiguous_options": 1},
+        "questions": [
+            {
+                "question_number": 1,
+                "row": 0,
+                "options": [
+                    {"label": "A", "state": "marcada", "fill_ratio": 0.9},
+                    {"label": "B", "state": "no_marcada", "fill_ratio": 0.1},
+                ],
+                "marked_options": ["A"],
+                "ambiguous_options": [],
+            },
+            {
+                "question_number": 2,
+                "row": 1,
+                "options": [
+                    {"label": "A", "state": "ambigua", "fill_ratio": 0.4},
+                    {"label": "B", "state": "no_marcada", "fill_ratio": 0.0},
+                ],
+                "marked_options": [],
+                "ambiguous_options": ["A"],
+            },
+        ],
+        "auxiliary": {
+            "blocks": [
+                {
+                    "block_id": "document_type",
+                    "selection_mode": "single_choice",
+                    "selected": {"value": "TI", "ratios_by_row": {0: 0.0, 1: 0.95}},
+                },
+                {
+                    "block_id": "student_identity_number",
+                    "selection_mode": "single_per_column",
+                    "value": "107",
+                    "columns": [
+                        {"column_index": 0, "ratios_by_row": {0: 0.0, 1: 0.9}},
+                        {"column_index": 1, "ratios_by_row": {0: 0.8, 1: 0.1}},
+                    ],
+                },
+                {
+                    "block_id": "exam_identifier",
+                    "selection_mode": "single_per_column",
+                    "value": "1530",
+                    "columns": [],
+                },
+            ]
+        },
+        "diagnostics": {"reader_backend": "classic"},
+    }
+
+
+def test_store_omr_read_inserts_read_and_all_ratios() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as db:
+        read_id = store_omr_read(db, result=_result(), uploaded_image_path="uploads/a.jpg")
+        db.commit()
+
+        read = db.get(OMRRead, read_id)
+        assert read is not None
+        assert read.exam_identifier == "1530"
+        assert read.student_document_type == "TI"
+        assert read.student_document_number == "107"
+        assert read.reader_backend == "classic"
+        assert read.read_at.year == 2026
+        assert read.manual_review_required is True
+        assert read.answers == {"1": ["A"], "2": []}
+
+        assert db.scalar(select(func.count()).select_from(OMRBubbleRatio)) == 4 + 2 + 4
+        identity = db.scalars(
+            select(OMRBubbleRatio.fill_ratio)
+            .where(OMRBubbleRatio.block_id == "student_identity_number", OMRBubbleRatio.column_index == 1)
+            .order_by(OMRBubbleRatio.row_index)
+        ).all()
+        assert identity == [0.8, 0.1]
+
+
+def test_omr_read_table_indexes_dashboard_filters() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+
+    indexed = {tuple(index["column_names"]) for index in inspect(engine).get_indexes("omr_read")}
+
+    assert ("exam_identifier", "student_document_number") in indexed
+    assert ("template_id", "read_at") in indexed
+    assert ("student_document_number",) in indexed
+
+
+def test_build_bubble_ratio_rows_skips_malformed_entries() -> None:
+    result = {"questions": [None, {"question_number": 1, "options": ["bad"]}], "auxiliary": "bad"}
+
+    assert build_bubble_ratio_rows(result=result, read_id=1) == []
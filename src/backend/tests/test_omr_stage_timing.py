@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from app.modules.omr_reader.stage_timing import StageTimer
+
+
+def test_stage_timer_accumulates_spans_in_execution_order() -> None:
+    timer = StageTimer()
+
+    with timer.span("decode"):
+        pass
+    timer.add("warp", 2.0)
+    timer.add("warp", 1.5)
+
+    stages = timer.as_dict()
+    assert list(stages) == ["decode", "warp"]
+    assert stages["decode"] >= 0.0
+    assert stages["warp"] == 3.5
+
+
+def test_stage_timer_records_span_that_raises() -> None:
+    timer = StageTimer()
+
+    with pytest.raises(ValueError):
+        with timer.span("marker_detection"):
+            raise ValueError("no markers")
+
+    assert "marker_detection" in timer.as_dict()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from app.modules.template_generator.roster_renderer import (
+    RosterStudent,
+    load_roster_csv,
+    render_roster_pdf,
+    resolve_prefilled_bubbles,
+)
+
+METADATA_PATH = Path(__file__).resolve().parents[1] / "data" / "output" / "template_basica_omr_v2_wireframe.json"
+
+
+def _metadata() -> dict:
+    return json.loads(METADATA_PATH.read_text(encoding="utf-8"))
+
+
+def _page_count(pdf_path: Path) -> int:
+    return len(re.findall(rb"/Type /Page\b(?!s)", pdf_path.read_bytes()))
+
+
+def test_resolve_prefilled_bubbles_maps_ids_to_rows_and_columns() -> None:
+    bubbles = resolve_prefilled_bubbles(
+        _metadata(),
+        student=RosterStudent(document_number="1029", document_type="ti"),
+        exam_identifier="0042",
+    )
+    by_block: dict[str, list[tuple[int, int]]] = {}
+    for bubble in bubbles:
+        by_block.setdefault(bubble.block_id, []).append((bubble.row, bubble.col))
+
+    assert by_block["document_type"] == [(1, 0)]
+    assert by_block["student_identity_number"] == [(1, 0), (0, 1), (2, 2), (9, 3)]
+    assert by_block["exam_identifier"] == [(0, 0), (0, 1), (4, 2), (2, 3)]
+
+
+def test_resolve_prefilled_bubbles_rejects_values_outside_the_grid() -> None:
+    with pytest.raises(ValueError, match="does not fit block 'student_identity_number'"):
+        resolve_prefilled_bubbles(_metadata(), student=RosterStudent(document_number="1" * 13))
+    with pytest.raises(ValueError, match="not an option of block 'document_type'"):
+        resolve_prefilled_bubbles(_metadata(), student=RosterStudent(document_number="1", document_type="XX"))
+
+
+def test_render_roster_pdf_reuses_static_page_form(tmp_path: Path) -> None:
+    form_counts = []
+    for pages in (1, 4):
+        students = [RosterStudent(document_number=str(1000 + index), document_type="CC") for index in range(pages)]
+        output_path = tmp_path / f"roster_{pages}.pdf"
+
+        paths = render_roster_pdf(metadata=_metadata(), students=students, output_path=output_path)
+
+        assert paths == [output_path]
+        assert _page_count(output_path) == pages
+        form_counts.append(output_path.read_bytes().count(b"/Subtype /Form"))
+    # La hoja estatica (y sus burbujas) se definen una sola vez, sin importar el numero de paginas.
+    assert form_counts[0] == form_counts[1]
+
+
+def test_render_roster_pdf_writes_shards(tmp_path: Path) -> None:
+    students = [RosterStudent(document_number=str(index)) for index in range(5)]
+
+    paths = render_roster_pdf(metadata=_metadata(), students=students, output_path=tmp_path / "roster.pdf", shard_size=2)
+
+    assert [path.name for path in paths] == ["roster_001.pdf", "roster_002.pdf", "roster_003.pdf"]
+    assert [_page_count(path) for path in paths] == [2, 2, 1]
+
+
+def test_render_roster_pdf_in_parallel_processes(tmp_path: Path) -> None:
+    students = [RosterStudent(document_number=str(index)) for index in range(4)]
+
+    paths = render_roster_pdf(metadata=_metadata(), students=students, output_path=tmp_path / "roster.pdf", workers=2)
+
+    assert [_page_count(path) for path in paths] == [2, 2]
+
+
+def test_render_roster_pdf_validates_every_row_first(tmp_path: Path) -> None:
+    students = [RosterStudent(document_number="1"), RosterStudent(document_number="12A")]
+
+    with pytest.raises(ValueError, match="roster row 2"):
+        render_roster_pdf(metadata=_metadata(), students=students, output_path=tmp_path / "roster.pdf")
+    assert not (tmp_path / "roster.pdf").exists()
+
+
+def test_load_roster_csv_skips_rows_without_document(tmp_path: Path) -> None:
+    roster = tmp_path / "roster.csv"
+    roster.write_text(
+        "document_number,document_type,full_name,group\n123,TI,Ana Perez,11-1\n,,Sin documento,\n",
+        encoding="utf-8",
+    )
+
+    assert load_roster_csv(roster) == [
+        RosterStudent(document_number="123", document_type="TI", full_name="Ana Perez", group="11-1")
+    ]
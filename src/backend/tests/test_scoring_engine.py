@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.modules.scoring.answer_key import (
+    answer_key_from_items,
+    answers_from_key,
+    build_answer_key,
+    load_answer_key_json,
+)
+from app.modules.scoring.engine import encode_responses, report_to_payload, score_exam
+from app.modules.scoring.errors import ScoringInputError
+
+
+def _key():
+    return build_answer_key({1: "A", 2: "B", 3: ["C", "D"], 4: []})
+
+
+def test_build_answer_key_supports_multiple_and_unscored_questions() -> None:
+    key = _key()
+
+    assert key.question_numbers == (1, 2, 3, 4)
+    assert key.option_labels == ("A", "B", "C", "D")
+    assert key.matrix.astype(int).tolist() == [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 1], [0, 0, 0, 0]]
+    assert key.scored_mask.tolist() == [True, True, True, False]
+
+
+def test_answer_key_from_items_uses_item_bank_order() -> None:
+    items = [
+        SimpleNamespace(correct_answer="B", options={"A": "x", "B": "y", "C": "z", "D": "w"}),
+        SimpleNamespace(correct_answer="D", options={"A": "x", "B": "y", "C": "z", "D": "w"}),
+    ]
+
+    key = answer_key_from_items(items)
+
+    assert key.question_numbers == (1, 2)
+    assert key.matrix.argmax(axis=1).tolist() == [1, 3]
+
+
+def test_load_answer_key_json_accepts_answers_or_reference_read(tmp_path: Path) -> None:
+    answers_file = tmp_path / "key.json"
+    answers_file.write_text(json.dumps({"answers": {"1": "a", "2": "C"}}), encoding="utf-8")
+    read_file = tmp_path / "reference.result.json"
+    read_file.write_text(
+        json.dumps({"questions": [{"question_number": 1, "marked_options": ["A"]}, {"question_number": 2, "marked_options": ["C"]}]}),
+        encoding="utf-8",
+    )
+
+    assert load_answer_key_json(answers_file).matrix.tolist() == load_answer_key_json(read_file).matrix.tolist()
+    with pytest.raises(ScoringInputError):
+        load_answer_key_json(tmp_path / "missing.json")
+    bad_file = tmp_path / "bad.json"
+    bad_file.write_text(json.dumps({"answers": {"uno": "A"}}), encoding="utf-8")
+    with pytest.raises(ScoringInputError, match="question number must be an integer"):
+        load_answer_key_json(bad_file)
+    assert answers_from_key(load_answer_key_json(read_file)) == {1: ["A"], 2: ["C"]}
+
+
+def test_encode_responses_flags_unknown_labels() -> None:
+    responses = encode_responses([{"1": ["A"], 2: ["Z"], 99: ["A"]}], _key())
+
+    assert responses.shape == (1, 4, 5)
+    assert responses[0, 0, 0]
+    assert responses[0, 1, 4]
+    assert responses.sum() == 2
+
+
+def test_score_exam_matches_per_student_loop() -> None:
+    key = _key()
+    students = [
+        {1: ["A"], 2: ["B"], 3: ["C", "D"], 4: ["A"]},
+        {1: ["A"], 2: ["C"], 3: ["C"]},
+        {1: ["B"], 2: ["B", "C"], 3: ["D", "C"]},
+        {2: ["B"]},
+        {1: ["A"], 2: ["B"], 3: ["X"]},
+    ]
+
+    report = score_exam(students, key, chunk_size=2)
+
+    assert report.num_students == 5
+    assert report.num_scored_questions == 3
+    assert report.student_scores.tolist() == [3, 1, 1, 1, 2]
+    assert report.item_difficulty[:3].tolist() == pytest.approx([0.6, 0.6, 0.4])
+    assert np.isnan(report.item_difficulty[3])
+    assert report.option_counts[1].tolist() == [0, 4, 2, 0]
+    assert report.blank_counts.tolist() == [1, 0, 1, 4]
+    assert report.multi_mark_counts.tolist() == [0, 1, 2, 0]
+
+    # Discriminacion: correlacion punto-biserial corregida contra el puntaje resto.
+    correct = report.student_correct[:, 0].astype(float)
+    rest = report.student_scores - correct
+    assert report.item_discrimination[0] == pytest.approx(np.corrcoef(correct, rest)[0, 1])
+
+
+def test_score_exam_is_independent_of_chunk_size() -> None:
+    rng = np.random.default_rng(7)
+    labels = np.array(["A", "B", "C", "D"])
+    key = build_answer_key({q: str(labels[q % 4]) for q in range(1, 41)})
+    students = [
+        {q: [str(labels[rng.integers(0, 4)])] for q in range(1, 41) if rng.random() > 0.05}
+        for _ in range(300)
+    ]
+
+    whole = score_exam(students, key, chunk_size=1000)
+    chunked = score_exam(iter(students), key, chunk_size=37)
+
+    assert np.array_equal(whole.student_scores, chunked.student_scores)
+    assert np.allclose(whole.item_discrimination, chunked.item_discrimination, equal_nan=True)
+    assert np.array_equal(whole.option_counts, chunked.option_counts)
+
+
+def test_report_to_payload_is_json_serializable() -> None:
+    report = score_exam([{1: ["A"]}, {1: ["B"]}], _key())
+
+    payload = report_to_payload(report)
+
+    json.dumps(payload)
+    assert payload["students"][0] == {"index": 0, "score": 1, "percent": 33.33}
+    assert payload["items"][3]["difficulty"] is None
+
+
+def test_score_exam_rejects_empty_batches() -> None:
+    with pytest.raises(ScoringInputError):
+        score_exam([], _key())
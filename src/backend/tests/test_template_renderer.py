@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from app.modules.template_generator.config_loader import load_template_config
+from app.modules.template_generator.draw_batch import DrawBatch
+from app.modules.template_generator.layout_engine import build_template_layout
+from app.modules.template_generator.template_renderer import render_template_pdf
+
+
+def test_render_template_pdf_copies_reference_one_static_form(base_config_json: Path, tmp_path: Path) -> None:
+    layout = build_template_layout(load_template_config(base_config_json))
+
+    single = render_template_pdf(layout, tmp_path / "single.pdf")
+    copies = render_template_pdf(layout, tmp_path / "copies.pdf", copies=5)
+
+    content = copies.read_bytes()
+    assert len(re.findall(rb"/Type /Page\b(?!s)", content)) == 5
+    assert content.count(b"/Subtype /Form") == single.read_bytes().count(b"/Subtype /Form")
+    # 5 copias cuestan solo referencias extra, no el dibujo completo.
+    assert len(content) < 2 * single.stat().st_size
+
+
+def test_render_template_pdf_rejects_zero_copies(base_config_json: Path, tmp_path: Path) -> None:
+    layout = build_template_layout(load_template_config(base_config_json))
+
+    with pytest.raises(ValueError, match="copies"):
+        render_template_pdf(layout, tmp_path / "none.pdf", copies=0)
+
+
+def test_draw_batch_shares_one_form_per_bubble_style(tmp_path: Path) -> None:
+    pdf = canvas.Canvas(str(tmp_path / "batch.pdf"), pageCompression=0)
+    batch = DrawBatch(pdf)
+    for index in range(10):
+        batch.bubble(50 + index * 20, 100, 6, line_width=0.7)
+        batch.centered_text(50 + index * 20, 98, "A", font_name="Helvetica", font_size_pt=8, gray=0.78)
+    batch.bubble(50, 200, 9, line_width=0.7)
+    batch.flush()
+    pdf.showPage()
+    pdf.save()
+
+    content = (tmp_path / "batch.pdf").read_bytes()
+    assert content.count(b"/Subtype /Form") == 2
+    assert content.count(b" Do") == 11
+    # Un solo objeto de texto con un solo cambio de fuente para las 10 etiquetas.
+    assert content.count(b"/F1 8 Tf") == 1
+    assert content.count(b"(A) Tj") == 10